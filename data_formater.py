@@ -4,9 +4,11 @@ Processes and formats wind data from JSON files for use in OpenRocket simulation
 Handles both random and sequential sampling of wind data based on user parameters.
 """
 
-import json
-from datetime import datetime, timedelta
-from random import randrange
+import numpy as np
+
+from station_registry import DEFAULT_STATION, get_default_registry
+from wind_database import si_profile
+from wind_timeline import WindTimeline
 
 class WindDataFormatter:
     """
@@ -21,51 +23,82 @@ class WindDataFormatter:
         wind_data_range (list): List of dates for wind data collection
         num_simulations (int): Number of simulations to run
         wind_data (list): Processed wind data for simulations
+        station (str): Code of the station providing the wind data
+        period (str): Forecast period the profiles are taken from (AM, PM or NIGHT)
+        launch_window (tuple): Daily ('HH:MM', 'HH:MM') launch window, None to use the period
+        database (WindDatabase): Indexed wind profiles, parsed once; a LaunchWindowDatabase
+            holding one profile per launch time with a launch window
+        sampler (samplers.Sampler): Strategy drawing every run, None for the default sequential/random scheme
+        seeds (list): OpenRocket seed of each run chosen by the sampler, None without a sampler
+        seed (int): Seed of the random profile draws, None for a fresh one on every launch
+        rng (np.random.Generator): Generator of the random profile draws
     """
 
-    def __init__(self, gui_data):
+    def __init__(self, gui_data, database=None, sampler=None, seed=None):
         """
         Initialize the wind data formatter with GUI data.
         
         Args:
-            gui_data: GUI class instance containing wind_data_range and num_simulations
+            gui_data: GUI class instance containing wind_data_range, num_simulations and optionally
+                station, period and launch_window
+            database (WindDatabase): Indexed wind profiles, taken from the station registry if None
+            sampler (samplers.Sampler): Strategy drawing every run and its seed
+            seed (int): Seed of the random profile draws, so that a campaign can be drawn again
+                identically, e.g. to resume its journal
         """
         self.wind_data_range = gui_data.wind_data_range
         self.num_simulations = gui_data.num_simulations
+        self.station = getattr(gui_data, "station", None) or DEFAULT_STATION
+        self.period = getattr(gui_data, "period", None) or "AM"
+        self.launch_window = getattr(gui_data, "launch_window", None)
         self.wind_data = []
+        if database is not None:
+            self.database = database
+        elif self.launch_window:
+            timeline = WindTimeline.from_registry(get_default_registry(), self.station)
+            self.database = timeline.launch_window(self.wind_data_range[0], self.wind_data_range[-1],
+                                                   *self.launch_window)
+        else:
+            self.database = get_default_registry().get(self.station, self.period)
+        self.sampler = sampler
+        self.seeds = None
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
         
     def format_data(self):
         """
         Format wind data based on the date range and number of simulations.
         
-        Processes wind data according to sampling rate:
+        Processes wind data according to sampling rate (launch times instead
+        of days with a launch window):
         - If sample_rate > 1: Use random sampling
         - If sample_rate <= 1: Use sequential sampling with possible random fill
+
+        With a sampler, every run and its seed is drawn by the sampler instead.
         
         Returns:
             list: Formatted wind data ready for OpenRocket simulations
         """
-        sample_rate = len(self.wind_data_range) / self.num_simulations
+        if self.sampler is not None:
+            profiles, self.seeds = self.sampler.draw(self.database, self.wind_data_range[0],
+                                                     self.wind_data_range[-1], self.num_simulations)
+            self.wind_data.extend(profiles)
+            return self.wind_data
+
+        candidates = len(self.database) if self.launch_window else len(self.wind_data_range)
+        sample_rate = candidates / self.num_simulations
         
-        if sample_rate > 1:
+        if sample_rate > 1 or not candidates:
             self.wind_data.extend(self.get_random_wind_data(self.num_simulations))
         else:
             sample_rate = 1/sample_rate
             sure_sim, random_sim = divmod(sample_rate, 1)
-            
-            with open("data/CYYU.upper_winds.json", 'r', encoding="utf-8") as f:
-                wind_database = json.load(f)
-            
-            periode_cible = "AM"
-            for day in self.wind_data_range:
-                resultats = []
-                for entry in wind_database:
-                    datetime_str = entry.get("datetime", "")[:10]
-                    if datetime_str == day and periode_cible in entry and "data" in entry[periode_cible]:
-                        resultats.extend(entry["AM"]["data"])
-                self.wind_data.extend(self.wind_data_to_or_input(resultats, int(sure_sim)))
+
+            # The date range is contiguous, so a single bisection gives every profile in it
+            for profile in self.database.profiles_between(self.wind_data_range[0], self.wind_data_range[-1]):
+                self.wind_data.extend([profile] * int(sure_sim))
                 
-            if self.num_simulations - len(self.wind_data) != 0:
+            if self.num_simulations - len(self.wind_data) > 0:
                 self.wind_data.extend(self.get_random_wind_data(self.num_simulations - len(self.wind_data)))
         
         return self.wind_data
@@ -80,23 +113,23 @@ class WindDataFormatter:
         Returns:
             list: Randomly selected and formatted wind data
         """
-        periode_cible = "AM"
-        data_to_return = []
-        
-        with open("data/CYYU.upper_winds.json", 'r', encoding="utf-8") as f:
-            wind_database = json.load(f)
-        
-        for _ in range(num_sim_restant):
-            resultats = []
-            random_number = randrange(0, len(self.wind_data_range))
-            day = self.wind_data_range[random_number]
-            for entry in wind_database:
-                datetime_str = entry.get("datetime", "")[:10]
-                if datetime_str == day and periode_cible in entry and "data" in entry[periode_cible]:
-                    resultats.extend(entry["AM"]["data"])
-                    data_to_return.extend(self.wind_data_to_or_input(resultats, 1))
-        
-        return data_to_return
+        return self.database.random_profiles(self.wind_data_range[0], self.wind_data_range[-1], num_sim_restant,
+                                             self.rng)
+
+    def iter_random_wind_data(self):
+        """
+        Draw random wind profiles from the date range, without end.
+
+        Yields:
+            np.ndarray: Randomly selected and formatted wind profile
+        """
+        lo, hi = self.database.day_slice(self.wind_data_range[0], self.wind_data_range[-1])
+        if hi == lo:
+            return
+        while True:
+            for index in self.database.random_indices(self.wind_data_range[0], self.wind_data_range[-1], 64,
+                                                      self.rng):
+                yield self.database.profile(index)
 
     @staticmethod
     def wind_data_to_or_input(wind_data, duplicates):
@@ -104,25 +137,13 @@ class WindDataFormatter:
         Convert wind data to OpenRocket input format.
         
         Args:
-            wind_data (list): Raw wind data points
+            wind_data (list): Raw wind data points, in station file units
             duplicates (int): Number of times to duplicate the data
             
         Returns:
-            list: Formatted wind data in OpenRocket-compatible format
-                 [altitude, wind_speed, direction, deviation]
+            list: The same SI profile array, duplicates times
+                 [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
         """
-        wind_data_good_format_to_append = []
-        result = []
-        
-        for data in wind_data:
-            wind_data_good_format_to_append.append([
-                data["altitude"],
-                data["wind"],
-                data["heading"],
-                0
-            ])
-        
-        for _ in range(duplicates):
-            result.append(wind_data_good_format_to_append)
-        
-        return result 
\ No newline at end of file
+        profile = si_profile([[data["altitude"], data["wind"], data["heading"], 0] for data in wind_data])
+        profile.flags.writeable = False
+        return [profile] * duplicates
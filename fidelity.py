@@ -0,0 +1,123 @@
+"""
+Simulation fidelity module.
+Named tiers of OpenRocket integration settings, from the document's own
+options down to coarse screening steps, and the selection of the runs a
+screening campaign has to confirm at full fidelity.
+"""
+
+import contextlib
+import math
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+
+class FidelityTier(NamedTuple):
+    """
+    Integration settings applied to the options of a simulation.
+
+    Settings left to None keep the value stored in the .ork document.
+
+    Attributes:
+        name (str): Tier name
+        time_step (float): Integration time step in seconds
+        max_step_angle (float): Maximum rotation of the rocket per step, in radians
+        max_time (float): Simulated time after which a run is terminated, in seconds
+    """
+    name: str
+    time_step: Optional[float] = None
+    max_step_angle: Optional[float] = None
+    max_time: Optional[float] = None
+
+
+TIERS = {
+    "full": FidelityTier("full"),
+    "standard": FidelityTier("standard", time_step=0.02, max_step_angle=math.radians(5)),
+    "coarse": FidelityTier("coarse", time_step=0.05, max_step_angle=math.radians(10), max_time=1200.0),
+    "screening": FidelityTier("screening", time_step=0.1, max_step_angle=math.radians(20), max_time=600.0),
+}
+DEFAULT_TIER = "full"
+
+# Option accessors of each setting, applied only if the loaded OpenRocket version has them
+_OPTION_ACCESSORS = {
+    "time_step": ("getTimeStep", "setTimeStep"),
+    "max_step_angle": ("getMaximumStepAngle", "setMaximumStepAngle"),
+    "max_time": ("getMaxSimulationTime", "setMaxSimulationTime"),
+}
+
+
+@contextlib.contextmanager
+def applied_fidelity(sim, tier=DEFAULT_TIER):
+    """
+    Apply a fidelity tier to the options of a simulation for the duration of a block.
+
+    The document's own settings are read on entry and written back on exit,
+    so nothing about the simulation is kept once the block is left and the
+    "full" tier, which leaves the options untouched, always finds them.
+
+    Args:
+        sim: OpenRocket simulation
+        tier (str): Name of a tier of TIERS
+
+    Raises:
+        ValueError: If the tier is unknown
+    """
+    if tier not in TIERS:
+        raise ValueError(f"Unknown fidelity tier {tier!r}, expected one of {tuple(TIERS)}")
+    if tier == DEFAULT_TIER:
+        yield
+        return
+    opts = sim.getOptions()
+    accessors = {field: names for field, names in _OPTION_ACCESSORS.items()
+                 if hasattr(opts, names[0]) and hasattr(opts, names[1])}
+    document = {field: float(getattr(opts, getter)()) for field, (getter, _) in accessors.items()}
+
+    settings = TIERS[tier]._asdict()
+    try:
+        for field, (_, setter) in accessors.items():
+            if settings[field] is not None:
+                getattr(opts, setter)(settings[field])
+        yield
+    finally:
+        for field, (_, setter) in accessors.items():
+            getattr(opts, setter)(document[field])
+
+
+def tail_indices(x, y, apogee, fraction=0.1):
+    """
+    Select the runs that define the tails of a campaign's dispersion.
+
+    A run is in the tails if its landing point is among the fraction farthest
+    from the landing centroid (Mahalanobis distance), or its apogee among the
+    fraction / 2 lowest or highest. Runs without a landing point, e.g. of a
+    campaign whose goal stops at apogee, are only selected on their apogee,
+    and so are all runs when fewer than three landed.
+
+    Args:
+        x (np.ndarray): Landing x of every run, in meters
+        y (np.ndarray): Landing y of every run, in meters
+        apogee (np.ndarray): Apogee of every run, in meters
+        fraction (float): Share of the runs selected on each criterion
+
+    Returns:
+        np.ndarray: Sorted indices of the tail runs
+    """
+    points = np.column_stack((x, y))
+    n = len(points)
+    if n < 3:
+        return np.arange(n)
+    count = max(1, int(math.ceil(fraction * n)))
+
+    apogee = np.asarray(apogee, dtype=np.float64)
+    known = np.flatnonzero(np.isfinite(apogee))
+    order = known[np.argsort(apogee[known])]
+    half = max(1, count // 2)
+    selected = set(order[:half]) | set(order[-half:])
+
+    valid = np.isfinite(points).all(axis=1)
+    if np.count_nonzero(valid) >= 3:
+        centered = points[valid] - np.mean(points[valid], axis=0)
+        precision = np.linalg.pinv(np.cov(centered.T))
+        distance = np.einsum('ij,jk,ik->i', centered, precision, centered)
+        selected |= set(np.flatnonzero(valid)[np.argsort(distance)[-count:]])
+    return np.array(sorted(selected), dtype=np.int64)
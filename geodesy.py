@@ -0,0 +1,172 @@
+"""
+Geodesy module.
+Vectorized distance and bearing between launch and landing coordinates,
+with flat-earth, haversine and Vincenty (WGS-84) methods. Every function
+accepts scalars or NumPy arrays of latitudes/longitudes in degrees, so the
+landing points of a whole campaign are converted in one call.
+
+Bearings follow the convention of the landing plots: radians measured
+counterclockwise from east, so x = range * cos(bearing) points east and
+y = range * sin(bearing) points north.
+"""
+
+import numpy as np
+
+# WGS-84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+# Mean earth radius used by the spherical (haversine) method
+EARTH_RADIUS = 6371008.8
+
+METHODS = ("flat", "haversine", "vincenty")
+
+VINCENTY_MAX_ITERATIONS = 200
+VINCENTY_TOLERANCE = 1e-12
+
+
+def _radians(*values):
+    return [np.radians(np.asarray(v, dtype=np.float64)) for v in values]
+
+
+def azimuth_to_bearing(azimuth):
+    """
+    Convert a compass azimuth to the plot bearing convention.
+
+    Args:
+        azimuth: Azimuth in radians, clockwise from north
+
+    Returns:
+        Bearing in radians, counterclockwise from east, in (-pi, pi]
+    """
+    return np.angle(np.exp(1j * (np.pi / 2 - azimuth)))
+
+
+def flat_offset(lat0, lon0, lat1, lon1):
+    """
+    East/north offset of end points from start points on a local tangent plane.
+
+    Degrees are scaled by the WGS-84 meridian and prime-vertical radii of
+    curvature at the mean latitude, so the result stays accurate away from
+    the equator for the few-kilometer distances of a rocket flight.
+
+    Args:
+        lat0, lon0: Start latitude/longitude in degrees
+        lat1, lon1: End latitude/longitude in degrees
+
+    Returns:
+        tuple: (east, north) offsets in meters
+    """
+    phi0, lam0, phi1, lam1 = _radians(lat0, lon0, lat1, lon1)
+    phi_mean = (phi0 + phi1) / 2
+    w = 1 - WGS84_E2 * np.sin(phi_mean) ** 2
+    meridian_radius = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    normal_radius = WGS84_A / np.sqrt(w)
+    dlam = np.angle(np.exp(1j * (lam1 - lam0)))  # wrap across the antimeridian
+    return dlam * normal_radius * np.cos(phi_mean), (phi1 - phi0) * meridian_radius
+
+
+def haversine(lat0, lon0, lat1, lon1, radius=EARTH_RADIUS):
+    """
+    Great-circle distance and initial azimuth on a sphere.
+
+    Args:
+        lat0, lon0: Start latitude/longitude in degrees
+        lat1, lon1: End latitude/longitude in degrees
+        radius (float): Sphere radius in meters
+
+    Returns:
+        tuple: (distance in meters, azimuth in radians clockwise from north)
+    """
+    phi0, lam0, phi1, lam1 = _radians(lat0, lon0, lat1, lon1)
+    dphi = phi1 - phi0
+    dlam = lam1 - lam0
+    h = np.sin(dphi / 2) ** 2 + np.cos(phi0) * np.cos(phi1) * np.sin(dlam / 2) ** 2
+    distance = 2 * radius * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+    azimuth = np.arctan2(np.sin(dlam) * np.cos(phi1),
+                         np.cos(phi0) * np.sin(phi1) - np.sin(phi0) * np.cos(phi1) * np.cos(dlam))
+    return distance, azimuth
+
+
+def vincenty(lat0, lon0, lat1, lon1):
+    """
+    Geodesic distance and initial azimuth on the WGS-84 ellipsoid (Vincenty's inverse formula).
+
+    Points for which the iteration does not converge (nearly antipodal pairs)
+    get NaN.
+
+    Args:
+        lat0, lon0: Start latitude/longitude in degrees
+        lat1, lon1: End latitude/longitude in degrees
+
+    Returns:
+        tuple: (distance in meters, azimuth in radians clockwise from north)
+    """
+    phi0, lam0, phi1, lam1 = np.broadcast_arrays(*_radians(lat0, lon0, lat1, lon1))
+    f = WGS84_F
+    big_l = lam1 - lam0
+    u1 = np.arctan((1 - f) * np.tan(phi0))
+    u2 = np.arctan((1 - f) * np.tan(phi1))
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = big_l.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+    for _ in range(VINCENTY_MAX_ITERATIONS):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam)
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sin_alpha = np.where(sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lam / sin_sigma)
+            cos2_alpha = 1 - sin_alpha ** 2
+            cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / cos2_alpha)
+        c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        lam_next = big_l + (1 - c) * f * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)))
+        converged = np.abs(lam_next - lam) < VINCENTY_TOLERANCE
+        lam = lam_next
+        if converged.all():
+            break
+
+    u_sq = cos2_alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+        - big_b / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    distance = WGS84_B * big_a * (sigma - delta_sigma)
+    azimuth = np.arctan2(cos_u2 * np.sin(lam), cos_u1 * sin_u2 - sin_u1 * cos_u2 * np.cos(lam))
+
+    distance = np.where(converged, distance, np.nan)
+    azimuth = np.where(converged, azimuth, np.nan)
+    return distance, azimuth
+
+
+def range_bearing(lat0, lon0, lat1, lon1, method="flat"):
+    """
+    Range and bearing of end points from start points.
+
+    Args:
+        lat0, lon0: Start (launch) latitude/longitude in degrees, scalars or arrays
+        lat1, lon1: End (landing) latitude/longitude in degrees, scalars or arrays
+        method (str): "flat", "haversine" or "vincenty"
+
+    Returns:
+        tuple: (range in meters, bearing in radians counterclockwise from east)
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method == "flat":
+        east, north = flat_offset(lat0, lon0, lat1, lon1)
+        return np.hypot(east, north), np.arctan2(north, east)
+    if method == "haversine":
+        distance, azimuth = haversine(lat0, lon0, lat1, lon1)
+    elif method == "vincenty":
+        distance, azimuth = vincenty(lat0, lon0, lat1, lon1)
+    else:
+        raise ValueError(f"Unknown geodesy method {method!r}, expected one of {METHODS}")
+    return distance, azimuth_to_bearing(azimuth)
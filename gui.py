@@ -1,13 +1,15 @@
 """
 GUI module for rocket simulation input collection.
 Uses tkinter to create an interface for users to input simulation parameters.
-Collects .ork file selection, number of simulations, and date range for wind data.
+Collects .ork file selection, number of simulations, date range and time of day for wind data.
 """
 
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import tkcalendar
 from datetime import datetime, timedelta
+from station_registry import DEFAULT_STATION, get_default_registry
+from wind_stream import PERIODS
 
 class Gui:
     """
@@ -16,13 +18,18 @@ class Gui:
     Creates a window with input fields for:
     - .ork file selection
     - Number of simulations
+    - Wind data station
     - Date range for wind data
+    - Forecast period or daily launch window
     
     Attributes:
         root (tk.Tk): Main window of the application
         ork_file (str): Path to selected .ork file
         num_simulations (int): Number of simulations to run
+        station (str): Code of the station providing the wind data
         wind_data_range (list): List of dates for wind data collection
+        period (str): Forecast period of the wind data (AM, PM or NIGHT)
+        launch_window (tuple): Daily ('HH:MM', 'HH:MM') launch window, None to use the period
     """
 
     def __init__(self, root):
@@ -34,11 +41,14 @@ class Gui:
         """
         self.root = root
         self.root.title("Simulation Input")
-        self.root.geometry("400x500")
+        self.root.geometry("400x700")
 
         self.ork_file = None
         self.num_simulations = None
+        self.station = None
         self.wind_data_range = []
+        self.period = None
+        self.launch_window = None
 
         # Create the input frame
         self.input_frame = tk.Frame(root)
@@ -55,6 +65,12 @@ class Gui:
         self.simulation_count = tk.Spinbox(self.input_frame, from_=1, to=1000, width=10)
         self.simulation_count.pack(pady=10)
 
+        #Wind data station
+        stations = get_default_registry().codes() or [DEFAULT_STATION]
+        tk.Label(self.input_frame, text="Wind data station:").pack(pady=5)
+        self.station_choice = tk.StringVar(value=DEFAULT_STATION if DEFAULT_STATION in stations else stations[0])
+        tk.OptionMenu(self.input_frame, self.station_choice, *stations).pack(pady=5)
+
         #Wind data start date
         tk.Label(self.input_frame, text="Start Date").pack(pady=5)
         self.date_start = tkcalendar.DateEntry(self.input_frame)
@@ -65,6 +81,16 @@ class Gui:
         self.date_end = tkcalendar.DateEntry(self.input_frame)
         self.date_end.pack(pady=10)
 
+        #Forecast period, used without a launch window
+        tk.Label(self.input_frame, text="Forecast period:").pack(pady=5)
+        self.period_choice = tk.StringVar(value=PERIODS[0])
+        tk.OptionMenu(self.input_frame, self.period_choice, *PERIODS).pack(pady=5)
+
+        #Daily launch window, overrides the forecast period
+        tk.Label(self.input_frame, text="Launch window (HH:MM-HH:MM, optional):").pack(pady=5)
+        self.launch_window_entry = tk.Entry(self.input_frame, width=15)
+        self.launch_window_entry.pack(pady=5)
+
         self.confirm_button = tk.Button(self.input_frame, text="Confirm", command=self.start_loading)
         self.confirm_button.pack(pady=20)
 
@@ -88,6 +114,7 @@ class Gui:
         - Valid .ork file selection
         - Valid number of simulations
         - Valid date range
+        - Valid launch window, if any
         
         Creates wind_data_range based on selected dates.
         """
@@ -106,6 +133,21 @@ class Gui:
             messagebox.showerror("Error", "Please enter a valid number of simulations.")
             return
 
+        self.station = self.station_choice.get()
+        self.period = self.period_choice.get()
+
+        window = self.launch_window_entry.get().strip()
+        self.launch_window = None
+        if window:
+            try:
+                opening, closing = (part.strip() for part in window.split("-"))
+                datetime.strptime(opening, "%H:%M")
+                datetime.strptime(closing, "%H:%M")
+            except ValueError:
+                messagebox.showerror("Error", "Please enter the launch window as HH:MM-HH:MM.")
+                return
+            self.launch_window = (opening, closing)
+
         # Makes sure the first date in list is the oldest
         if self.date_start.get_date() > self.date_end.get_date():
             temp = self.date_start
@@ -3,19 +3,156 @@ Main module for rocket simulation application.
 Coordinates GUI input collection, wind data formatting, and OpenRocket simulation execution.
 """
 
+import argparse
+
+import numpy as np
+
 import gui
+import fidelity
+import metrics
 import orhelper_sim as orhs
+import point_mass
+import surrogate
 from data_formater import WindDataFormatter
+from or_daemon import DEFAULT_SOCKET_PATH, SimulationClient
+from result_cache import DEFAULT_CACHE_DIR, ResultCache
+from run_journal import campaign_wind_seed
+from samplers import SAMPLERS
+from trajectory_store import TrajectoryStore
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Monte Carlo OpenRocket simulations with real wind data")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of parallel workers (default: 1)")
+    parser.add_argument("--parallel", choices=("processes", "threads"), default="processes",
+                        help="run workers as processes with one JVM each, or as threads sharing one JVM")
+    parser.add_argument("--daemon-socket", default=DEFAULT_SOCKET_PATH,
+                        help="socket of a running or_daemon.py, used when it answers (default: %(default)s)")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="always start a local JVM, even if a daemon is running")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="campaign seed making the runs reproducible; enables the result cache")
+    parser.add_argument("--result-cache", default=DEFAULT_CACHE_DIR,
+                        help="directory of the simulation result cache (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="do not read or write the result cache")
+    parser.add_argument("--journal", default=None,
+                        help="journal file recording every completed run")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip the runs already recorded in the journal")
+    parser.add_argument("--python-listeners", action="store_true",
+                        help="capture landing points with the python listener instead of the simulated data")
+    parser.add_argument("--geodesy", choices=("flat", "haversine", "vincenty"), default="flat",
+                        help="method converting landing coordinates to range and bearing (default: flat)")
+    parser.add_argument("--adaptive", type=float, default=None, metavar="TOLERANCE",
+                        help="keep drawing wind profiles until the landing statistics vary by less than this "
+                             "relative tolerance (e.g. 0.02); the GUI simulation count becomes the maximum")
+    parser.add_argument("--sampler", choices=sorted(SAMPLERS), default=None,
+                        help="variance-reduced sampling of the wind profiles and run seeds")
+    parser.add_argument("--scale-spread", type=float, default=0.0, metavar="FRACTION",
+                        help="with --sampler, also scale every profile's wind speeds by a sampled factor in "
+                             "[1 - FRACTION, 1 + FRACTION] (default: 0, measured speeds)")
+    parser.add_argument("--backend", choices=("openrocket", "pointmass", "surrogate"), default="openrocket",
+                        help="simulate with OpenRocket, screen with the vectorized point-mass model, or predict "
+                             "with the surrogate trained on previous OpenRocket runs of the .ork file")
+    parser.add_argument("--validate", action="store_true",
+                        help="with --backend pointmass, also run OpenRocket and report the point-mass errors")
+    parser.add_argument("--altitude-step", type=float, default=None, metavar="METERS",
+                        help="resample every wind profile onto a common altitude grid with this spacing")
+    parser.add_argument("--trajectories", default=None, metavar="DIR",
+                        help="store the flight data time series of every run in this trajectory store")
+    parser.add_argument("--flight-data", nargs="+", default=None, metavar="TYPE",
+                        help="FlightDataType names recorded for every run (default: time, stability and "
+                             "altitude for the landing goal, nothing otherwise)")
+    parser.add_argument("--goal", default=orhs.DEFAULT_GOAL,
+                        help="what every run has to produce: 'landing', 'apogee' or comma-separated flight "
+                             "events (e.g. BURNOUT,APOGEE); runs stop as soon as it is known")
+    parser.add_argument("--fidelity", choices=tuple(fidelity.TIERS), default=fidelity.DEFAULT_TIER,
+                        help="integration settings of the runs; 'full' keeps those of the .ork document")
+    parser.add_argument("--screen", choices=tuple(fidelity.TIERS), default=None, metavar="TIER",
+                        help="screen every profile at this fidelity, then re-run the dispersion tails at --fidelity")
+    parser.add_argument("--tail-fraction", type=float, default=0.1,
+                        help="share of the screened runs re-run at full fidelity per tail criterion (default: 0.1)")
+    parser.add_argument("--profile-listeners", action="store_true",
+                        help="count and time every python listener hook call, per run and per campaign")
+    parser.add_argument("--metrics", default=None, metavar="FILE",
+                        help="time every phase of the campaign, print a summary table and export the metrics "
+                             "to FILE (JSON if it ends with .json, Prometheus text otherwise)")
+    args = parser.parse_args()
+    if args.adaptive is not None and args.goal != orhs.DEFAULT_GOAL:
+        parser.error("--adaptive converges on the landing statistics and requires --goal landing")
+    if args.backend != "openrocket" and (args.journal is not None or args.resume):
+        parser.error(f"--backend {args.backend} campaigns are not journaled and cannot be combined with "
+                     f"--journal or --resume")
+    if args.python_listeners and args.parallel == "threads" and args.workers > 1:
+        parser.error("--python-listeners serializes threaded runs under the GIL; use --parallel processes")
+    if args.scale_spread and args.sampler is None:
+        parser.error("--scale-spread scales the profiles drawn by a sampler and requires --sampler")
+    if args.adaptive is not None:
+        # Adaptive campaigns draw one random profile at a time and run it serially in this process
+        ignored = [flag for flag, used in (("--sampler", args.sampler is not None), ("--workers", args.workers != 1),
+                                           ("--journal", args.journal is not None), ("--resume", args.resume),
+                                           ("--result-cache", args.result_cache != DEFAULT_CACHE_DIR),
+                                           ("--screen", args.screen is not None)) if used]
+        if ignored:
+            parser.error("--adaptive runs serially without sampler, cache or journal and cannot be combined "
+                         "with " + ", ".join(ignored))
+    metrics.METRICS.enabled = args.metrics is not None
+
     # Get user input from GUI
-    gui_data = gui.buildGui()
+    with metrics.span("gui"):
+        gui_data = gui.buildGui()
     
     # Format wind data
-    formatter = WindDataFormatter(gui_data)
-    wind_data = formatter.format_data()
+    # Random draws are seeded, and the seed journaled, so that a resumed campaign draws the same profiles
+    wind_seed = campaign_wind_seed(args.journal, args.resume, args.seed)
+    sampler = SAMPLERS[args.sampler](seed=wind_seed, scale_spread=args.scale_spread) if args.sampler else None
+    with metrics.span("wind_data_load"):
+        formatter = WindDataFormatter(gui_data, sampler=sampler, seed=wind_seed)
+    if args.altitude_step:
+        formatter.database.set_altitude_grid(
+            np.arange(0.0, formatter.database.max_altitude + args.altitude_step, args.altitude_step))
+    with metrics.span("wind_data_format"):
+        wind_data = [] if args.adaptive is not None else formatter.format_data()
     
+    # Use the warm daemon when one is running
+    client = None if args.no_daemon else SimulationClient(args.daemon_socket)
+    if client is not None and not client.available():
+        client = None
+
     # Run the simulation
-    Sim = orhs.OpenRocketSimulation(wind_data, gui_data.ork_file)
-    Sim.simulation()
-    Sim.print_stats()
\ No newline at end of file
+    reproducible = args.seed is not None or formatter.seeds is not None
+    cache = None if args.no_cache or not reproducible else ResultCache(args.result_cache)
+    Backend = {"openrocket": orhs.OpenRocketSimulation, "pointmass": point_mass.PointMassSimulation,
+               "surrogate": surrogate.SurrogateSimulation}[args.backend]
+    # Campaigns run one after the other in this process share one JVM, which cannot be restarted
+    with orhs.keep_openrocket():
+        # The point-mass integration is deterministic and never cached
+        Sim = Backend(wind_data, gui_data.ork_file, seed=args.seed, seeds=formatter.seeds,
+                      cache=None if args.backend == "pointmass" else cache,
+                      java_listeners=not args.python_listeners, geodesy_method=args.geodesy,
+                      profile_listeners=args.profile_listeners, flight_data=args.flight_data,
+                      trajectory_store=TrajectoryStore(args.trajectories) if args.trajectories else None,
+                      fidelity_tier=args.fidelity, goal=args.goal, wind_seed=wind_seed)
+        with metrics.span("campaign"):
+            if args.adaptive is not None:
+                Sim.adaptive_simulation(formatter.iter_random_wind_data(), tolerance=args.adaptive,
+                                        max_runs=gui_data.num_simulations)
+            elif args.screen is not None:
+                Sim.screened_simulation(args.screen, args.tail_fraction, workers=args.workers,
+                                        parallel=args.parallel, client=client)
+            else:
+                Sim.simulation(workers=args.workers, parallel=args.parallel, client=client,
+                               journal=args.journal, resume=args.resume)
+        if args.validate and args.backend == "pointmass":
+            Reference = orhs.OpenRocketSimulation(Sim.wind_data, gui_data.ork_file, seed=args.seed,
+                                                  seeds=formatter.seeds, cache=cache,
+                                                  java_listeners=not args.python_listeners,
+                                                  geodesy_method=args.geodesy)
+            Reference.simulation(workers=args.workers, parallel=args.parallel, client=client)
+            point_mass.validation_report(Reference, Sim)
+    Sim.print_stats()
+
+    if args.metrics is not None:
+        print(metrics.METRICS.summary())
+        metrics.METRICS.write(args.metrics)
@@ -0,0 +1,324 @@
+"""
+Instrumentation module.
+Named timing spans, counters and histograms collected across the pipeline
+(GUI, wind data loading, JVM start, simulations, data extraction). Collection
+is off by default; while disabled every call returns after a single flag
+check, so instrumentation can stay in the hot paths.
+"""
+
+import bisect
+import json
+import math
+import threading
+import time
+
+# Upper bounds of the histogram buckets, in seconds for spans
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+
+PROMETHEUS_PREFIX = "orsim_"
+
+
+class Histogram:
+    """
+    Bucketed distribution of observed values.
+
+    Not thread-safe on its own; Metrics serializes its observations.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets, the last one infinite
+        counts (list): Number of observations per bucket
+        count (int): Number of observations
+        total (float): Sum of the observations
+        minimum (float): Smallest observation
+        maximum (float): Largest observation
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets (tuple): Sorted upper bounds of the buckets, ending with math.inf
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def observe(self, value):
+        """
+        Record one observation.
+
+        Args:
+            value (float): Observed value
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+
+    def merge(self, other):
+        """
+        Add the observations of another histogram with the same buckets.
+
+        Args:
+            other (Histogram): Histogram to add
+        """
+        if other.buckets != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    def quantile(self, q):
+        """
+        Estimate a quantile from the buckets.
+
+        Args:
+            q (float): Quantile in [0, 1]
+
+        Returns:
+            float: Upper bound of the bucket holding the quantile, capped to the
+                largest observation, NaN without observations
+        """
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def snapshot(self):
+        """
+        Get the state of the histogram.
+
+        Returns:
+            dict: Count, sum, minimum, maximum and cumulative bucket counts
+        """
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative.append(["+Inf" if math.isinf(bound) else bound, seen])
+        return {"count": self.count, "sum": self.total,
+                "min": self.minimum if self.count else None, "max": self.maximum if self.count else None,
+                "buckets": cumulative}
+
+
+class _Span:
+    """Context manager timing one execution of a named span."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, ex, value, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class _NullSpan:
+    """Span used while collection is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex, value, tb):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Metrics:
+    """
+    Registry of counters and histograms.
+
+    Spans are histograms of durations in seconds, named after the phase they
+    time. Counters and histograms are created on first use. Recording is
+    serialized by a lock, since the threads backend records from Java worker
+    threads; while disabled, calls return before taking it.
+
+    Attributes:
+        enabled (bool): Whether calls are recorded
+        counters (dict): Counter name to value
+        histograms (dict): Histogram name to Histogram
+    """
+
+    def __init__(self, enabled=False):
+        """
+        Initialize an empty registry.
+
+        Args:
+            enabled (bool): Whether calls are recorded
+        """
+        self.enabled = enabled
+        self.counters = dict()
+        self.histograms = dict()
+        self._lock = threading.Lock()
+
+    def span(self, name):
+        """
+        Time a block of code.
+
+        Args:
+            name (str): Span name
+
+        Returns:
+            Context manager recording the duration of the block
+        """
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def count(self, name, value=1):
+        """
+        Increase a counter.
+
+        Args:
+            name (str): Counter name
+            value (int): Increment
+        """
+        if self.enabled:
+            with self._lock:
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """
+        Record a value in a histogram.
+
+        Args:
+            name (str): Histogram name
+            value (float): Observed value
+        """
+        if self.enabled:
+            with self._lock:
+                histogram = self.histograms.get(name)
+                if histogram is None:
+                    histogram = self.histograms[name] = Histogram()
+                histogram.observe(value)
+
+    def reset(self):
+        """Forget every recorded value."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def drain(self):
+        """
+        Take the values recorded so far, leaving the registry empty.
+
+        Worker processes drain their registry after every run and ship the
+        values to the main process, which merges them.
+
+        Returns:
+            dict: {"counters": {name: value}, "histograms": {name: Histogram}}
+        """
+        with self._lock:
+            drained = {"counters": self.counters, "histograms": self.histograms}
+            self.counters = dict()
+            self.histograms = dict()
+        return drained
+
+    def merge(self, drained):
+        """
+        Add values drained from another registry, e.g. of a worker process.
+
+        Args:
+            drained (dict): Values returned by drain
+        """
+        with self._lock:
+            for name, value in drained["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, histogram in drained["histograms"].items():
+                if name in self.histograms:
+                    self.histograms[name].merge(histogram)
+                else:
+                    self.histograms[name] = histogram
+
+    def snapshot(self):
+        """
+        Get the recorded values.
+
+        Returns:
+            dict: {"counters": {name: value}, "histograms": {name: Histogram.snapshot()}}
+        """
+        with self._lock:
+            return {"counters": dict(sorted(self.counters.items())),
+                    "histograms": {name: self.histograms[name].snapshot() for name in sorted(self.histograms)}}
+
+    def to_prometheus(self):
+        """
+        Format the recorded values in the Prometheus text exposition format.
+
+        Returns:
+            str: Counters as <name>_total and histograms as <name> buckets, sum and count
+        """
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            metric = PROMETHEUS_PREFIX + _metric_name(name) + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name in sorted(self.histograms):
+            metric = PROMETHEUS_PREFIX + _metric_name(name)
+            snapshot = self.histograms[name].snapshot()
+            lines.append(f"# TYPE {metric} histogram")
+            lines += [f'{metric}_bucket{{le="{bound}"}} {count}' for bound, count in snapshot["buckets"]]
+            lines += [f"{metric}_sum {snapshot['sum']}", f"{metric}_count {snapshot['count']}"]
+        return "\n".join(lines) + "\n"
+
+    def summary(self):
+        """
+        Format the recorded values as a table.
+
+        Returns:
+            str: One row per histogram with count, total, mean, p95 and maximum,
+                followed by one row per counter
+        """
+        rows = ["%-28s %8s %10s %10s %10s %10s" % ("span / histogram", "count", "total", "mean", "p95", "max")]
+        for name in sorted(self.histograms):
+            h = self.histograms[name]
+            rows.append("%-28s %8i %10.3f %10.4f %10.4f %10.4f" % (name, h.count, h.total, h.total / h.count,
+                                                                 h.quantile(0.95), h.maximum))
+        if self.counters:
+            rows.append("%-28s %8s" % ("counter", "value"))
+            rows += ["%-28s %8i" % (name, value) for name, value in sorted(self.counters.items())]
+        return "\n".join(rows)
+
+    def write(self, path):
+        """
+        Export the recorded values.
+
+        Args:
+            path (str): Output file, JSON if it ends with .json, Prometheus text otherwise
+        """
+        with open(path, 'w', encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.snapshot(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+def _metric_name(name):
+    """Convert a span or counter name to a Prometheus metric name."""
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+# Registry shared by the whole pipeline
+METRICS = Metrics()
+span = METRICS.span
+count = METRICS.count
+observe = METRICS.observe
@@ -0,0 +1,284 @@
+"""
+Warm OpenRocket simulation daemon.
+Keeps a started OpenRocket instance and the loaded .ork documents in memory and
+serves simulation jobs over a Unix-domain socket, so repeated campaigns skip the
+JVM start-up and loader cost.
+
+Protocol: every request and every reply is one JSON object per line.
+A job request is {"ork_file": str, "wind_data": list, "options": dict, "seeds": list}; the
+daemon answers with one {"index", "launch_points", "landing_points", "apogee"} line per run
+followed by {"done": true}, or {"error": str} if the job fails.
+{"command": "ping"} and {"command": "shutdown"} are also understood.
+
+Run the daemon with:
+    python or_daemon.py [--socket PATH]
+"""
+
+import argparse
+import errno
+import json
+import os
+import socket
+import stat
+import socketserver
+import tempfile
+import threading
+
+import orhelper
+import orhelper_sim as orhs
+
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), "openrocket-sim.sock")
+
+# Unix-domain sockets are not available on every platform (e.g. Windows builds of Python)
+UNIX_SOCKETS_AVAILABLE = hasattr(socket, "AF_UNIX")
+
+
+def remove_stale_socket(socket_path):
+    """
+    Remove a daemon socket file nobody listens on any more.
+
+    Args:
+        socket_path (str): Path of the socket
+
+    Raises:
+        OSError: If a daemon accepts connections on the socket, or the path is not a socket
+    """
+    try:
+        mode = os.stat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, "Not a socket, refusing to replace it", socket_path)
+
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        # Nothing listens: the daemon that bound it is gone
+        os.remove(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "A simulation daemon is already listening", socket_path)
+
+
+class SimulationDaemon(socketserver.UnixStreamServer if UNIX_SOCKETS_AVAILABLE else object):
+    """
+    Unix-domain socket server running simulation jobs in a warm JVM.
+
+    Jobs are served one at a time, since they all share the single JVM of the
+    process. Loaded documents are cached by path and reloaded when the .ork
+    file changes on disk.
+
+    Attributes:
+        socket_path (str): Path of the listening socket
+        instance (orhelper.OpenRocketInstance): Started OpenRocket instance
+        orh (orhelper.Helper): Helper bound to the instance
+        documents (dict): Absolute .ork path to (mtime, document)
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        """
+        Bind the daemon socket. The JVM is started by serve().
+
+        A socket file left behind by a daemon that died is replaced; a socket
+        on which a daemon still accepts connections is not.
+
+        Args:
+            socket_path (str): Path of the listening socket
+
+        Raises:
+            OSError: If another daemon listens on socket_path, or the path is not a socket
+        """
+        if not UNIX_SOCKETS_AVAILABLE:
+            raise OSError("Unix-domain sockets are not supported on this platform")
+
+        remove_stale_socket(socket_path)
+        super().__init__(socket_path, SimulationRequestHandler)
+        self.socket_path = socket_path
+        # Identity of the bound socket file, so that serve() only removes its own
+        self._socket_inode = os.stat(socket_path).st_ino
+        self.instance = None
+        self.orh = None
+        self.documents = {}
+
+    def serve(self):
+        """Start the JVM and serve jobs until a shutdown command is received."""
+        try:
+            with orhelper.OpenRocketInstance() as instance:
+                self.instance = instance
+                self.orh = orhelper.Helper(instance)
+                print(f"OpenRocket daemon listening on {self.socket_path}")
+                self.serve_forever()
+        finally:
+            self.server_close()
+            try:
+                if os.stat(self.socket_path).st_ino == self._socket_inode:
+                    os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def get_document(self, ork_file):
+        """
+        Get a loaded document, loading it on first use or when the file changed.
+
+        Args:
+            ork_file (str): Path to OpenRocket design file
+
+        Returns:
+            OpenRocket document
+        """
+        path = os.path.abspath(ork_file)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self.documents.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, self.orh.load_doc(path))
+            self.documents[path] = cached
+        return cached[1]
+
+    def run_job(self, job):
+        """
+        Run every wind profile of a job.
+
+        Args:
+            job (dict): {"ork_file": str, "wind_data": list, "options": dict, "seeds": list}
+
+        Yields:
+            dict: One result record per wind profile
+        """
+        options = job.get("options", {})
+        doc = self.get_document(job["ork_file"])
+        sim = doc.getSimulation(options.get("simulation_index", orhs.SIMULATION_INDEX))
+
+        seeds = job.get("seeds") or [None] * len(job["wind_data"])
+        for i, (data, seed) in enumerate(zip(job["wind_data"], seeds)):
+            lp, apogee, _ = orhs.run_wind_profile(self.instance, self.orh, sim, data, seed, options)
+            yield {"index": i, "launch_points": lp.launch_points, "landing_points": lp.landing_points,
+                   "apogee": float(apogee)}
+
+
+class SimulationRequestHandler(socketserver.StreamRequestHandler):
+    """Handles the JSON-lines requests of one client connection."""
+
+    def handle(self):
+        for line in self.rfile:
+            request = json.loads(line)
+            command = request.get("command", "simulate")
+
+            if command == "ping":
+                self._send({"pong": True})
+            elif command == "shutdown":
+                self._send({"done": True})
+                # shutdown() waits for serve_forever, so it must not run on the serving thread
+                threading.Thread(target=self.server.shutdown).start()
+                return
+            else:
+                try:
+                    for record in self.server.run_job(request):
+                        self._send(record)
+                    self._send({"done": True})
+                except Exception as e:
+                    self._send({"error": f"{type(e).__name__}: {e}"})
+
+    def _send(self, message):
+        self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+
+class SimulationClient:
+    """
+    Thin client of the simulation daemon.
+
+    Attributes:
+        socket_path (str): Path of the daemon socket
+        timeout (float): Connection timeout in seconds
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=1.0):
+        """
+        Initialize the client. No connection is opened until a request is sent.
+
+        Args:
+            socket_path (str): Path of the daemon socket
+            timeout (float): Connection timeout in seconds
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        # Simulations can take a long time, only the connection itself is time-limited
+        sock.settimeout(None)
+        return sock
+
+    def _request(self, message):
+        """Send a request and yield every reply line as a dict."""
+        with self._connect() as sock, sock.makefile("rwb") as stream:
+            stream.write((json.dumps(message) + "\n").encode("utf-8"))
+            stream.flush()
+            for line in stream:
+                reply = json.loads(line)
+                yield reply
+                if "done" in reply or "error" in reply or "pong" in reply:
+                    return
+
+    def available(self):
+        """
+        Check whether a daemon answers on the socket.
+
+        Returns:
+            bool: True if the daemon replied to a ping
+        """
+        if not UNIX_SOCKETS_AVAILABLE or not os.path.exists(self.socket_path):
+            return False
+        try:
+            return any(reply.get("pong") for reply in self._request({"command": "ping"}))
+        except (OSError, ValueError):
+            return False
+
+    def shutdown(self):
+        """Ask the daemon to stop."""
+        for _ in self._request({"command": "shutdown"}):
+            pass
+
+    def simulate(self, ork_file, wind_data, options=None, seeds=None):
+        """
+        Run wind profiles on the daemon and stream the results back.
+
+        Args:
+            ork_file (str): Path to OpenRocket design file
+            wind_data (list): Wind profiles, each a list of [altitude, wind_speed, direction, deviation]
+            options (dict): Job options, e.g. {"simulation_index": 3}
+            seeds (list): Random seed of each run, None for random seeds
+
+        Yields:
+            tuple: (LandingPoint, apogee, flightdata) for each wind profile, in order.
+                No time series are transferred, so flightdata is empty.
+
+        Raises:
+            RuntimeError: If the daemon reports an error
+        """
+        job = {
+            "ork_file": os.path.abspath(ork_file),
+            "wind_data": [[list(map(float, level)) for level in data] for data in wind_data],
+            "options": options or {},
+            "seeds": seeds,
+        }
+        for reply in self._request(job):
+            if "error" in reply:
+                raise RuntimeError(f"Simulation daemon error: {reply['error']}")
+            if "index" in reply:
+                lp = orhs.LandingPoint()
+                lp.launch_points = [tuple(point) for point in reply["launch_points"]]
+                lp.landing_points = [tuple(point) for point in reply["landing_points"]]
+                yield lp, reply["apogee"], dict()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Warm OpenRocket simulation daemon")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="path of the Unix-domain socket")
+    args = parser.parse_args()
+
+    SimulationDaemon(args.socket).serve()
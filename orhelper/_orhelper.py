@@ -1,7 +1,9 @@
 import os
 import logging
+import threading
+import time
 from copy import copy
-from typing import Union, List, Iterable, Dict
+from typing import Union, List, Iterable, Dict, Tuple, Sequence
 
 import jpype
 import jpype.imports
@@ -18,11 +20,17 @@ CLASSPATH = os.environ.get("CLASSPATH", "OpenRocket-24.12.jar")
 jdk_path = os.path.join(current_directory, 'Java', 'jdk-23')
 os.environ['JAVA_HOME'] = jdk_path
 
+# Configured wind profiles kept per helper for reuse
+WIND_MODEL_CACHE_SIZE = 256
+
 __all__ = [
     'OpenRocketInstance',
     'AbstractSimulationListener',
     'Helper',
     'JIterator',
+    'listener_interfaces',
+    'listener_proxy',
+    'ListenerProfiler',
 ]
 
 class OpenRocketInstance:
@@ -202,12 +210,175 @@ class AbstractSimulationListener:
         return None
 
     def clone(self):
-        return jpype.JProxy((
-            jpype.JPackage("info").openrocket.core.simulation.listeners.SimulationListener,
-            jpype.JPackage("info").openrocket.core.simulation.listeners.SimulationEventListener,
-            jpype.JPackage("info").openrocket.core.simulation.listeners.SimulationComputationListener,
-            jpype.java.lang.Cloneable,),
-            inst=copy(self))
+        return listener_proxy(copy(self))
+
+
+# Hooks of the optional listener interfaces. OpenRocket only calls them on listeners implementing the interface.
+_EVENT_HOOKS = (
+    'addFlightEvent',
+    'handleFlightEvent',
+    'motorIgnition',
+    'recoveryDeviceDeployment',
+)
+
+_COMPUTATION_HOOKS = (
+    'preAccelerationCalculation',
+    'preAerodynamicCalculation',
+    'preAtmosphericModel',
+    'preFlightConditions',
+    'preGravityModel',
+    'preMassCalculation',
+    'preSimpleThrustCalculation',
+    'preWindModel',
+    'postAccelerationCalculation',
+    'postAerodynamicCalculation',
+    'postAtmosphericModel',
+    'postFlightConditions',
+    'postGravityModel',
+    'postMassCalculation',
+    'postSimpleThrustCalculation',
+    'postWindModel',
+)
+
+_listener_interface_cache = {}
+
+
+def listener_interfaces(listener_class) -> tuple:
+    """ Returns the names of the java listener interfaces a python listener class needs.
+        SimulationListener is always needed; SimulationEventListener and SimulationComputationListener are only
+        needed if the class overrides one of their hooks. Leaving them out keeps OpenRocket from calling into
+        python for hooks that would only run the no-op defaults of AbstractSimulationListener.
+        SimulationListener itself includes preStep and postStep, and a JProxy cannot inherit the Java defaults,
+        so every installed python listener still costs two calls into python per integration step.
+    """
+    interfaces = _listener_interface_cache.get(listener_class)
+    if interfaces is None:
+        def overrides(hooks):
+            return any(getattr(listener_class, hook) is not getattr(AbstractSimulationListener, hook)
+                       for hook in hooks)
+
+        interfaces = ('SimulationListener',)
+        if overrides(_EVENT_HOOKS):
+            interfaces += ('SimulationEventListener',)
+        if overrides(_COMPUTATION_HOOKS):
+            interfaces += ('SimulationComputationListener',)
+        _listener_interface_cache[listener_class] = interfaces
+    return interfaces
+
+
+def listener_proxy(listener: AbstractSimulationListener, profiler: "ListenerProfiler" = None):
+    """ Wraps a python listener in a JProxy exposing only the listener interfaces it needs.
+        With a profiler, every hook call is counted and timed.
+    """
+    listeners_package = jpype.JPackage("info").openrocket.core.simulation.listeners
+    interfaces = tuple(getattr(listeners_package, name) for name in listener_interfaces(type(listener)))
+    inst = listener if profiler is None else _ProfiledListener(listener, profiler)
+    return jpype.JProxy(interfaces + (jpype.java.lang.Cloneable,), inst=inst)
+
+
+# Hooks timed by ListenerProfiler
+_PROFILED_HOOKS = frozenset(('startSimulation', 'endSimulation', 'preStep', 'postStep')
+                            + _EVENT_HOOKS + _COMPUTATION_HOOKS)
+
+
+class _ProfiledListener:
+    """ Stands in for a python listener behind its JProxy, timing each hook call into a ListenerProfiler """
+
+    def __init__(self, listener: AbstractSimulationListener, profiler: "ListenerProfiler"):
+        self._listener = listener
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        attribute = getattr(self._listener, name)
+        if name not in _PROFILED_HOOKS:
+            return attribute
+
+        listener_name = type(self._listener).__name__
+        record = self._profiler.record
+
+        def timed(*args):
+            start = time.perf_counter()
+            try:
+                return attribute(*args)
+            finally:
+                record(listener_name, name, time.perf_counter() - start)
+
+        # Later calls find the timed hook directly, without going through __getattr__
+        setattr(self, name, timed)
+        return timed
+
+    def clone(self):
+        return listener_proxy(copy(self._listener), self._profiler)
+
+
+class ListenerProfiler:
+    """ Counts and times the calls OpenRocket makes into python listeners, per listener class and hook.
+        Helper.run_simulation brackets every run with start_run and end_run; the statistics of the last run
+        of the calling thread are in last_run, and those of every run since creation in totals.
+        Both map (listener class name, hook name) to [calls, seconds].
+    """
+
+    def __init__(self):
+        self.totals = dict()
+        self.runs = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def last_run(self) -> Dict[Tuple[str, str], list]:
+        return getattr(self._local, "last_run", dict())
+
+    def start_run(self):
+        self._local.current = dict()
+
+    def record(self, listener_name: str, hook: str, seconds: float):
+        current = getattr(self._local, "current", None)
+        if current is None:
+            current = self._local.current = dict()
+        entry = current.get((listener_name, hook))
+        if entry is None:
+            current[(listener_name, hook)] = [1, seconds]
+        else:
+            entry[0] += 1
+            entry[1] += seconds
+
+    def end_run(self) -> Dict[Tuple[str, str], list]:
+        """ Ends the run of the calling thread, adds it to the totals and returns its statistics """
+        current = getattr(self._local, "current", None) or dict()
+        self._local.current = None
+        self._local.last_run = current
+        with self._lock:
+            self.runs += 1
+            for key, (calls, seconds) in current.items():
+                entry = self.totals.setdefault(key, [0, 0.0])
+                entry[0] += calls
+                entry[1] += seconds
+        return current
+
+    @staticmethod
+    def summary(stats: Dict[Tuple[str, str], list], runs: int = 1) -> str:
+        """ Formats statistics as a table sorted by time, with per-listener subtotals and per-run averages """
+        rows = ["%-28s %-30s %10s %10s %12s" % ("listener", "hook", "calls/run", "ms/run", "us/call")]
+        runs = max(runs, 1)
+        by_listener = dict()
+        for (listener_name, hook), (calls, seconds) in stats.items():
+            total = by_listener.setdefault(listener_name, [0, 0.0])
+            total[0] += calls
+            total[1] += seconds
+        for listener_name, (calls, seconds) in sorted(by_listener.items(), key=lambda item: -item[1][1]):
+            rows.append("%-28s %-30s %10.1f %10.3f %12.2f" % (listener_name, "(all hooks)", calls / runs,
+                                                             1e3 * seconds / runs, 1e6 * seconds / calls))
+            hooks = [(hook, entry) for (name, hook), entry in stats.items() if name == listener_name]
+            for hook, (hook_calls, hook_seconds) in sorted(hooks, key=lambda item: -item[1][1]):
+                rows.append("%-28s %-30s %10.1f %10.3f %12.2f" % ("", hook, hook_calls / runs,
+                                                                 1e3 * hook_seconds / runs,
+                                                                 1e6 * hook_seconds / hook_calls))
+        return "\n".join(rows)
+
+    def campaign_summary(self) -> str:
+        """ Formats the statistics of every run so far, averaged per run """
+        with self._lock:
+            return self.summary({key: list(entry) for key, entry in self.totals.items()}, self.runs)
 
 
 class Helper:
@@ -217,11 +388,37 @@ class Helper:
         for general use.
     """
 
-    def __init__(self, open_rocket_instance: OpenRocketInstance):
+    def __init__(self, open_rocket_instance: OpenRocketInstance, listener_profiler: ListenerProfiler = None):
+        """ With a listener_profiler, every python listener passed to run_simulation is profiled """
         if not open_rocket_instance.started:
             raise Exception("OpenRocketInstance not yet started")
 
         self.openrocket = open_rocket_instance.openrocket
+        self.listener_profiler = listener_profiler
+
+        # Translation tables are built once instead of on every lookup.
+        # Members missing from the loaded OpenRocket version are left out.
+        java_data_type = self.openrocket.simulation.FlightDataType
+        self._flight_data_types = {t: getattr(java_data_type, t.name)
+                                   for t in FlightDataType if hasattr(java_data_type, t.name)}
+        java_event_type = self.openrocket.simulation.FlightEvent.Type
+        self._flight_events = {getattr(java_event_type, e.name): e
+                               for e in FlightEvent if hasattr(java_event_type, e.name)}
+
+        # Java-side unboxing of List<Double> into double[], so no element crosses into python
+        MethodHandles = jpype.JClass("java.lang.invoke.MethodHandles")
+        MethodType = jpype.JClass("java.lang.invoke.MethodType")
+        unbox = MethodHandles.lookup().findVirtual(
+            jpype.JClass("java.lang.Double"), "doubleValue", MethodType.methodType(jpype.JDouble))
+        self._unbox_double = jpype.JClass("java.lang.invoke.MethodHandleProxies").asInterfaceInstance(
+            jpype.JClass("java.util.function.ToDoubleFunction"), unbox)
+
+        # Wind levels currently loaded in each simulation, so unchanged profiles are not sent again
+        self._wind_levels = dict()
+        # Configured multi-level wind models by profile, least recently used first, copied Java-side
+        # into a simulation in one call when one of its profiles comes back
+        self._wind_models = dict()
+        self._wind_models_lock = threading.Lock()
 
     def load_doc(self, or_filename):
         """ Loads a .ork file and returns the corresponding openrocket document """
@@ -238,36 +435,76 @@ class Helper:
         saver = self.openrocket.file.GeneralRocketSaver()
         saver.save(or_java_file, doc)
 
-    def run_simulation(self, sim, listeners: List[AbstractSimulationListener] = None):
+    def run_simulation(self, sim, listeners: List[AbstractSimulationListener] = None, seed: int = None):
         """ This is a wrapper to the Simulation.simulate() for running a simulation
             The optional listeners parameter is a sequence of objects which extend orh.AbstractSimulationListener.
+            Each is proxied with only the listener interfaces whose hooks it overrides, and its hooks are
+            counted and timed if the helper has a listener_profiler.
+            The optional seed makes the run reproducible, otherwise a random seed is used.
         """
 
-        if listeners is None:
+        if not listeners:
             # this method takes in a vararg of SimulationListeners, which is just a fancy way of passing in an array, so
             # we have to pass in an array of length 0 ..
             listener_array = jpype.JArray(
                 self.openrocket.simulation.listeners.AbstractSimulationListener, 1
             )(0)
         else:
-            listener_array = [
-                jpype.JProxy(
-                    (
-                        self.openrocket.simulation.listeners.SimulationListener,
-                        self.openrocket.simulation.listeners.SimulationEventListener,
-                        self.openrocket.simulation.listeners.SimulationComputationListener,
-                        jpype.java.lang.Cloneable,
-                    ),
-                    inst=c,
-                )
-                for c in listeners
-            ]
-
-        sim.getOptions().randomizeSeed()  # Need to do this otherwise exact same numbers will be generated for each identical run
-        sim.simulate(listener_array)
+            listener_array = [listener_proxy(c, self.listener_profiler) for c in listeners]
+
+        if seed is None:
+            sim.getOptions().randomizeSeed()  # Need to do this otherwise exact same numbers will be generated for each identical run
+        else:
+            sim.getOptions().setRandomSeed(int(seed))
+
+        if self.listener_profiler is None:
+            sim.simulate(listener_array)
+            return
+        self.listener_profiler.start_run()
+        try:
+            sim.simulate(listener_array)
+        finally:
+            self.listener_profiler.end_run()
+
+    def set_wind_levels(self, sim, levels, standard_deviation: float = 0.2) -> bool:
+        """ Loads a wind profile into the multi-level wind model of a simulation.
+            levels holds one row [altitude (m), speed (m/s), direction (rad), ...] per level.
+            Nothing is sent to Java when the simulation already holds the same levels. Otherwise the levels
+            are copied on the Java side, in a single loadFrom call, from a wind model configured earlier with
+            the same profile; only a profile seen for the first time is added level by level.
+            Returns True if the wind model was (re)configured.
+        """
+
+        levels = np.ascontiguousarray(levels, dtype=np.float64).reshape(-1, 4)
+        key = (levels[:, :3].tobytes(), float(standard_deviation))
+        if self._wind_levels.get(sim) == key:
+            return False
+
+        opts = sim.getOptions()
+        opts.setWindModelType(self.openrocket.models.wind.WindModelType.MULTI_LEVEL)
+        model = opts.getWindModel()
+        with self._wind_models_lock:
+            source = self._wind_models.pop(key, None)
+            if source is not None:
+                self._wind_models[key] = source
+        if source is not None:
+            model.loadFrom(source)
+        else:
+            model.clearLevels()
+            for altitude, speed, direction in levels[:, :3].tolist():
+                model.addWindLevel(altitude, speed, direction, standard_deviation)
+            with self._wind_models_lock:
+                self._wind_models[key] = model.clone()
+                while len(self._wind_models) > WIND_MODEL_CACHE_SIZE:
+                    del self._wind_models[next(iter(self._wind_models))]
+        self._wind_levels[sim] = key
+        return True
 
     def translate_flight_data_type(self, flight_data_type:Union[FlightDataType, str]):
         if isinstance(flight_data_type, FlightDataType):
+            translated = self._flight_data_types.get(flight_data_type)
+            if translated is not None:
+                return translated
             name = flight_data_type.name
         elif isinstance(flight_data_type, str):
             name = flight_data_type
@@ -276,6 +513,24 @@ class Helper:
 
         return getattr(self.openrocket.simulation.FlightDataType, name)
 
+    def _copy_column(self, java_list, out):
+        """ Copies a java List<Double> into a float64 numpy array. The list is unboxed into a primitive
+            double[] on the java side, which numpy then reads through the buffer protocol in one copy.
+            Samples are aligned from the first time step; a list shorter than out leaves the missing
+            steps NaN and a longer one is cut, both with a warning.
+        """
+        if java_list is None or java_list.size() == 0:
+            out[:] = np.nan
+            return
+        values = np.asarray(java_list.stream().mapToDouble(self._unbox_double).toArray())
+        if len(values) != len(out):
+            logger.warning("Flight data column has %i samples for %i time steps", len(values), len(out))
+            count = min(len(values), len(out))
+            out[:count] = values[:count]
+            out[count:] = np.nan
+            return
+        out[:] = values
+
     def get_timeseries(self, simulation, variables: Iterable[Union[FlightDataType, str]], branch_number=0) \
             -> Dict[Union[FlightDataType, str], np.array]:
         """
@@ -290,10 +545,43 @@ class Helper:
         branch = simulation.getSimulatedData().getBranch(branch_number)
         output = dict()
         for v in variables:
-            output[v] = np.array(branch.get(self.translate_flight_data_type(v)))
+            values = branch.get(self.translate_flight_data_type(v))
+            output[v] = np.empty(0 if values is None else values.size())
+            self._copy_column(values, output[v])
 
         return output
 
+    def get_timeseries_array(self, simulation, variables: Sequence[Union[FlightDataType, str]],
+                             branch_numbers: Iterable[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets many timeseries of many branches at once as a single preallocated 2-D array.
+
+        Rows of branch ``branch_numbers[k]`` are ``data[offsets[k]:offsets[k + 1]]`` and column ``j`` holds
+        ``variables[j]``. Variables not recorded in a branch are filled with NaN.
+
+        :param simulation: An openrocket simulation object.
+        :param variables: A sequence of FlightDataType or strings representing the desired variables
+        :param branch_numbers: Branches to extract, all of them by default
+        :return: (data, offsets), data being float64 of shape (total samples, len(variables))
+        """
+
+        simulated_data = simulation.getSimulatedData()
+        if branch_numbers is None:
+            branch_numbers = range(simulated_data.getBranchCount())
+        branches = [simulated_data.getBranch(b) for b in branch_numbers]
+        java_types = [self.translate_flight_data_type(v) for v in variables]
+
+        offsets = np.zeros(len(branches) + 1, dtype=np.int64)
+        np.cumsum([branch.getLength() for branch in branches], out=offsets[1:])
+        data = np.empty((offsets[-1], len(java_types)), dtype=np.float64)
+
+        for k, branch in enumerate(branches):
+            rows = data[offsets[k]:offsets[k + 1]]
+            for j, java_type in enumerate(java_types):
+                self._copy_column(branch.get(java_type), rows[:, j])
+
+        return data, offsets
+
     def get_final_values(self, simulation, variables: Iterable[Union[FlightDataType, str]], branch_number=0) \
             -> Dict[Union[FlightDataType, str], float]:
         """
@@ -313,7 +601,7 @@ class Helper:
         return output
 
     def translate_flight_event(self, flight_event) -> FlightEvent:
-        return {getattr(self.openrocket.simulation.FlightEvent.Type, x.name): x for x in FlightEvent}[flight_event]
+        return self._flight_events[flight_event]
 
     def get_events(self, simulation) -> Dict[FlightEvent, float]:
         """Returns a dictionary of all the flight events in a given simulation.
@@ -9,9 +9,41 @@ import orhelper
 from orhelper import FlightDataType, FlightEvent
 from matplotlib import pyplot as plt
 from matplotlib import patches
+import contextlib
 import math
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import time
+import jpype
 import numpy as np
 from scipy import stats
+from simulation_stats import ConvergenceMonitor, LandingStatistics, RunResult
+from result_cache import ResultCache, file_digest
+import fidelity
+import geodesy
+import metrics
+from run_journal import RunJournal, campaign_digest
+
+# Index of the simulation of the .ork document used for every run
+SIMULATION_INDEX = 3
+
+# Altitude at which the rocket is air-started, 0 for a ground launch
+AIR_START_ALTITUDE = 0
+# Standard deviation of the wind speed at every level, in m/s
+WIND_DEVIATION = 0.2
+
+# Flight data recorded for every run, by FlightDataType name
+DEFAULT_FLIGHT_DATA = ("TYPE_TIME", "TYPE_STABILITY", "TYPE_ALTITUDE")
+
+# What a run has to produce: "landing" flies to the ground, "apogee" stops at apogee,
+# and a comma-separated list of FlightEvent names stops once all of them occurred
+DEFAULT_GOAL = "landing"
+GOALS = ("landing", "apogee")
+
+# Simulated runs whose landing coordinates are converted to range and bearing in one geodesy call
+LOCATE_BLOCK = 32
 
 class OpenRocketSimulation:
     """
@@ -30,28 +62,85 @@ class OpenRocketSimulation:
         bearings (list): Landing bearings from launch site
         apogee (list): Apogee heights for each simulation
         stability (list): Stability data for each simulation
-        flightdata (dict): Flight data from simulations
-        landingpoints (list): Landing point data for each simulation
+        flightdata (dict): Flight data of the latest simulation
+        landingpoints (list): RunResult record of each simulation
+        statistics (LandingStatistics): Online landing and apogee statistics of the runs so far
+        seed (int): Campaign seed from which every run's random seed is derived, None for random seeds
+        seeds (list): Explicit seed of each run, overriding the ones derived from seed
+        cache (ResultCache): Store of previous run results, only used with an explicit seed
+        java_listeners (bool): Capture landing points from the simulated data on the Java side
+            instead of through a python listener
+        geodesy_method (str): Method converting landing coordinates to range and bearing
+        listener_profiler (orhelper.ListenerProfiler): Profiler of the python listener hooks, None when disabled
+        flight_data (tuple): FlightDataType names recorded for every run
+        trajectory_store (TrajectoryStore): Store receiving the flight data of every run, None to keep only the last
+        fidelity_tier (str): Fidelity tier of the runs, see fidelity.TIERS
+        goal (str): What every run has to produce, see goal_events
+        wind_seed (int): Seed the wind profiles were drawn with, recorded in the journal
     """
 
-    def __init__(self, wind_data, ork_file):
+    def __init__(self, wind_data, ork_file, seed=None, cache=None, java_listeners=True, seeds=None,
+                 geodesy_method="flat", profile_listeners=False, flight_data=None,
+                 trajectory_store=None, fidelity_tier=fidelity.DEFAULT_TIER, goal=DEFAULT_GOAL, wind_seed=None):
         """
         Initialize OpenRocket simulation manager.
         
         Args:
             wind_data (list): Formatted wind data for simulations
             ork_file (str): Path to OpenRocket design file
+            seed (int): Campaign seed making the runs reproducible, None for random seeds
+            seeds (list): Explicit seed of each run, e.g. from a samplers.Sampler,
+                used for antithetic or common-random-number pairing
+            cache (ResultCache): Store of previous run results. Runs are only
+                reproducible, and therefore cached, when a seed is given.
+            java_listeners (bool): Capture landing points from the simulated data
+                instead of a python LandingPoint listener, so that a ground launch
+                flown to landing makes no call into python during a run. An air
+                start (AIR_START_ALTITUDE) or a goal stopping before landing still
+                installs a python listener, called on every integration step.
+            geodesy_method (str): Method converting landing coordinates to range and
+                bearing: "flat", "haversine" or "vincenty", see the geodesy module
+            profile_listeners (bool): Count and time every python listener hook call.
+                Only runs simulated in this process are profiled, not those of
+                process pool workers or of a daemon.
+            flight_data (tuple): FlightDataType names recorded for every run. Defaults to
+                DEFAULT_FLIGHT_DATA for the "landing" goal and to nothing for the others.
+            trajectory_store (TrajectoryStore): Store receiving the flight data of every
+                run. Without one, only the flight data of the last run is kept.
+            fidelity_tier (str): Fidelity tier of the runs, see fidelity.TIERS. "full"
+                keeps the integration settings of the .ork document.
+            goal (str): What every run has to produce: "landing", "apogee", or a
+                comma-separated list of FlightEvent names. Runs stop as soon as
+                the goal is known; the landing point is NaN if it is not part of it.
+            wind_seed (int): Seed the wind profiles were drawn with, recorded in the journal
+                header so that a resumed campaign can draw them again, see
+                run_journal.campaign_wind_seed
         """
         self.ork_file = ork_file
         self.wind_data = wind_data
+        self.seed = seed
+        self.seeds = seeds
+        self.cache = cache
+        self.java_listeners = java_listeners
+        self.geodesy_method = geodesy_method
+        self.listener_profiler = orhelper.ListenerProfiler() if profile_listeners else None
+        goal_events(goal)
+        self.goal = goal
+        if flight_data is None:
+            flight_data = DEFAULT_FLIGHT_DATA if goal == DEFAULT_GOAL else ()
+        self.flight_data = tuple(flight_data)
+        self.trajectory_store = trajectory_store
+        self.fidelity_tier = fidelity_tier
+        self.wind_seed = wind_seed
         self.ranges = []
         self.bearings = []
         self.apogee = []
         self.stability = []
         self.flightdata = dict()
         self.landingpoints = []
+        self.statistics = LandingStatistics()
 
-    def simulation(self):
+    def simulation(self, workers=1, parallel="processes", client=None, journal=None, resume=False):
         """
         Run OpenRocket simulations with specified wind conditions.
         
@@ -60,38 +149,418 @@ class OpenRocketSimulation:
         - Runs simulation
         - Collects flight data
         - Records apogee and landing points
+
+        Every run is kept in ranges, bearings, apogee and landingpoints for
+        print_stats. Use iter_runs to process campaigns in constant memory.
+
+        Args:
+            workers (int): Number of parallel workers
+            parallel (str): "processes" or "threads", see iter_runs
+            client (or_daemon.SimulationClient): Warm simulation daemon, see iter_runs
+            journal (str): Journal file recording every completed run, see iter_runs
+            resume (bool): Skip the runs already in the journal, see iter_runs
         """
-        i = 0
         try:
-            with orhelper.OpenRocketInstance() as instance:
-                orh = orhelper.Helper(instance)
-                doc = orh.load_doc(self.ork_file)
-                sim = doc.getSimulation(3)
-                opts = sim.getOptions()
+            for result in self.iter_runs(workers, parallel, client, journal, resume):
+                print('Running simulation ', result.index+1)
+                print(f"First wind point: {self.wind_data[result.index][0]}")
+                if self.listener_profiler is not None and self.listener_profiler.last_run:
+                    print(self.listener_profiler.summary(self.listener_profiler.last_run))
+                self.ranges.append(result.range)
+                self.bearings.append(result.bearing)
+                self.apogee.append(result.apogee)
+                self.landingpoints.append(result)
+
+        except Exception as e:
+            print(f"Error during simulation: {e}")
+            raise e
+
+        if self.listener_profiler is not None and self.listener_profiler.runs:
+            print('Listener hooks over %i profiled simulations:' % self.listener_profiler.runs)
+            print(self.listener_profiler.campaign_summary())
+
+    def iter_runs(self, workers=1, parallel="processes", client=None, journal=None, resume=False):
+        """
+        Run OpenRocket simulations and yield one compact record per run.
+
+        Nothing but the latest flight data is retained, while statistics is
+        updated after every run, so it can be queried at any point of the
+        campaign. Runs found in the result cache are read back instead of
+        simulated, and new runs are added to it. The remaining runs are
+        scheduled by wind profile, so each distinct profile is loaded into
+        the wind model once, and their results are yielded in campaign order.
+
+        Args:
+            workers (int): Number of parallel workers. Results are merged back in
+                wind_data order.
+            parallel (str): "processes" spreads the wind profiles over a process
+                pool, each process owning its own JVM. "threads" runs them on a
+                Java thread pool inside a single JVM, one copy of the simulation
+                per thread. Python listeners are called on every integration
+                step under the GIL and serialize the threads, so "threads" is
+                refused with the python landing listener (java_listeners=False)
+                and only warned about for the air start and goal listeners.
+            client (or_daemon.SimulationClient): Warm simulation daemon to run the
+                wind profiles on instead of starting a JVM. workers and parallel are
+                ignored when a client is given.
+            journal (str): Journal file to which every completed run is appended,
+                so that an interrupted campaign can be resumed
+            resume (bool): Read the runs already recorded in the journal back
+                instead of simulating them again
+
+        Yields:
+            RunResult: Result of each run, in wind_data order
+
+        Raises:
+            ValueError: If parallel is unknown, or "threads" with the python landing listener
+        """
+        if parallel not in ("processes", "threads"):
+            raise ValueError(f"Unknown parallel mode {parallel!r}, expected 'processes' or 'threads'")
+
+        seeds = [self.run_seed(i) for i in range(len(self.wind_data))]
+        options = self.simulation_options()
+        if parallel == "threads" and workers > 1 and client is None:
+            listeners = python_listeners(options)
+            if "LandingPoint" in listeners:
+                raise ValueError("The python landing listener holds the GIL on every integration step and "
+                                 "serializes threaded runs; use java_listeners or process workers")
+            if listeners:
+                print('Warning: python listeners %s are called on every integration step and serialize '
+                      'threaded runs; process workers scale better' % ', '.join(listeners))
+
+        # Reproducible runs already in the cache are not simulated again
+        keys = [None] * len(self.wind_data)
+        cached = {}
+        if self.cache is not None and all(seed is not None for seed in seeds):
+            ork_digest = file_digest(self.ork_file)
+            for i, data in enumerate(self.wind_data):
+                keys[i] = ResultCache.key(ork_digest, data, options, seeds[i])
+                hit = self.cache.get(keys[i], flightdata=False)
+                if hit is not None:
+                    cached[i] = (RunResult(i, *hit[:3]), False)
+
+        # Runs completed by an interrupted campaign are not simulated again either
+        if journal is not None:
+            journal = RunJournal(journal)
+            header = {"ork_file": os.path.abspath(self.ork_file), "runs": len(self.wind_data),
+                      "seed": self.seed, "wind_data": campaign_digest(self.wind_data), "options": options,
+                      "wind_seed": self.wind_seed}
+            for i, done in journal.start(header, resume).items():
+                cached[i] = (done, True)
+
+        # Runs sharing a wind profile are simulated back to back, so its levels are loaded once
+        jobs = [(data, seeds[i]) for i, data in enumerate(self.wind_data) if i not in cached]
+        order = schedule_jobs(jobs)
+        jobs = [jobs[position] for position in order]
+        if not jobs:
+            results = iter(())
+        elif client is not None:
+            results = client.simulate(self.ork_file, [data for data, _ in jobs], options, [seed for _, seed in jobs])
+        elif workers > 1 and len(jobs) > 1:
+            if parallel == "threads":
+                results = self._threaded_results(jobs, workers, options)
+            else:
+                results = self._parallel_results(jobs, workers, options)
+        else:
+            results = self._serial_results(jobs, options)
+        results = locate_results(in_job_order(results, order), self.geodesy_method)
 
-                for data in self.wind_data:
-                    print('Running simulation ', i+1)
-                    print(f"First wind point: {data[0]}")
+        try:
+            for i in range(len(self.wind_data)):
+                if i in cached:
+                    result, in_journal = cached.pop(i)
+                    hit = self.cache.get(keys[i]) if keys[i] is not None else None
+                    flightdata = {FlightDataType[name]: values for name, values in hit[3].items()} if hit else dict()
+                    metrics.count("runs_resumed" if in_journal else "runs_cached")
+                else:
+                    in_journal = False
+                    # Time spent waiting for the run; the run itself is timed where it executes
+                    with metrics.span("result_wait"):
+                        lp, apogee, flightdata = next(results)
+                    metrics.count("runs_simulated")
+                    result = lp.run_result(i, apogee)
+                    if keys[i] is not None:
+                        self.cache.put(keys[i], result.range, result.bearing, result.apogee, flightdata)
+
+                if journal is not None and not in_journal:
+                    journal.append(result)
+                self.flightdata = flightdata
+                if self.trajectory_store is not None:
+                    self.trajectory_store.append(i, flightdata)
+                self.statistics.update(result)
+                yield result
+        finally:
+            if journal is not None:
+                journal.close()
+            if self.trajectory_store is not None:
+                self.trajectory_store.flush()
+
+    def screened_simulation(self, screening_tier="screening", tail_fraction=0.1, workers=1,
+                            parallel="processes", client=None):
+        """
+        Run a two-stage campaign: screen every wind profile at a coarse fidelity,
+        then re-run the runs that define the dispersion tails at full fidelity.
+
+        Full fidelity is this simulation's own fidelity_tier. The tail runs are
+        those selected by fidelity.tail_indices: the landing points farthest
+        from the centroid and the extreme apogees. Their screening results are
+        replaced, so the extremes of the campaign always come from full-fidelity
+        runs, while the bulk of the dispersion is only screened. Stages run in
+        this process share one OpenRocket instance, see keep_openrocket.
+
+        Args:
+            screening_tier (str): Fidelity tier of the first stage, see fidelity.TIERS
+            tail_fraction (float): Share of the runs re-run on each tail criterion
+            workers (int): Number of parallel workers, see iter_runs
+            parallel (str): "processes" or "threads", see iter_runs
+            client (or_daemon.SimulationClient): Warm simulation daemon, see iter_runs
+
+        Returns:
+            dict: Number of screened runs, indices of the runs re-run at full fidelity
+        """
+        with keep_openrocket():
+            return self._screened_simulation(screening_tier, tail_fraction, workers, parallel, client)
+
+    def _screened_simulation(self, screening_tier, tail_fraction, workers, parallel, client):
+        """Run both stages of screened_simulation, see there."""
+        # Screening runs are not stored; the trajectory store gets the full-fidelity tail runs
+        full_tier, trajectory_store = self.fidelity_tier, self.trajectory_store
+        self.fidelity_tier, self.trajectory_store = screening_tier, None
+        try:
+            results = {result.index: result for result in self.iter_runs(workers, parallel, client)}
+        finally:
+            self.fidelity_tier, self.trajectory_store = full_tier, trajectory_store
+
+        screened = [results[i] for i in range(len(self.wind_data))]
+        tails = fidelity.tail_indices(np.array([r.x for r in screened]), np.array([r.y for r in screened]),
+                                      np.array([r.apogee for r in screened]), tail_fraction)
+        if len(tails):
+            rerun = OpenRocketSimulation([self.wind_data[i] for i in tails], self.ork_file,
+                                         seeds=[self.run_seed(i) for i in tails], cache=self.cache,
+                                         java_listeners=self.java_listeners, geodesy_method=self.geodesy_method,
+                                         flight_data=self.flight_data, fidelity_tier=full_tier, goal=self.goal)
+            for result in rerun.iter_runs(workers, parallel, client):
+                index = int(tails[result.index])
+                results[index] = result._replace(index=index)
+                if self.trajectory_store is not None:
+                    self.trajectory_store.append(index, rerun.flightdata)
+            if self.trajectory_store is not None:
+                self.trajectory_store.flush()
+
+        self.statistics = LandingStatistics()
+        for i in range(len(self.wind_data)):
+            result = results[i]
+            self.statistics.update(result)
+            self.ranges.append(result.range)
+            self.bearings.append(result.bearing)
+            self.apogee.append(result.apogee)
+            self.landingpoints.append(result)
 
-                    opts.setWindModelType(instance.wind.WindModelType.MULTI_LEVEL)
-                    model = opts.getWindModel()
-                    model.clearLevels()
-                    
-                    for wind in data:
-                        model.addWindLevel(wind[0],wind[1],wind[2],0.2)
+        print('Screened %i simulations at %s fidelity, re-ran %i tail simulations at %s fidelity' %
+              (len(screened), screening_tier, len(tails), full_tier))
+        return {"screened": len(screened), "rerun": tails.tolist()}
 
-                    airstarter = AirStart(0)
-                    lp = LandingPoint(self.ranges, self.bearings)
-                    orh.run_simulation(sim, listeners=(airstarter, lp))
+    def adaptive_simulation(self, profile_source, tolerance=0.02, window=50, min_runs=100, max_runs=1000):
+        """
+        Run OpenRocket simulations until the landing statistics converge.
+
+        Wind profiles are drawn from profile_source one run at a time and
+        appended to wind_data, until the landing-centroid standard error and
+        the 99% ellipse axes vary by less than tolerance over the last window
+        runs, or max_runs is reached. Runs are executed serially in a single
+        JVM, since the next profile is only drawn once the previous result is
+        known.
+
+        Args:
+            profile_source (iterable): Wind profiles, e.g. WindDataFormatter.iter_random_wind_data()
+            tolerance (float): Allowed relative variation over the window, e.g. 0.02 for 2%
+            window (int): Number of consecutive runs over which the variation is measured
+            min_runs (int): Runs required before convergence is considered, at most max_runs
+            max_runs (int): Upper bound on the number of runs
+
+        Returns:
+            dict: Achieved precision, see ConvergenceMonitor.report
+
+        Raises:
+            ValueError: If the goal of the runs does not include the landing point
+        """
+        if self.goal != DEFAULT_GOAL:
+            raise ValueError(f"Adaptive campaigns converge on the landing statistics, "
+                             f"which the {self.goal!r} goal does not produce")
+        monitor = ConvergenceMonitor(tolerance, window, min_runs, max_runs=max_runs)
+        options = self.simulation_options()
+        first = len(self.wind_data)
 
-                    self.flightdata = orh.get_timeseries(sim, [FlightDataType.TYPE_TIME, FlightDataType.TYPE_STABILITY, FlightDataType.TYPE_ALTITUDE])
-                    self.apogee.append(max(self.flightdata[FlightDataType.TYPE_ALTITUDE]))
-                    self.landingpoints.append(lp)
-                    i += 1
+        def jobs():
+            for data in profile_source:
+                if monitor.converged or len(self.wind_data) - first >= max_runs:
+                    return
+                self.wind_data.append(data)
+                yield data, self.run_seed(len(self.wind_data) - 1)
+
+        try:
+            # Every run is located as soon as it lands, since convergence is checked after each one
+            results = locate_results(self._serial_results(jobs(), options), self.geodesy_method, block=1)
+            for i, (lp, apogee, flightdata) in enumerate(results, start=first):
+                result = lp.run_result(i, apogee)
+                self.flightdata = flightdata
+                if self.trajectory_store is not None:
+                    self.trajectory_store.append(i, flightdata)
+                self.statistics.update(result)
+                monitor.update(self.statistics)
+
+                print('Running simulation ', i+1)
+                self.ranges.append(result.range)
+                self.bearings.append(result.bearing)
+                self.apogee.append(result.apogee)
+                self.landingpoints.append(result)
 
         except Exception as e:
             print(f"Error during simulation: {e}")
             raise e
+        finally:
+            if self.trajectory_store is not None:
+                self.trajectory_store.flush()
+
+        report = monitor.report(self.statistics)
+        print('Adaptive campaign %s after %i simulations: centroid standard error %s m, '
+              '%i%% ellipse axes %s m' % ('converged' if report["converged"] else 'stopped without converging',
+                                          report["runs"], np.round(report["centroid_standard_error"], 2),
+                                          int(report["ellipse_confidence"] * 100),
+                                          np.round(report["ellipse_axes"], 1)))
+        return report
+
+    def run_seed(self, index):
+        """
+        Get the random seed of a run.
+
+        Args:
+            index (int): Index of the run
+
+        Returns:
+            int: Explicit seed of the run if given, else one derived from the campaign seed, or None
+        """
+        if self.seeds is not None and index < len(self.seeds):
+            return self.seeds[index]
+        return run_seed(self.seed, index)
+
+    def simulation_options(self):
+        """
+        Get the options that, together with the wind levels and seed, determine a run.
+
+        Returns:
+            dict: JSON-serializable simulation options
+        """
+        return {"simulation_index": SIMULATION_INDEX, "java_listeners": self.java_listeners,
+                "geodesy_method": self.geodesy_method, "flight_data": list(self.flight_data),
+                "fidelity_tier": self.fidelity_tier, "goal": self.goal}
+
+    def _serial_results(self, jobs, options):
+        """
+        Run every wind profile in a single JVM of the current process.
+
+        Args:
+            jobs (list): (wind levels, seed) of each run
+            options (dict): Simulation options, see simulation_options
+
+        Yields:
+            tuple: (LandingPoint, apogee, flightdata) for each wind profile
+        """
+        with openrocket_instance() as instance:
+            orh = orhelper.Helper(instance, self.listener_profiler)
+            with metrics.span("load_doc"):
+                doc = orh.load_doc(self.ork_file)
+            sim = doc.getSimulation(options["simulation_index"])
+
+            for data, seed in jobs:
+                yield run_wind_profile(instance, orh, sim, data, seed, options)
+
+    def _parallel_results(self, jobs, workers, options):
+        """
+        Run the wind profiles over a pool of worker processes.
+
+        JPype allows a single JVM per process, so every worker starts its own
+        OpenRocket instance and loads the document once, then simulates the
+        profiles it receives. imap keeps the results in job order. The metrics
+        a worker records during a run travel back with its result and are
+        merged into those of this process. Once every
+        result is in, the pool is closed and joined rather than terminated, so
+        the workers shut their JVM down on exit, see _init_worker.
+
+        Args:
+            jobs (list): (wind levels, seed) of each run
+            workers (int): Number of worker processes
+            options (dict): Simulation options, see simulation_options
+
+        Yields:
+            tuple: (LandingPoint, apogee, flightdata) for each wind profile
+        """
+        workers = min(workers, len(jobs))
+        chunksize = max(1, len(jobs) // (workers * 4))
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_worker,
+                          initargs=(self.ork_file, options, metrics.METRICS.enabled)) as pool:
+            for result, recorded in pool.imap(_run_in_worker, jobs, chunksize=chunksize):
+                if recorded is not None:
+                    metrics.METRICS.merge(recorded)
+                yield result
+            pool.close()
+            pool.join()
+
+    def _threaded_results(self, jobs, workers, options):
+        """
+        Run the wind profiles on a Java thread pool inside a single JVM.
+
+        The JVM and its loaders start once. The document's simulation is copied
+        once per thread; every copy carries its own options and multi-level
+        wind model, so concurrent runs never share wind levels. A thread takes a
+        free copy, configures its wind levels, simulates and hands the copy back.
+        JPype releases the GIL while Java runs, so the simulations themselves
+        execute concurrently.
+
+        Args:
+            jobs (list): (wind levels, seed) of each run
+            workers (int): Number of Java threads
+            options (dict): Simulation options, see simulation_options
+
+        Yields:
+            tuple: (LandingPoint, apogee, flightdata) for each wind profile
+        """
+        workers = min(workers, len(jobs))
+        with openrocket_instance() as instance:
+            orh = orhelper.Helper(instance, self.listener_profiler)
+            with metrics.span("load_doc"):
+                doc = orh.load_doc(self.ork_file)
+            base_sim = doc.getSimulation(options["simulation_index"])
+
+            sims = queue.Queue()
+            for _ in range(workers):
+                sims.put(base_sim.copy())
+
+            results = [None] * len(jobs)
+
+            def task(i, data, seed):
+                sim = sims.get()
+                try:
+                    results[i] = run_wind_profile(instance, orh, sim, data, seed, options)
+                except Exception as e:
+                    results[i] = e
+                finally:
+                    sims.put(sim)
+
+            Callable = jpype.JClass("java.util.concurrent.Callable")
+            executor = jpype.JClass("java.util.concurrent.Executors").newFixedThreadPool(workers)
+            try:
+                futures = [executor.submit(jpype.JProxy(Callable, dict={"call": lambda i=i, job=job: task(i, *job)}))
+                           for i, job in enumerate(jobs)]
+                for i, future in enumerate(futures):
+                    future.get()
+                    result, results[i] = results[i], None
+                    if isinstance(result, Exception):
+                        raise result
+                    yield result
+            finally:
+                executor.shutdownNow()
 
     def print_stats(self):
         """
@@ -133,29 +602,419 @@ class OpenRocketSimulation:
         plt.grid(True)
         plt.show()
 
+def run_seed(seed, index):
+    """
+    Derive the random seed of one run from the campaign seed.
+
+    Args:
+        seed (int): Campaign seed, None for random seeds
+        index (int): Index of the run in the campaign
+
+    Returns:
+        int: 31-bit seed of the run, or None if the campaign has no seed
+    """
+    if seed is None:
+        return None
+    return int(np.random.SeedSequence([seed, index]).generate_state(1)[0] & 0x7FFFFFFF)
+
+def run_wind_profile(instance, orh, sim, data, seed=None, options=None):
+    """
+    Run one simulation with a multi-level wind profile.
+
+    Args:
+        instance (orhelper.OpenRocketInstance): Started OpenRocket instance
+        orh (orhelper.Helper): Helper bound to the instance
+        sim: OpenRocket simulation to run
+        data (np.ndarray): Wind levels [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
+        seed (int): Random seed of the run, None for a random one
+        options (dict): Simulation options, see OpenRocketSimulation.simulation_options
+
+    Returns:
+        tuple: (LandingPoint, apogee, flightdata)
+    """
+    started = time.perf_counter()
+    options = options or {}
+    with metrics.span("set_wind_levels"):
+        if orh.set_wind_levels(sim, data, WIND_DEVIATION):
+            metrics.count("wind_levels_loaded", len(data))
+
+    java_listeners = options.get("java_listeners", True)
+    events = goal_events(options.get("goal", DEFAULT_GOAL))
+    lands = events is None or FlightEvent.GROUND_HIT.name in events
+    listeners = []
+    if AIR_START_ALTITUDE:
+        listeners.append(AirStart(AIR_START_ALTITUDE))
+    if events is not None:
+        listeners.append(StopAtEvents(events))
+    lp = LandingPoint()
+    if lands and not java_listeners:
+        listeners.append(lp)
+
+    with metrics.span("simulate"), fidelity.applied_fidelity(sim, options.get("fidelity_tier", fidelity.DEFAULT_TIER)):
+        orh.run_simulation(sim, listeners=listeners, seed=seed)
+    if orh.listener_profiler is not None:
+        hooks = orh.listener_profiler.last_run.values()
+        metrics.count("listener_callbacks", sum(calls for calls, _ in hooks))
+        metrics.observe("listener_hooks", sum(seconds for _, seconds in hooks))
+    if lands and java_listeners:
+        with metrics.span("landing_point"):
+            lp = LandingPoint.from_simulation(orh, sim)
+
+    # Only the requested series cross into python; the apogee is read on the Java side otherwise
+    variables = [FlightDataType[name] for name in options.get("flight_data", DEFAULT_FLIGHT_DATA)]
+    flightdata = dict()
+    if variables:
+        with metrics.span("get_timeseries"):
+            flightdata = orh.get_timeseries(sim, variables)
+    if FlightDataType.TYPE_ALTITUDE in flightdata:
+        apogee = max(flightdata[FlightDataType.TYPE_ALTITUDE])
+    else:
+        apogee = float(sim.getSimulatedData().getMaxAltitude())
+    metrics.observe("run", time.perf_counter() - started)
+    return lp, apogee, flightdata
+
+def python_listeners(options):
+    """
+    List the python listeners every run with the given options is simulated with.
+
+    Args:
+        options (dict): Simulation options, see OpenRocketSimulation.simulation_options
+
+    Returns:
+        list: Listener class names, empty if OpenRocket never calls into python
+    """
+    events = goal_events(options.get("goal", DEFAULT_GOAL))
+    names = []
+    if AIR_START_ALTITUDE:
+        names.append(AirStart.__name__)
+    if events is not None:
+        names.append(StopAtEvents.__name__)
+    if not options.get("java_listeners", True) and (events is None or FlightEvent.GROUND_HIT.name in events):
+        names.append(LandingPoint.__name__)
+    return names
+
+def goal_events(goal):
+    """
+    Get the flight events after which a run has reached its goal.
+
+    Args:
+        goal (str): "landing", "apogee", or a comma-separated list of FlightEvent names
+
+    Returns:
+        frozenset: FlightEvent names, or None if the run has to fly until the ground
+
+    Raises:
+        ValueError: If the goal names an unknown flight event
+    """
+    if goal == "landing":
+        return None
+    if goal == "apogee":
+        return frozenset((FlightEvent.APOGEE.name,))
+    events = frozenset(name.strip().upper() for name in goal.split(",") if name.strip())
+    unknown = events - set(FlightEvent.__members__)
+    if unknown or not events:
+        raise ValueError(f"Unknown goal {goal!r}, expected one of {GOALS} or FlightEvent names")
+    return events
+
+# JPype cannot restart a JVM once shut down, so campaigns running one after the
+# other in this process share the instance kept by keep_openrocket
+_kept = {"depth": 0, "instance": None}
+
+@contextlib.contextmanager
+def keep_openrocket():
+    """
+    Keep the OpenRocket instance started within a with block running until its end.
+
+    Every openrocket_instance block inside reuses the first instance started,
+    which is only shut down when the outermost keep_openrocket block exits.
+    No JVM is started if nothing inside needs one.
+    """
+    _kept["depth"] += 1
+    try:
+        yield
+    finally:
+        _kept["depth"] -= 1
+        if not _kept["depth"] and _kept["instance"] is not None:
+            instance, _kept["instance"] = _kept["instance"], None
+            instance.__exit__(None, None, None)
+
+@contextlib.contextmanager
+def openrocket_instance():
+    """
+    Start OpenRocket for the duration of a with block, timing the JVM start.
+
+    Within keep_openrocket, the instance is started once and kept running.
+
+    Yields:
+        orhelper.OpenRocketInstance: Started instance
+    """
+    if _kept["instance"] is not None:
+        yield _kept["instance"]
+        return
+    instance = orhelper.OpenRocketInstance()
+    with metrics.span("jvm_start"):
+        instance.__enter__()
+    if _kept["depth"]:
+        _kept["instance"] = instance
+        yield instance
+        return
+    try:
+        yield instance
+    finally:
+        instance.__exit__(None, None, None)
+
+def schedule_jobs(jobs):
+    """
+    Order jobs so that runs sharing a wind profile are adjacent.
+
+    Groups keep the order in which their profile first appears, and runs keep
+    their order within a group.
+
+    Args:
+        jobs (list): (wind levels, seed) of each run
+
+    Returns:
+        list: Job positions in execution order
+    """
+    groups = dict()
+    for position, (data, _) in enumerate(jobs):
+        levels = np.ascontiguousarray(data, dtype=np.float64)
+        groups.setdefault((levels.shape, levels.tobytes()), []).append(position)
+    return [position for positions in groups.values() for position in positions]
+
+def locate_results(results, method="flat", block=LOCATE_BLOCK):
+    """
+    Compute the landing ranges and bearings of simulated runs, a block at a time.
+
+    The landing coordinates of up to ``block`` runs are converted together,
+    so the geodesy functions run once per block on arrays rather than once
+    per run.
+
+    Args:
+        results (iterable): (LandingPoint, apogee, flightdata) of each run
+        method (str): Geodesy method, "flat", "haversine" or "vincenty"
+        block (int): Number of runs located together
+
+    Yields:
+        The results, in order, with their landing points located
+    """
+    pending = []
+    for result in results:
+        pending.append(result)
+        if len(pending) >= block:
+            LandingPoint.locate_all([lp for lp, _, _ in pending], method)
+            yield from pending
+            pending = []
+    if pending:
+        LandingPoint.locate_all([lp for lp, _, _ in pending], method)
+        yield from pending
+
+def in_job_order(results, order):
+    """
+    Restore the job order of results produced in execution order.
+
+    Results that arrive early are held until every earlier job has been
+    yielded, so memory only grows when duplicates of a profile are far apart
+    in the campaign.
+
+    Args:
+        results (iterable): Results in execution order
+        order (list): Job position of each result, see schedule_jobs
+
+    Yields:
+        Results in job order
+    """
+    pending = dict()
+    expected = 0
+    for position, result in zip(order, results):
+        pending[position] = result
+        while expected in pending:
+            yield pending.pop(expected)
+            expected += 1
+
+# Per-process state of the pool workers used by OpenRocketSimulation.simulation
+_worker = {}
+
+def _init_worker(ork_file, options, collect_metrics=False):
+    """
+    Start the JVM of a worker process and load the document once.
+
+    The JVM is shut down when the worker exits. Pool workers leave through
+    os._exit, which skips atexit, so the shutdown is registered as a
+    multiprocessing finalizer, which exiting workers do run.
+
+    Args:
+        ork_file (str): Path to OpenRocket design file
+        options (dict): Simulation options, see OpenRocketSimulation.simulation_options
+        collect_metrics (bool): Record metrics, shipped back with every result
+    """
+    metrics.METRICS.enabled = collect_metrics
+    instance = orhelper.OpenRocketInstance()
+    with metrics.span("jvm_start"):
+        instance.__enter__()
+    orh = orhelper.Helper(instance)
+    with metrics.span("load_doc"):
+        doc = orh.load_doc(ork_file)
+    multiprocessing.util.Finalize(None, _exit_worker, exitpriority=10)
+    _worker["instance"] = instance
+    _worker["orh"] = orh
+    _worker["sim"] = doc.getSimulation(options["simulation_index"])
+    _worker["options"] = options
+
+def _exit_worker():
+    """Shut down the JVM of the current worker process."""
+    instance = _worker.pop("instance", None)
+    _worker.clear()
+    if instance is not None:
+        instance.__exit__(None, None, None)
+
+def _run_in_worker(job):
+    """
+    Run one wind profile in the JVM of the current worker process.
+
+    Args:
+        job (tuple): Wind levels [altitude, wind_speed, direction, deviation] and seed of the run
+
+    Returns:
+        tuple: ((LandingPoint, apogee, flightdata), metrics drained from the worker or None)
+    """
+    data, seed = job
+    result = run_wind_profile(_worker["instance"], _worker["orh"], _worker["sim"], data, seed, _worker["options"])
+    return result, metrics.METRICS.drain() if metrics.METRICS.enabled else None
+
 class LandingPoint(orhelper.AbstractSimulationListener):
     """
     Listener for tracking landing points during simulations.
+
+    Only the raw launch and landing coordinates are captured during the
+    simulation; ranges and bearings are computed afterwards by locate_all,
+    with one call of the vectorized geodesy functions for many runs.
     
     Attributes:
         ranges (list): Collection of landing distances
         bearings (list): Collection of landing bearings
+        launch_points (list): (latitude, longitude) of each launch site, in degrees
+        landing_points (list): (latitude, longitude) of each landing point, in degrees
     """
-    def __init__(self, ranges, bearings):
-        self.ranges = ranges
-        self.bearings = bearings
+    def __init__(self, ranges=None, bearings=None):
+        self.ranges = [] if ranges is None else ranges
+        self.bearings = [] if bearings is None else bearings
+        self.launch_points = []
+        self.landing_points = []
+
+    @classmethod
+    def from_simulation(cls, orh, sim):
+        """
+        Get the landing point of a finished simulation without a python listener.
+
+        The final position is read from the latitude/longitude recorded on the
+        Java side (in radians), the launch site from the simulation options.
+
+        Args:
+            orh (orhelper.Helper): Helper bound to the OpenRocket instance
+            sim: Simulated OpenRocket simulation
+
+        Returns:
+            LandingPoint: Listener-like object holding the launch and landing coordinates
+        """
+        final = orh.get_final_values(sim, [FlightDataType.TYPE_LATITUDE, FlightDataType.TYPE_LONGITUDE])
+        opts = sim.getOptions()
+        lp = cls()
+        lp.launch_points.append((float(opts.getLaunchLatitude()), float(opts.getLaunchLongitude())))
+        lp.landing_points.append((math.degrees(final[FlightDataType.TYPE_LATITUDE]),
+                                  math.degrees(final[FlightDataType.TYPE_LONGITUDE])))
+        return lp
 
     def endSimulation(self, status, simulation_exception):
         worldpos = status.getRocketWorldPosition()
-        conditions = status.getSimulationConditions()
-        launchpos = conditions.getLaunchSite()
+        launchpos = status.getSimulationConditions().getLaunchSite()
+
+        self.launch_points.append((launchpos.getLatitudeDeg(), launchpos.getLongitudeDeg()))
+        self.landing_points.append((worldpos.getLatitudeDeg(), worldpos.getLongitudeDeg()))
+
+    @staticmethod
+    def locate_all(landing_points, method="flat"):
+        """
+        Compute the ranges and bearings of the captured landing points of many runs at once.
+
+        Landing points already holding ranges and bearings are left as they are.
+
+        Args:
+            landing_points (list): LandingPoint of each run
+            method (str): Geodesy method, "flat", "haversine" or "vincenty"
+        """
+        pending = [lp for lp in landing_points if lp.landing_points and not lp.ranges]
+        if not pending:
+            return
+        launch = np.array([point for lp in pending for point in lp.launch_points], dtype=np.float64)
+        landing = np.array([point for lp in pending for point in lp.landing_points], dtype=np.float64)
+        ranges, bearings = geodesy.range_bearing(launch[:, 0], launch[:, 1], landing[:, 0], landing[:, 1], method)
+        start = 0
+        for lp in pending:
+            end = start + len(lp.landing_points)
+            lp.ranges[:] = ranges[start:end].tolist()
+            lp.bearings[:] = bearings[start:end].tolist()
+            start = end
 
-        self.ranges.append(range_flat(launchpos, worldpos))
-        self.bearings.append(bearing_flat(launchpos, worldpos))
+    def locate(self, method="flat"):
+        """
+        Compute the ranges and bearings of the captured landing points.
+
+        Args:
+            method (str): Geodesy method, "flat", "haversine" or "vincenty"
+        """
+        self.locate_all([self], method)
+
+    def run_result(self, index, apogee):
+        """
+        Get the record of the run whose landing point this is.
+
+        Args:
+            index (int): Position of the run's wind profile in the campaign
+            apogee (float): Apogee height in meters
+
+        Returns:
+            RunResult: First landing of the run, with its range, bearing and coordinates;
+                NaN where the run did not land
+        """
+        range_ = self.ranges[0] if self.ranges else math.nan
+        bearing = self.bearings[0] if self.bearings else math.nan
+        launch = self.launch_points[0] if self.launch_points else (math.nan, math.nan)
+        landing = self.landing_points[0] if self.landing_points else (math.nan, math.nan)
+        return RunResult(index, range_, bearing, float(apogee), float(landing[0]), float(landing[1]),
+                         float(launch[0]), float(launch[1]))
+
+class StopAtEvents(orhelper.AbstractSimulationListener):
+    """
+    Ends a simulation once every one of a set of flight events has occurred.
+
+    Only the event hook is overridden, so OpenRocket calls into python a
+    handful of times per run rather than at every step.
+
+    Attributes:
+        remaining (set): FlightEvent names not seen yet
+        stopped (bool): Whether the end of the simulation has been requested
+    """
+
+    def __init__(self, events):
+        self.remaining = set(events)
+        self.stopped = False
+
+    def handleFlightEvent(self, status, flight_event):
+        self.remaining.discard(str(flight_event.getType().name()))
+        if not self.remaining and not self.stopped:
+            JFlightEvent = jpype.JPackage("info").openrocket.core.simulation.FlightEvent
+            status.getEventQueue().add(JFlightEvent(JFlightEvent.Type.SIMULATION_END, status.getSimulationTime()))
+            self.stopped = True
+        return True
 
 class AirStart(orhelper.AbstractSimulationListener):
     """
     Listener for setting initial conditions for air-started simulations.
+
+    OpenRocket has no option for an initial height above the launch site
+    (the launch altitude only moves the atmosphere), so air starts need this
+    python listener, which OpenRocket also calls on every integration step.
     
     Attributes:
         start_altitude (float): Starting altitude for the simulation
@@ -168,9 +1027,6 @@ class AirStart(orhelper.AbstractSimulationListener):
         position = position.add(0.0, 0.0, self.start_altitude)
         status.setRocketPosition(position)
 
-METERS_PER_DEGREE_LATITUDE = 111325
-METERS_PER_DEGREE_LONGITUDE_EQUATOR = 111050
-
 def range_flat(start, end):
     """
     Calculate flat-earth distance between two points.
@@ -182,9 +1038,9 @@ def range_flat(start, end):
     Returns:
         float: Distance in meters between the two points
     """
-    dy = (end.getLatitudeDeg() - start.getLatitudeDeg()) * METERS_PER_DEGREE_LATITUDE
-    dx = (end.getLongitudeDeg() - start.getLongitudeDeg()) * METERS_PER_DEGREE_LONGITUDE_EQUATOR
-    return math.sqrt(dy * dy + dx * dx)
+    east, north = geodesy.flat_offset(start.getLatitudeDeg(), start.getLongitudeDeg(),
+                                      end.getLatitudeDeg(), end.getLongitudeDeg())
+    return math.hypot(east, north)
 
 def bearing_flat(start, end):
     """
@@ -197,12 +1053,6 @@ def bearing_flat(start, end):
     Returns:
         float: Bearing in radians from start to end point
     """
-    dy = (end.getLatitudeDeg() - start.getLatitudeDeg()) * METERS_PER_DEGREE_LATITUDE
-    dx = (end.getLongitudeDeg() - start.getLongitudeDeg()) * METERS_PER_DEGREE_LONGITUDE_EQUATOR
-    return math.atan2(dy, dx)
-
-
-
-
-
-
+    east, north = geodesy.flat_offset(start.getLatitudeDeg(), start.getLongitudeDeg(),
+                                      end.getLatitudeDeg(), end.getLongitudeDeg())
+    return math.atan2(north, east)
@@ -0,0 +1,470 @@
+"""
+Point-mass trajectory module.
+A vectorized 3-DOF screening backend integrating thousands of trajectories
+at once with NumPy. The rocket is reduced to a thrust curve, a mass curve, a
+drag coefficient table and an effective parachute drag area, extracted once
+from a reference OpenRocket run of the .ork document.
+"""
+
+import json
+import math
+import os
+
+import numpy as np
+
+import orhelper
+from orhelper import FlightDataType, FlightEvent
+import fidelity
+import orhelper_sim as orhs
+from simulation_stats import RunResult
+
+GRAVITY = 9.80665
+AIR_GAS_CONSTANT = 287.05
+AIR_GAMMA = 1.4
+
+PARAMETERS_SUFFIX = ".pointmass.json"
+
+
+def atmosphere(altitude):
+    """
+    International Standard Atmosphere, troposphere and lower stratosphere.
+
+    Args:
+        altitude (np.ndarray): Geopotential altitude above sea level in meters
+
+    Returns:
+        tuple: (density in kg/m^3, speed of sound in m/s)
+    """
+    h = np.clip(altitude, -1000.0, 20000.0)
+    temperature = np.where(h < 11000.0, 288.15 - 0.0065 * h, 216.65)
+    pressure = np.where(h < 11000.0,
+                        101325.0 * (temperature / 288.15) ** 5.25588,
+                        22632.1 * np.exp(-GRAVITY * (h - 11000.0) / (AIR_GAS_CONSTANT * 216.65)))
+    return pressure / (AIR_GAS_CONSTANT * temperature), np.sqrt(AIR_GAMMA * AIR_GAS_CONSTANT * temperature)
+
+
+class RocketParameters:
+    """
+    Point-mass description of a rocket.
+
+    Attributes:
+        thrust_time (np.ndarray): Sample times of the thrust and mass curves, in seconds
+        thrust (np.ndarray): Thrust in newtons
+        mass (np.ndarray): Total mass in kilograms
+        drag_mach (np.ndarray): Mach numbers of the drag coefficient table
+        drag_coefficient (np.ndarray): Drag coefficient at each Mach number
+        reference_area (float): Reference area of the drag coefficient, in m^2
+        parachute_cda (float): Drag area (Cd * area) under parachute in m^2, 0 for a ballistic descent
+        deployment_delay (float): Parachute deployment time after apogee, in seconds
+        rod_length (float): Launch rod length in meters
+        rod_angle (float): Launch rod angle from vertical, in radians
+        rod_direction (float): Launch rod azimuth, in radians clockwise from north
+        launch_altitude (float): Launch site altitude above sea level, in meters
+    """
+
+    FIELDS = ("thrust_time", "thrust", "mass", "drag_mach", "drag_coefficient", "reference_area",
+              "parachute_cda", "deployment_delay", "rod_length", "rod_angle", "rod_direction", "launch_altitude")
+
+    def __init__(self, thrust_time, thrust, mass, drag_mach, drag_coefficient, reference_area,
+                 parachute_cda=0.0, deployment_delay=0.0, rod_length=1.0, rod_angle=0.0, rod_direction=0.0,
+                 launch_altitude=0.0):
+        self.thrust_time = np.asarray(thrust_time, dtype=np.float64)
+        self.thrust = np.asarray(thrust, dtype=np.float64)
+        self.mass = np.asarray(mass, dtype=np.float64)
+        self.drag_mach = np.asarray(drag_mach, dtype=np.float64)
+        self.drag_coefficient = np.asarray(drag_coefficient, dtype=np.float64)
+        self.reference_area = float(reference_area)
+        self.parachute_cda = float(parachute_cda)
+        self.deployment_delay = float(deployment_delay)
+        self.rod_length = float(rod_length)
+        self.rod_angle = float(rod_angle)
+        self.rod_direction = float(rod_direction)
+        self.launch_altitude = float(launch_altitude)
+
+    @property
+    def burn_time(self):
+        """Time of the last sample with thrust, in seconds."""
+        burning = np.flatnonzero(self.thrust > 0)
+        return float(self.thrust_time[burning[-1]]) if len(burning) else 0.0
+
+    @classmethod
+    def from_timeseries(cls, data, events, opts=None):
+        """
+        Fit the parameters to the time series of a reference OpenRocket run.
+
+        Args:
+            data (dict): FlightDataType to array, with time, thrust, mass, drag
+                coefficient, reference area, Mach number, altitude and vertical velocity
+            events (dict): FlightEvent to list of event times
+            opts: OpenRocket simulation options, for the launch rod and site
+
+        Returns:
+            RocketParameters: Fitted parameters
+        """
+        time = data[FlightDataType.TYPE_TIME]
+        altitude = data[FlightDataType.TYPE_ALTITUDE]
+        apogee_time = events.get(FlightEvent.APOGEE, [time[np.argmax(altitude)]])[0]
+        ascent = (time <= apogee_time) & np.isfinite(data[FlightDataType.TYPE_DRAG_COEFF]) \
+            & np.isfinite(data[FlightDataType.TYPE_MACH_NUMBER])
+
+        # Drag coefficient table over Mach number, averaged per 0.02 Mach bin
+        mach = data[FlightDataType.TYPE_MACH_NUMBER][ascent]
+        cd = data[FlightDataType.TYPE_DRAG_COEFF][ascent]
+        bins = np.round(mach / 0.02).astype(np.int64)
+        unique_bins, inverse = np.unique(bins, return_inverse=True)
+        drag_mach = unique_bins * 0.02
+        drag_coefficient = np.bincount(inverse, weights=cd) / np.bincount(inverse)
+
+        reference_area = np.nanmedian(data[FlightDataType.TYPE_REFERENCE_AREA])
+        launch_altitude = opts.getLaunchAltitude() if opts is not None else 0.0
+
+        # Effective parachute drag area from the steady descent rate under canopy
+        parachute_cda = 0.0
+        deployment_delay = 0.0
+        deployments = events.get(FlightEvent.RECOVERY_DEVICE_DEPLOYMENT)
+        if deployments:
+            deployment_delay = max(0.0, deployments[0] - apogee_time)
+            steady = time > deployments[0] + 2.0
+            if np.count_nonzero(steady) > 2:
+                descent_rate = np.median(np.abs(data[FlightDataType.TYPE_VELOCITY_Z][steady]))
+                density, _ = atmosphere(launch_altitude + np.median(altitude[steady]))
+                final_mass = data[FlightDataType.TYPE_MASS][-1]
+                parachute_cda = 2 * final_mass * GRAVITY / (density * descent_rate ** 2)
+
+        rod = {}
+        if opts is not None:
+            rod = {"rod_length": opts.getLaunchRodLength(), "rod_angle": opts.getLaunchRodAngle(),
+                   "rod_direction": opts.getLaunchRodDirection()}
+
+        return cls(time, data[FlightDataType.TYPE_THRUST_FORCE], data[FlightDataType.TYPE_MASS],
+                   drag_mach, drag_coefficient, reference_area, parachute_cda, deployment_delay,
+                   launch_altitude=launch_altitude, **rod)
+
+    @classmethod
+    def extract(cls, ork_file, simulation_index=orhs.SIMULATION_INDEX):
+        """
+        Extract the parameters from a calm-air reference run of an .ork document.
+
+        Starts a JVM, so it should only run once per document; see load_or_extract.
+        Within orhelper_sim.keep_openrocket, the JVM is kept for later campaigns.
+
+        Args:
+            ork_file (str): Path to OpenRocket design file
+            simulation_index (int): Simulation of the document to run
+
+        Returns:
+            RocketParameters: Fitted parameters
+        """
+        variables = [FlightDataType.TYPE_TIME, FlightDataType.TYPE_ALTITUDE, FlightDataType.TYPE_VELOCITY_Z,
+                     FlightDataType.TYPE_THRUST_FORCE, FlightDataType.TYPE_MASS, FlightDataType.TYPE_DRAG_COEFF,
+                     FlightDataType.TYPE_REFERENCE_AREA, FlightDataType.TYPE_MACH_NUMBER]
+        with orhs.openrocket_instance() as instance:
+            orh = orhelper.Helper(instance)
+            sim = orh.load_doc(ork_file).getSimulation(simulation_index)
+            orhs.run_wind_profile(instance, orh, sim, [[0.0, 0.0, 0.0, 0.0]], seed=0)
+            data = orh.get_timeseries(sim, variables)
+            events = orh.get_events(sim)
+            return cls.from_timeseries(data, events, sim.getOptions())
+
+    @classmethod
+    def load_or_extract(cls, ork_file, simulation_index=orhs.SIMULATION_INDEX):
+        """
+        Load the parameters saved next to an .ork file, extracting them first if needed.
+
+        The saved parameters are re-extracted when the .ork file is newer.
+
+        Args:
+            ork_file (str): Path to OpenRocket design file
+            simulation_index (int): Simulation of the document to run
+
+        Returns:
+            RocketParameters: Parameters of the rocket
+        """
+        path = ork_file + PARAMETERS_SUFFIX
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(ork_file):
+            return cls.load(path)
+        parameters = cls.extract(ork_file, simulation_index)
+        parameters.save(path)
+        return parameters
+
+    def save(self, path):
+        """
+        Save the parameters as JSON.
+
+        Args:
+            path (str): Output file
+        """
+        values = {field: getattr(self, field) for field in self.FIELDS}
+        values = {k: v.tolist() if isinstance(v, np.ndarray) else v for k, v in values.items()}
+        with open(path, 'w', encoding="utf-8") as f:
+            json.dump(values, f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load parameters saved by save.
+
+        Args:
+            path (str): Parameter file
+
+        Returns:
+            RocketParameters: Loaded parameters
+        """
+        with open(path, 'r', encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+def wind_tables(wind_data, altitude_step=50.0):
+    """
+    Resample wind profiles to east/north wind components on a common altitude grid.
+
+    Profiles are in the SI OpenRocket input format [altitude (m), speed (m/s),
+    direction (rad), deviation (m/s)], see wind_database.si_profile. The
+    direction is where the wind blows from, clockwise from north.
+
+    Args:
+        wind_data (list): Wind profiles
+        altitude_step (float): Grid spacing in meters
+
+    Returns:
+        tuple: (grid step, east table, north table), tables of shape (runs, grid points)
+    """
+    top = max((float(np.max(np.asarray(data)[:, 0])) for data in wind_data if len(data)), default=0.0)
+    grid = np.arange(0.0, top + altitude_step, altitude_step)
+    east = np.zeros((len(wind_data), len(grid)))
+    north = np.zeros((len(wind_data), len(grid)))
+    for k, data in enumerate(wind_data):
+        levels = np.asarray(data, dtype=np.float64)
+        if not len(levels):
+            continue
+        levels = levels[np.argsort(levels[:, 0])]
+        u = -levels[:, 1] * np.sin(levels[:, 2])
+        v = -levels[:, 1] * np.cos(levels[:, 2])
+        east[k] = np.interp(grid, levels[:, 0], u)
+        north[k] = np.interp(grid, levels[:, 0], v)
+    return altitude_step, east, north
+
+
+def integrate(parameters, wind_data, dt=0.01, coast_dt=0.05, max_time=1200.0):
+    """
+    Integrate the point-mass trajectories of all wind profiles at once.
+
+    Thrust acts along the launch rod until the rocket leaves it, then along
+    the air-relative velocity. Drag uses the Mach-dependent coefficient of the
+    rocket, replaced by the parachute drag area once deployed. The time step
+    is coarsened to coast_dt once every motor has burnt out.
+
+    Args:
+        parameters (RocketParameters): Rocket description
+        wind_data (list): Wind profiles, one per trajectory
+        dt (float): Time step during powered flight, in seconds
+        coast_dt (float): Time step after burnout, in seconds
+        max_time (float): Flight time limit, in seconds
+
+    Returns:
+        dict: Per-trajectory arrays "x" (east) and "y" (north) landing offsets in
+            meters, "apogee" in meters and "flight_time" in seconds. Trajectories
+            still flying at max_time have no landing: their x, y and flight_time are NaN.
+    """
+    n = len(wind_data)
+    grid_step, east_table, north_table = wind_tables(wind_data)
+    last_level = east_table.shape[1] - 1
+    rows = np.arange(n)
+
+    rod_axis = np.array([math.sin(parameters.rod_angle) * math.sin(parameters.rod_direction),
+                         math.sin(parameters.rod_angle) * math.cos(parameters.rod_direction),
+                         math.cos(parameters.rod_angle)])
+    position = np.zeros((n, 3))
+    velocity = np.zeros((n, 3))
+    apogee = np.zeros(n)
+    apogee_time = np.full(n, np.inf)
+    flight_time = np.full(n, np.nan)
+    flying = np.ones(n, dtype=bool)
+    burn_time = parameters.burn_time
+
+    t = 0.0
+    while flying.any() and t < max_time:
+        step = dt if t <= burn_time + 1.0 else coast_dt
+        thrust = np.interp(t, parameters.thrust_time, parameters.thrust, right=0.0)
+        mass = np.interp(t, parameters.thrust_time, parameters.mass)
+
+        # Wind at the current altitude, linearly interpolated on the grid
+        level = np.clip(position[:, 2] / grid_step, 0.0, last_level)
+        low = np.minimum(level.astype(np.int64), max(last_level - 1, 0))
+        weight = np.clip(level - low, 0.0, 1.0)
+        high = np.minimum(low + 1, last_level)
+        wind = np.zeros((n, 3))
+        wind[:, 0] = east_table[rows, low] * (1 - weight) + east_table[rows, high] * weight
+        wind[:, 1] = north_table[rows, low] * (1 - weight) + north_table[rows, high] * weight
+
+        on_rod = position @ rod_axis < parameters.rod_length
+        airspeed_vector = np.where(on_rod[:, None], velocity, velocity - wind)
+        airspeed = np.linalg.norm(airspeed_vector, axis=1)
+        direction = np.where((airspeed > 1e-6)[:, None],
+                             airspeed_vector / np.maximum(airspeed, 1e-6)[:, None], rod_axis)
+        direction = np.where(on_rod[:, None], rod_axis, direction)
+
+        density, sound_speed = atmosphere(parameters.launch_altitude + position[:, 2])
+        cd = np.interp(airspeed / sound_speed, parameters.drag_mach, parameters.drag_coefficient)
+        cda = cd * parameters.reference_area
+        if parameters.parachute_cda > 0:
+            deployed = t >= apogee_time + parameters.deployment_delay
+            cda = np.where(deployed, parameters.parachute_cda, cda)
+        drag = 0.5 * density * airspeed ** 2 * cda
+
+        acceleration = ((thrust - drag)[:, None] * direction) / mass
+        acceleration[:, 2] -= GRAVITY
+        # The rod holds the rocket until thrust overcomes gravity
+        acceleration[on_rod] = np.maximum(acceleration[on_rod] @ rod_axis, 0.0)[:, None] * rod_axis
+
+        velocity[flying] += acceleration[flying] * step
+        position[flying] += velocity[flying] * step
+        t += step
+
+        climbing = position[:, 2] > apogee
+        apogee = np.where(climbing, position[:, 2], apogee)
+        reached = flying & ~climbing & np.isinf(apogee_time) & (t > burn_time)
+        apogee_time[reached] = t
+
+        landed = flying & (position[:, 2] <= 0.0) & np.isfinite(apogee_time)
+        flight_time[landed] = t
+        position[landed, 2] = 0.0
+        flying &= ~landed
+
+    position[flying, :2] = np.nan
+    return {"x": position[:, 0], "y": position[:, 1], "apogee": apogee, "flight_time": flight_time}
+
+
+class PointMassSimulation(orhs.OpenRocketSimulation):
+    """
+    Vectorized 3-DOF screening backend with the interface of OpenRocketSimulation.
+
+    All wind profiles are integrated together, so a campaign costs about as
+    much as a single trajectory step loop. The JVM is only started once per
+    document, to extract the rocket parameters.
+
+    Attributes:
+        parameters (RocketParameters): Point-mass description of the rocket
+        dt (float): Time step during powered flight, in seconds
+    """
+
+    def __init__(self, wind_data, ork_file, parameters=None, dt=0.01, **kwargs):
+        """
+        Initialize the screening backend.
+
+        Args:
+            wind_data (list): Formatted wind data for simulations
+            ork_file (str): Path to OpenRocket design file
+            parameters (RocketParameters): Rocket description, loaded or extracted from ork_file if None
+            dt (float): Time step during powered flight, in seconds
+            **kwargs: Other OpenRocketSimulation arguments
+        """
+        super().__init__(wind_data, ork_file, **kwargs)
+        self.parameters = parameters
+        self.dt = dt
+
+    def _parameters(self):
+        if self.parameters is None:
+            self.parameters = RocketParameters.load_or_extract(self.ork_file)
+        return self.parameters
+
+    def _landing(self, wind_data):
+        """Integrate wind profiles, without a landing point if the goal does not include one."""
+        landing = integrate(self._parameters(), wind_data, self.dt)
+        events = orhs.goal_events(self.goal)
+        if events is not None and FlightEvent.GROUND_HIT.name not in events:
+            landing["x"] = np.full(len(wind_data), np.nan)
+            landing["y"] = np.full(len(wind_data), np.nan)
+        return landing
+
+    def iter_runs(self, workers=1, parallel="processes", client=None, journal=None, resume=False):
+        """
+        Integrate every wind profile at once and yield one record per run.
+
+        The integration is deterministic and takes its own time step, so per-run
+        seeds and the fidelity tier do not apply, and nothing is read from or
+        written to the result cache. Parallelism and daemon arguments are
+        accepted for interface compatibility and ignored. Runs whose goal
+        excludes the landing, or still flying at the time limit, have a NaN
+        landing point.
+
+        Raises:
+            ValueError: If a journal is given
+
+        Yields:
+            RunResult: Result of each run, in wind_data order
+        """
+        if journal is not None or resume:
+            raise ValueError("Point-mass campaigns are not journaled and cannot be resumed")
+        ignored = [name for name, used in (("fidelity tier", self.fidelity_tier != fidelity.DEFAULT_TIER),
+                                           ("result cache", self.cache is not None)) if used]
+        if ignored:
+            print('Point-mass backend ignores the ' + ' and the '.join(ignored))
+        if not self.wind_data:
+            return
+        landing = self._landing(self.wind_data)
+        ranges = np.hypot(landing["x"], landing["y"])
+        bearings = np.arctan2(landing["y"], landing["x"])
+        for i in range(len(self.wind_data)):
+            result = RunResult(i, float(ranges[i]), float(bearings[i]), float(landing["apogee"][i]))
+            self.statistics.update(result)
+            yield result
+
+    def _serial_results(self, jobs, options):
+        """
+        Integrate the trajectories one job at a time, for adaptive campaigns.
+
+        Yields:
+            tuple: (LandingPoint, apogee, flightdata) for each job
+        """
+        for data, _ in jobs:
+            landing = self._landing([data])
+            x, y = landing["x"][0], landing["y"][0]
+            lp = orhs.LandingPoint([math.hypot(x, y)], [math.atan2(y, x)])
+            yield lp, landing["apogee"][0], dict()
+
+
+def validation_report(reference, screening):
+    """
+    Compare a point-mass campaign with an OpenRocket campaign of the same wind profiles.
+
+    Args:
+        reference (OpenRocketSimulation): Finished OpenRocket campaign
+        screening (PointMassSimulation): Finished point-mass campaign
+
+    Returns:
+        dict: Apogee and landing errors of the screening backend and the ratio of
+            its landing dispersion to the reference one
+    """
+    def landing(sim):
+        ranges, bearings = np.asarray(sim.ranges), np.asarray(sim.bearings)
+        return np.column_stack((ranges * np.cos(bearings), ranges * np.sin(bearings)))
+
+    ref_apogee, scr_apogee = np.asarray(reference.apogee), np.asarray(screening.apogee)
+    ref_landing, scr_landing = landing(reference), landing(screening)
+    # Landing errors and spreads are taken over the runs that landed in both campaigns
+    landed = np.isfinite(ref_landing).all(axis=1) & np.isfinite(scr_landing).all(axis=1)
+    ref_landing, scr_landing = ref_landing[landed], scr_landing[landed]
+    landing_error = np.linalg.norm(scr_landing - ref_landing, axis=1)
+    ref_spread = np.sqrt(np.trace(np.atleast_2d(np.cov(ref_landing.T)))) if len(ref_landing) > 1 else math.nan
+    scr_spread = np.sqrt(np.trace(np.atleast_2d(np.cov(scr_landing.T)))) if len(scr_landing) > 1 else math.nan
+    dispersion_ratio = scr_spread / ref_spread if ref_spread > 0 else math.nan
+    centroid_offset = np.linalg.norm(scr_landing.mean(axis=0) - ref_landing.mean(axis=0)) if len(landing_error) \
+        else math.nan
+
+    report = {
+        "runs": len(ref_apogee),
+        "landed": int(np.count_nonzero(landed)),
+        "apogee_mean_error": float(np.mean(scr_apogee - ref_apogee)),
+        "apogee_mean_relative_error": float(np.mean(np.abs(scr_apogee - ref_apogee) / ref_apogee)),
+        "landing_mean_error": float(np.mean(landing_error)) if len(landing_error) else math.nan,
+        "landing_max_error": float(np.max(landing_error)) if len(landing_error) else math.nan,
+        "landing_centroid_offset": float(centroid_offset),
+        "dispersion_ratio": float(dispersion_ratio),
+    }
+    print('Point-mass vs OpenRocket over %i runs: apogee error %.1f m (%.1f%%), landing error %.1f m mean, '
+          '%.1f m max, dispersion ratio %.2f' % (report["runs"], report["apogee_mean_error"],
+                                                100 * report["apogee_mean_relative_error"],
+                                                report["landing_mean_error"], report["landing_max_error"],
+                                                report["dispersion_ratio"]))
+    return report
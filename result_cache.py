@@ -0,0 +1,243 @@
+"""
+Simulation result cache module.
+Stores the results of OpenRocket runs on disk under a content hash of
+everything that determines them: the .ork file bytes, the wind levels, the
+simulation options and the random seed. Identical runs are then read back
+instead of simulated again.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "results")
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+# Append-only record of the entries' sizes, results and uses, in the cache directory
+INDEX_FILE = "index.jsonl"
+# Index records tolerated beyond twice the entry count before the index is compacted
+INDEX_SLACK = 1024
+
+
+def file_digest(path):
+    """
+    Hash the contents of a file.
+
+    Args:
+        path (str): File to hash
+
+    Returns:
+        str: SHA-256 hex digest of the file bytes
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Size-bounded, content-addressed store of simulation results.
+
+    Every entry is one .npz file named after its key, holding the run result
+    [range, bearing, apogee] and the recorded flight data columns. An
+    append-only index next to the entries records the size, result and use
+    of every entry, so that lookups without flight data never open an entry
+    and the least recently used entries are deleted first when the cache
+    grows past its size limit. The index is compacted when the cache is
+    opened and whenever it holds many more records than entries.
+
+    Attributes:
+        directory (str): Directory holding the entries
+        max_size (int): Maximum combined size of the entries, in bytes
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_size=DEFAULT_CACHE_SIZE):
+        """
+        Initialize the cache, creating its directory if needed.
+
+        Args:
+            directory (str): Directory holding the entries
+            max_size (int): Maximum combined size of the entries, in bytes
+        """
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        # Key to [size, result or None], least recently used first
+        self._entries = self._read_index()
+        self._size = sum(size for size, _ in self._entries.values())
+        self._index = None
+        self._records = 0
+        self._compact()
+
+    @staticmethod
+    def key(ork_digest, wind_levels, options, seed):
+        """
+        Compute the key of a run.
+
+        Args:
+            ork_digest (str): Digest of the .ork file, see file_digest
+            wind_levels: Wind levels of the run
+            options (dict): Simulation options that affect the result
+            seed (int): Random seed of the run
+
+        Returns:
+            str: SHA-256 hex digest identifying the run
+        """
+        digest = hashlib.sha256()
+        digest.update(ork_digest.encode("ascii"))
+        digest.update(np.ascontiguousarray(wind_levels, dtype=np.float64).tobytes())
+        digest.update(json.dumps(options, sort_keys=True).encode("utf-8"))
+        digest.update(str(seed).encode("ascii"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _read_index(self):
+        """
+        Replay the index and reconcile it with the entries on disk.
+
+        Entries the index does not know, e.g. of a cache written before the
+        index existed, are taken as the least recently used.
+
+        Returns:
+            dict: Key to [size, result or None], least recently used first
+        """
+        entries = dict()
+        if os.path.exists(self._index_path):
+            with open(self._index_path, 'r', encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write of the last record
+                        break
+                    key = record["key"]
+                    if "size" in record:
+                        entries.pop(key, None)
+                        entries[key] = [record["size"], record.get("result")]
+                    elif record.get("evicted"):
+                        entries.pop(key, None)
+                    elif key in entries:
+                        entries[key] = entries.pop(key)
+
+        on_disk = {entry.name[:-len(".npz")]: entry.stat().st_size for entry in os.scandir(self.directory)
+                   if entry.name.endswith(".npz")}
+        unindexed = {key: [size, None] for key, size in on_disk.items() if key not in entries}
+        indexed = {key: [on_disk[key], result] for key, (_, result) in entries.items() if key in on_disk}
+        return {**unindexed, **indexed}
+
+    def _compact(self):
+        """Rewrite the index with one record per entry, in least recently used order."""
+        if self._index is not None:
+            self._index.close()
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as f:
+            for key, (size, result) in self._entries.items():
+                f.write(json.dumps({"key": key, "size": size, "result": result}) + "\n")
+        os.replace(tmp_path, self._index_path)
+        self._index = open(self._index_path, 'a', encoding="utf-8")
+        self._records = len(self._entries)
+
+    def _log(self, record):
+        """Append a record to the index, compacting it if it grew much longer than the cache."""
+        self._index.write(json.dumps(record) + "\n")
+        self._records += 1
+        if self._records > 2 * len(self._entries) + INDEX_SLACK:
+            self._compact()
+
+    def get(self, key, flightdata=True):
+        """
+        Read a cached run.
+
+        The entry file is opened at most once, and not at all when the flight
+        data is not requested and the index holds the result.
+
+        Args:
+            key (str): Key of the run
+            flightdata (bool): Also read the flight data columns
+
+        Returns:
+            tuple: (range, bearing, apogee, flightdata) or None if the run is not cached.
+                flightdata maps FlightDataType names to arrays, and is empty if not requested.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        result, columns = entry[1], {}
+        if result is None or flightdata:
+            try:
+                with np.load(self._path(key)) as values:
+                    result = values["result"].tolist()
+                    if flightdata:
+                        columns = {name: values[name] for name in values.files if name != "result"}
+            except (OSError, KeyError, ValueError):
+                self._entries.pop(key, None)
+                self._size -= entry[0]
+                return None
+            entry[1] = result
+
+        self._entries[key] = self._entries.pop(key)
+        self._log({"key": key})
+        range_, bearing, apogee = result
+        return float(range_), float(bearing), float(apogee), columns
+
+    def put(self, key, range_, bearing, apogee, flightdata):
+        """
+        Store a run, evicting old entries if the cache outgrows its size limit.
+
+        Args:
+            key (str): Key of the run
+            range_ (float): Landing distance from the launch site in meters
+            bearing (float): Landing bearing in radians
+            apogee (float): Apogee height in meters
+            flightdata (dict): Flight data columns keyed by FlightDataType or name
+        """
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        result = [float(range_), float(bearing), float(apogee)]
+        columns = {getattr(name, "name", name): np.asarray(values) for name, values in flightdata.items()}
+        with open(tmp_path, "wb") as f:
+            np.savez(f, result=np.array(result, dtype=np.float64), **columns)
+        os.replace(tmp_path, path)
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous[0]
+        size = os.path.getsize(path)
+        self._entries[key] = [size, result]
+        self._size += size
+        self._log({"key": key, "size": size, "result": result})
+        self._evict()
+        self._index.flush()
+
+    def size(self):
+        """
+        Get the combined size of the entries.
+
+        Returns:
+            int: Size in bytes
+        """
+        return self._size
+
+    def close(self):
+        """Flush and close the index. The cache must not be used afterwards."""
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits in its size limit."""
+        while self._size > self.max_size and self._entries:
+            key = next(iter(self._entries))
+            size, _ = self._entries.pop(key)
+            self._size -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self._log({"key": key, "evicted": True})
@@ -0,0 +1,180 @@
+"""
+Campaign journal module.
+Appends every completed simulation run to a crash-safe JSON-lines journal so
+that an interrupted Monte Carlo campaign can be resumed without redoing the
+runs it already finished.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from simulation_stats import RunResult
+
+
+def campaign_digest(wind_data):
+    """
+    Hash the wind profiles of a campaign.
+
+    Args:
+        wind_data (list): Wind profiles of the campaign
+
+    Returns:
+        str: SHA-256 hex digest of the profiles, in order
+    """
+    digest = hashlib.sha256()
+    for data in wind_data:
+        levels = np.ascontiguousarray(data, dtype=np.float64)
+        digest.update(str(levels.shape).encode("ascii"))
+        digest.update(levels.tobytes())
+    return digest.hexdigest()
+
+
+def campaign_wind_seed(path=None, resume=False, seed=None):
+    """
+    Choose the seed of the random wind profile draws of a campaign.
+
+    An explicit seed is kept. Otherwise a resumed journal's recorded seed is
+    reused, so the campaign draws the same profiles again, and any other
+    campaign gets a fresh seed, to be recorded in its journal header.
+
+    Args:
+        path (str): Journal file, None without a journal
+        resume (bool): Whether the journal is resumed
+        seed (int): Explicit seed
+
+    Returns:
+        int: Seed of the wind profile draws
+    """
+    if seed is not None:
+        return seed
+    if resume and path is not None:
+        header, _ = RunJournal(path).read()
+        if header is not None and header.get("wind_seed") is not None:
+            return header["wind_seed"]
+    return int(np.random.SeedSequence().generate_state(1)[0])
+
+
+class RunJournal:
+    """
+    Append-only journal of the completed runs of one campaign.
+
+    The first line is a header identifying the campaign (run count, seeds,
+    options and a digest of its wind profiles); every following line is one RunResult.
+    Lines are flushed as they are written and fsync'ed in batches, so a crash
+    loses at most the last unsynced batch, and a torn last line is ignored
+    when the journal is read back.
+
+    Attributes:
+        path (str): Journal file
+        sync_every (int): Number of records between two fsync calls
+    """
+
+    def __init__(self, path, sync_every=16):
+        """
+        Initialize the journal. No file is opened until start() is called.
+
+        Args:
+            path (str): Journal file
+            sync_every (int): Number of records between two fsync calls
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self._file = None
+        self._unsynced = 0
+
+    def read(self):
+        """
+        Read the journal back.
+
+        Returns:
+            tuple: (header dict or None, dict of run index to RunResult)
+        """
+        header = None
+        results = {}
+        if not os.path.exists(self.path):
+            return header, results
+
+        with open(self.path, 'r', encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write of the last record before a crash
+                    break
+                if "header" in record:
+                    header = record["header"]
+                else:
+                    result = RunResult(**{field: record[field] for field in RunResult._fields if field in record})
+                    results[result.index] = result
+        return header, results
+
+    def start(self, header, resume=False):
+        """
+        Open the journal for appending.
+
+        Args:
+            header (dict): Campaign identification, written as the first line
+            resume (bool): Keep the runs of a previous journal of the same campaign.
+                Otherwise the journal is started over.
+
+        Returns:
+            dict: Run index to RunResult of the runs already completed
+
+        Raises:
+            ValueError: If resuming a journal written by a different campaign
+        """
+        completed = {}
+        if resume:
+            previous, completed = self.read()
+            if previous is not None and previous != header:
+                raise ValueError(f"Journal {self.path} belongs to a different campaign, cannot resume it")
+
+        # Rewrite the valid records, which also drops a torn last line
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as f:
+            f.write(json.dumps({"header": header}) + "\n")
+            for index in sorted(completed):
+                f.write(json.dumps(completed[index]._asdict()) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._file = open(self.path, 'a', encoding="utf-8")
+        self._unsynced = 0
+        return completed
+
+    def append(self, result):
+        """
+        Record a completed run.
+
+        Args:
+            result (RunResult): Result of the run
+        """
+        record = {key: (float(value) if key != "index" else int(value)) for key, value in result._asdict().items()}
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        """Force the recorded runs to disk."""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        """Sync and close the journal."""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex, value, tb):
+        self.close()
@@ -0,0 +1,232 @@
+"""
+Wind profile sampler module.
+Pluggable strategies choosing which wind profiles, wind scales and random
+seeds a campaign simulates. Stratified, quasi-random and antithetic draws
+reach a given dispersion accuracy with fewer OpenRocket runs than plain
+random sampling.
+"""
+
+import numpy as np
+from scipy.stats import qmc
+
+# Meteorological seasons by month
+SEASONS = {12: "DJF", 1: "DJF", 2: "DJF",
+           3: "MAM", 4: "MAM", 5: "MAM",
+           6: "JJA", 7: "JJA", 8: "JJA",
+           9: "SON", 10: "SON", 11: "SON"}
+
+SEED_LIMIT = 2 ** 31
+
+
+class Sampler:
+    """
+    Base class of the wind profile samplers.
+
+    A sampler turns uniform points of the unit hypercube into campaign runs:
+    the first coordinate selects the day, an optional second one scales the
+    wind speed by a factor in [1 - scale_spread, 1 + scale_spread]. Every run
+    gets an explicit OpenRocket seed, so campaigns are reproducible.
+
+    Attributes:
+        seed (int): Seed of the sampler's random generator
+        rng (np.random.Generator): Random generator of the sampler
+        scale_spread (float): Half-width of the wind speed scale factor, 0 to keep measured speeds
+        common_seed (bool): Give every run the same OpenRocket seed (common random numbers)
+    """
+
+    def __init__(self, seed=None, scale_spread=0.0, common_seed=False):
+        """
+        Initialize the sampler.
+
+        Args:
+            seed (int): Seed of the sampler's random generator
+            scale_spread (float): Half-width of the wind speed scale factor
+            common_seed (bool): Give every run the same OpenRocket seed
+        """
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        self.scale_spread = scale_spread
+        self.common_seed = common_seed
+
+    @property
+    def dimensions(self):
+        """Number of coordinates of a point: the day, and the wind scale with a scale_spread."""
+        return 2 if self.scale_spread else 1
+
+    def uniforms(self, count, profile_days):
+        """
+        Draw the uniform points of the runs.
+
+        Args:
+            count (int): Number of runs
+            profile_days (np.ndarray): Day of each candidate profile
+
+        Returns:
+            np.ndarray: Points in [0, 1), shape (count, dimensions)
+        """
+        return self.rng.random((count, self.dimensions))
+
+    def seeds(self, count):
+        """
+        Draw the OpenRocket seeds of the runs.
+
+        Args:
+            count (int): Number of runs
+
+        Returns:
+            list: One seed per run
+        """
+        if self.common_seed:
+            return [int(self.rng.integers(SEED_LIMIT))] * count
+        return self.rng.integers(SEED_LIMIT, size=count).tolist()
+
+    def draw(self, database, start, end, count):
+        """
+        Draw the runs of a campaign.
+
+        Args:
+            database (WindDatabase): Wind profiles to draw from
+            start: First day of the date range
+            end: Last day of the date range
+            count (int): Number of runs
+
+        Returns:
+            tuple: (profiles, seeds), both of length count, or empty lists if
+                no profile lies in the date range
+        """
+        lo, hi = database.day_slice(start, end)
+        if hi == lo or count <= 0:
+            return [], []
+
+        points = self.uniforms(count, np.asarray(database.days[lo:hi]))
+        indices = lo + np.minimum((points[:, 0] * (hi - lo)).astype(np.int64), hi - lo - 1)
+        scales = 1 + self.scale_spread * (2 * points[:, 1] - 1) if points.shape[1] > 1 else np.ones(count)
+        return [scaled_profile(database, i, k) for i, k in zip(indices, scales)], self.seeds(count)
+
+
+class RandomSampler(Sampler):
+    """Plain independent random draws, the reference 1/sqrt(N) sampler."""
+
+
+class LatinHypercubeSampler(Sampler):
+    """
+    Latin hypercube sampling over the days of the date range, stratified by season.
+
+    Runs are allocated to the seasons present in the range in proportion to
+    their number of profiles; within a season the day coordinate falls in a
+    different equal-width stratum for every run. The wind scale coordinate,
+    if any, is Latin-hypercube sampled independently.
+
+    Attributes:
+        by_season (bool): Stratify by meteorological season before sampling the days
+    """
+
+    def __init__(self, seed=None, scale_spread=0.0, common_seed=False, by_season=True):
+        """
+        Initialize the sampler.
+
+        Args:
+            seed (int): Seed of the sampler's random generator
+            scale_spread (float): Half-width of the wind speed scale factor
+            common_seed (bool): Give every run the same OpenRocket seed
+            by_season (bool): Stratify by meteorological season before sampling the days
+        """
+        super().__init__(seed, scale_spread, common_seed)
+        self.by_season = by_season
+
+    def _latin(self, count):
+        """One-dimensional Latin hypercube sample of size count."""
+        return (self.rng.permutation(count) + self.rng.random(count)) / count
+
+    def uniforms(self, count, profile_days):
+        points = np.empty((count, self.dimensions))
+        for d in range(1, self.dimensions):
+            points[:, d] = self._latin(count)
+
+        if not self.by_season:
+            points[:, 0] = self._latin(count)
+            return points
+
+        # Profiles are sorted by day, so each season maps to a set of positions of the range
+        months = profile_days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        seasons = np.array([SEASONS[m] for m in months])
+        names, sizes = np.unique(seasons, return_counts=True)
+        quotas = sizes * count / sizes.sum()
+        allocation = np.floor(quotas).astype(np.int64)
+        remainder = count - allocation.sum()
+        allocation[np.argsort(quotas - allocation)[::-1][:remainder]] += 1
+
+        n = len(profile_days)
+        row = 0
+        for name, allocated in zip(names, allocation):
+            positions = np.flatnonzero(seasons == name)
+            chosen = positions[np.minimum((self._latin(allocated) * len(positions)).astype(np.int64),
+                                          len(positions) - 1)]
+            # Map back to the centre of the chosen profile's cell of [0, 1)
+            points[row:row + allocated, 0] = (chosen + 0.5) / n
+            row += allocated
+        order = self.rng.permutation(count)
+        return points[order]
+
+
+class SobolSampler(Sampler):
+    """
+    Scrambled Sobol sequence over the day and the wind scale.
+
+    Low-discrepancy points cover the (day, wind scale) square more evenly than
+    random ones. A power-of-two block is generated and truncated to the run
+    count, which keeps the sequence balanced for power-of-two campaigns.
+    Without a scale_spread the sequence is one-dimensional, over the day only.
+    """
+
+    def uniforms(self, count, profile_days):
+        sobol = qmc.Sobol(d=self.dimensions, scramble=True, seed=self.rng)
+        return sobol.random_base2(int(np.ceil(np.log2(max(count, 1)))))[:count]
+
+
+class AntitheticSampler(Sampler):
+    """
+    Antithetic pairs of draws.
+
+    Runs come in pairs: the second run of a pair uses the mirrored point 1 - u
+    of the first, so a day early in the range is paired with one late in it
+    and, with a scale_spread, a scaled-up wind with a scaled-down one. The
+    negatively correlated pair members lower the variance of the campaign
+    mean. Both runs of a pair also get the same OpenRocket seed, so the pair
+    differs only by its mirrored wind draw.
+    """
+
+    def uniforms(self, count, profile_days):
+        half = self.rng.random(((count + 1) // 2, self.dimensions))
+        return np.stack((half, 1 - half), axis=1).reshape(-1, self.dimensions)[:count]
+
+    def seeds(self, count):
+        pairs = super().seeds((count + 1) // 2)
+        return [seed for seed in pairs for _ in range(2)][:count]
+
+
+SAMPLERS = {
+    "random": RandomSampler,
+    "lhs": LatinHypercubeSampler,
+    "sobol": SobolSampler,
+    "antithetic": AntitheticSampler,
+}
+
+
+def scaled_profile(database, index, scale=1.0):
+    """
+    Get a profile with its wind speeds multiplied by a scale factor.
+
+    Args:
+        database (WindDatabase): Wind profiles
+        index (int): Profile index
+        scale (float): Wind speed factor
+
+    Returns:
+        np.ndarray: Profile in OpenRocket input format, the shared database array if scale is 1
+    """
+    profile = database.profile(index)
+    if scale != 1.0:
+        profile = profile.copy()
+        profile[:, 1] *= scale
+    return profile
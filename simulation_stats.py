@@ -0,0 +1,320 @@
+"""
+Simulation statistics module.
+Compact per-run result records and online accumulators that summarize a
+Monte Carlo campaign in constant memory while it is running.
+"""
+
+import math
+from collections import deque
+from typing import NamedTuple
+
+import numpy as np
+from scipy import stats
+
+
+def covariance_ellipse(covariance, confidence=0.99):
+    """
+    Get the confidence ellipse of a bivariate Gaussian.
+
+    Args:
+        covariance (np.ndarray): 2x2 covariance matrix of the landing points
+        confidence (float): Probability mass inside the ellipse
+
+    Returns:
+        tuple: (semi_major, semi_minor, angle) in meters and radians
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+    scale = math.sqrt(stats.chi2.ppf(confidence, df=2))
+    semi_minor, semi_major = scale * np.sqrt(np.maximum(eigenvalues, 0.0))
+    angle = math.atan2(eigenvectors[1, 1], eigenvectors[0, 1])
+    return semi_major, semi_minor, angle
+
+
+class RunResult(NamedTuple):
+    """
+    Compact result of one simulation run.
+
+    Attributes:
+        index (int): Position of the run's wind profile in the campaign
+        range (float): Landing distance from the launch site in meters
+        bearing (float): Landing bearing from the launch site in radians
+        apogee (float): Apogee height in meters
+        latitude (float): Landing latitude in degrees, NaN if only range and bearing are known
+        longitude (float): Landing longitude in degrees
+        launch_latitude (float): Launch site latitude in degrees
+        launch_longitude (float): Launch site longitude in degrees
+    """
+    index: int
+    range: float
+    bearing: float
+    apogee: float
+    latitude: float = math.nan
+    longitude: float = math.nan
+    launch_latitude: float = math.nan
+    launch_longitude: float = math.nan
+
+    @property
+    def x(self):
+        """Landing position along the bearing origin axis, in meters."""
+        return self.range * math.cos(self.bearing)
+
+    @property
+    def y(self):
+        """Landing position perpendicular to the bearing origin axis, in meters."""
+        return self.range * math.sin(self.bearing)
+
+
+class LandingStatistics:
+    """
+    Online accumulator of landing and apogee statistics.
+
+    Uses Welford's algorithm for the mean and covariance of the landing x/y
+    coordinates and tracks apogee mean, minimum and maximum, so it can be
+    queried at any point of a campaign without keeping the individual runs.
+    Runs without a finite landing point (runs that did not land, or whose
+    range or bearing is NaN) are counted apart and left out of the landing
+    accumulators; runs without a finite apogee are left out of the apogee ones.
+
+    Attributes:
+        count (int): Number of runs accumulated
+        landed (int): Number of runs with a finite landing point
+        unlanded (int): Number of runs without one
+        apogees (int): Number of runs with a finite apogee
+        apogee_min (float): Lowest apogee seen
+        apogee_max (float): Highest apogee seen
+    """
+
+    def __init__(self):
+        """Initialize an empty accumulator."""
+        self.count = 0
+        self.landed = 0
+        self.unlanded = 0
+        self.apogees = 0
+        self._mean = np.zeros(2)
+        self._m2 = np.zeros((2, 2))
+        self._apogee_mean = 0.0
+        self._apogee_m2 = 0.0
+        self.apogee_min = math.inf
+        self.apogee_max = -math.inf
+
+    def update(self, result):
+        """
+        Add one run to the statistics.
+
+        Args:
+            result (RunResult): Result of the run
+        """
+        self.count += 1
+        point = np.array((result.x, result.y))
+        if np.all(np.isfinite(point)):
+            self.landed += 1
+            delta = point - self._mean
+            self._mean += delta / self.landed
+            self._m2 += np.outer(delta, point - self._mean)
+        else:
+            self.unlanded += 1
+
+        if math.isfinite(result.apogee):
+            self.apogees += 1
+            delta = result.apogee - self._apogee_mean
+            self._apogee_mean += delta / self.apogees
+            self._apogee_m2 += delta * (result.apogee - self._apogee_mean)
+            self.apogee_min = min(self.apogee_min, result.apogee)
+            self.apogee_max = max(self.apogee_max, result.apogee)
+
+    def merge(self, other):
+        """
+        Combine the statistics of another accumulator into this one.
+
+        Args:
+            other (LandingStatistics): Accumulator of a disjoint set of runs
+        """
+        if other.count == 0:
+            return
+        if other.landed:
+            total = self.landed + other.landed
+            delta = other._mean - self._mean
+            self._m2 += other._m2 + np.outer(delta, delta) * self.landed * other.landed / total
+            self._mean += delta * other.landed / total
+            self.landed = total
+
+        if other.apogees:
+            total = self.apogees + other.apogees
+            delta = other._apogee_mean - self._apogee_mean
+            self._apogee_m2 += other._apogee_m2 + delta * delta * self.apogees * other.apogees / total
+            self._apogee_mean += delta * other.apogees / total
+            self.apogees = total
+        self.apogee_min = min(self.apogee_min, other.apogee_min)
+        self.apogee_max = max(self.apogee_max, other.apogee_max)
+        self.unlanded += other.unlanded
+        self.count += other.count
+
+    @property
+    def mean(self):
+        """Mean landing point (x, y) in meters."""
+        return self._mean.copy() if self.landed else np.full(2, np.nan)
+
+    @property
+    def covariance(self):
+        """Sample covariance matrix of the landing points."""
+        if self.landed < 2:
+            return np.full((2, 2), np.nan)
+        return self._m2 / (self.landed - 1)
+
+    @property
+    def standard_error(self):
+        """Standard error of the mean landing point, per axis, in meters."""
+        if self.landed < 2:
+            return np.full(2, np.nan)
+        return np.sqrt(np.diag(self.covariance) / self.landed)
+
+    @property
+    def apogee_mean(self):
+        """Mean apogee in meters."""
+        return self._apogee_mean if self.apogees else math.nan
+
+    @property
+    def apogee_std(self):
+        """Sample standard deviation of the apogee in meters."""
+        return math.sqrt(self._apogee_m2 / (self.apogees - 1)) if self.apogees > 1 else math.nan
+
+    def ellipse(self, confidence=0.99):
+        """
+        Get the landing confidence ellipse of a Gaussian fit of the landing points.
+
+        Args:
+            confidence (float): Probability mass inside the ellipse
+
+        Returns:
+            tuple: (semi_major, semi_minor, angle) in meters and radians
+        """
+        if self.landed < 2:
+            return math.nan, math.nan, math.nan
+        return covariance_ellipse(self.covariance, confidence)
+
+    def summary(self):
+        """
+        Get a snapshot of the statistics.
+
+        Returns:
+            dict: Run counts, landing mean/covariance and apogee statistics
+        """
+        return {
+            "count": self.count,
+            "landed": self.landed,
+            "unlanded": self.unlanded,
+            "landing_mean": self.mean.tolist(),
+            "landing_covariance": self.covariance.tolist(),
+            "apogee_mean": self.apogee_mean,
+            "apogee_std": self.apogee_std,
+            "apogee_min": self.apogee_min,
+            "apogee_max": self.apogee_max,
+        }
+
+
+class ConvergenceMonitor:
+    """
+    Decides when an adaptive Monte Carlo campaign has converged.
+
+    After every run it records the landing-centroid standard error and the
+    axes of the landing confidence ellipse. The campaign has converged once
+    each of these quantities varied by less than a relative tolerance over
+    the last ``window`` runs.
+
+    Attributes:
+        tolerance (float): Allowed relative variation over the window, e.g. 0.02 for 2%
+        window (int): Number of consecutive runs over which the variation is measured
+        min_runs (int): Landed runs required before convergence is considered
+        confidence (float): Probability mass of the monitored ellipse
+        converged (bool): Whether the convergence criterion is met
+    """
+
+    def __init__(self, tolerance=0.02, window=50, min_runs=100, confidence=0.99, max_runs=None):
+        """
+        Initialize the monitor.
+
+        With a max_runs, the window is shortened to at most half of it and
+        min_runs to at most all of it, so a campaign capped below the default
+        window and minimum can still converge.
+
+        Args:
+            tolerance (float): Allowed relative variation over the window
+            window (int): Number of consecutive runs over which the variation is measured
+            min_runs (int): Runs required before convergence is considered
+            confidence (float): Probability mass of the monitored ellipse
+            max_runs (int): Runs the campaign is capped at, None if uncapped
+        """
+        if max_runs is not None:
+            window = min(window, max(max_runs // 2, 2))
+            min_runs = min(min_runs, max_runs)
+        self.tolerance = tolerance
+        self.window = window
+        self.min_runs = max(min_runs, window, 2)
+        self.confidence = confidence
+        self.converged = False
+        self._history = deque(maxlen=window)
+
+    def update(self, statistics):
+        """
+        Record the state of the statistics after a run.
+
+        Args:
+            statistics (LandingStatistics): Statistics including the latest run
+
+        Returns:
+            bool: Whether the campaign has converged
+        """
+        if statistics.landed < 2:
+            return False
+        semi_major, semi_minor, _ = statistics.ellipse(self.confidence)
+        self._history.append((np.linalg.norm(statistics.standard_error), semi_major, semi_minor))
+        self.converged = (statistics.landed >= self.min_runs
+                          and len(self._history) == self.window
+                          and bool(np.all(self.relative_variation() <= self.tolerance)))
+        return self.converged
+
+    def relative_variation(self):
+        """
+        Get the variation of each monitored quantity over the window.
+
+        Returns:
+            np.ndarray: (max - min) / latest value of the centroid standard error,
+                semi-major axis and semi-minor axis
+        """
+        if not self._history:
+            return np.full(3, np.nan)
+        history = np.array(self._history)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variation = np.ptp(history, axis=0) / np.abs(history[-1])
+        return np.where(np.ptp(history, axis=0) == 0, 0.0, variation)
+
+    def report(self, statistics):
+        """
+        Summarize the precision achieved by a campaign.
+
+        Args:
+            statistics (LandingStatistics): Final statistics of the campaign
+
+        Returns:
+            dict: Run count, convergence flag, centroid standard error and its 95%
+                confidence half-widths, ellipse axes and their relative variation
+        """
+        semi_major, semi_minor, angle = statistics.ellipse(self.confidence)
+        standard_error = statistics.standard_error
+        variation = self.relative_variation()
+        return {
+            "runs": statistics.count,
+            "landed": statistics.landed,
+            "converged": self.converged,
+            "centroid": statistics.mean.tolist(),
+            "centroid_standard_error": standard_error.tolist(),
+            "centroid_ci95_half_width": (stats.norm.ppf(0.975) * standard_error).tolist(),
+            "ellipse_confidence": self.confidence,
+            "ellipse_axes": [float(semi_major), float(semi_minor)],
+            "ellipse_angle": float(angle),
+            "relative_variation": {
+                "centroid_standard_error": float(variation[0]),
+                "semi_major": float(variation[1]),
+                "semi_minor": float(variation[2]),
+            },
+        }
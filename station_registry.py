@@ -0,0 +1,175 @@
+"""
+Station registry module.
+Discovers the upper-winds station files of the data directory and opens their
+wind databases lazily, keeping the most recently used ones in a memory-bounded
+LRU cache.
+"""
+
+import glob
+import os
+from collections import OrderedDict
+
+from wind_database import WindDatabase
+
+DEFAULT_DATA_DIR = "data"
+DEFAULT_STATION = "CYYU"
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024  # bytes
+
+STATION_FILE_SUFFIX = ".upper_winds.json"
+# Newline-delimited variant, one record per line; the JSON file wins if a station has both
+STATION_NDJSON_SUFFIX = ".upper_winds.ndjson"
+
+
+class StationRegistry:
+    """
+    Lazily loaded collection of wind databases, one per station and period.
+
+    Stations are discovered from the ``*.upper_winds.json`` and
+    ``*.upper_winds.ndjson`` files of a data directory. A station is only
+    opened on its first query; opened databases are kept in
+    least-recently-used order and evicted once their combined size exceeds
+    the memory budget. Databases report the profiles they convert, so the
+    combined size is kept as a running total and the budget is enforced
+    again whenever a cached database grows. The most recently used database
+    is never evicted, even if it alone exceeds the budget.
+
+    Attributes:
+        data_dir (str): Directory scanned for station files
+        memory_budget (int): Maximum combined size of cached databases, in bytes
+        stations (dict): Station code to station file path
+    """
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, memory_budget=DEFAULT_MEMORY_BUDGET):
+        """
+        Initialize the registry and discover the available stations.
+
+        Args:
+            data_dir (str): Directory scanned for station files
+            memory_budget (int): Maximum combined size of cached databases, in bytes
+        """
+        self.data_dir = data_dir
+        self.memory_budget = memory_budget
+        self.stations = {}
+        self._cache = OrderedDict()
+        self._sizes = {}
+        self._size = 0
+        self.discover()
+
+    def discover(self):
+        """
+        Scan the data directory for station files.
+
+        Returns:
+            list: Sorted station codes
+        """
+        self.stations = {}
+        for suffix in (STATION_NDJSON_SUFFIX, STATION_FILE_SUFFIX):
+            pattern = os.path.join(self.data_dir, "*" + suffix)
+            self.stations.update({os.path.basename(path)[:-len(suffix)]: path for path in glob.glob(pattern)})
+        return self.codes()
+
+    def codes(self):
+        """
+        Get the codes of the discovered stations.
+
+        Returns:
+            list: Sorted station codes
+        """
+        return sorted(self.stations)
+
+    def __contains__(self, code):
+        return code in self.stations
+
+    def get(self, code=DEFAULT_STATION, period="AM"):
+        """
+        Get the wind database of a station, opening it on first use.
+
+        Args:
+            code (str): Station code, e.g. CYYU
+            period (str): Forecast period (AM, PM or NIGHT)
+
+        Returns:
+            WindDatabase: Database of the requested station and period
+
+        Raises:
+            KeyError: If no station file exists for the code
+        """
+        key = (code, period)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        if code not in self.stations:
+            raise KeyError(f"No wind data for station {code} in {self.data_dir}")
+
+        database = WindDatabase.open(self.stations[code], period)
+        self._cache[key] = database
+        self._sizes[key] = database_size(database)
+        self._size += self._sizes[key]
+        database.on_resize = lambda delta: self._resized(key, delta)
+        self._evict()
+        return database
+
+    def cache_size(self):
+        """
+        Get the combined size of the cached databases.
+
+        Returns:
+            int: Size in bytes, including the profiles converted so far
+        """
+        return self._size
+
+    def clear(self):
+        """Drop every cached database."""
+        while self._cache:
+            self._drop(next(iter(self._cache)))
+
+    def _resized(self, key, delta):
+        """Account for a cached database that grew or shrank, evicting if it no longer fits."""
+        if key not in self._sizes:
+            return
+        self._sizes[key] += delta
+        self._size += delta
+        if delta > 0:
+            self._evict()
+
+    def _drop(self, key):
+        """Remove a database from the cache and stop tracking its size."""
+        database = self._cache.pop(key)
+        database.on_resize = None
+        self._size -= self._sizes.pop(key)
+
+    def _evict(self):
+        """Drop least recently used databases until the cache fits in the budget."""
+        while self._size > self.memory_budget and len(self._cache) > 1:
+            self._drop(next(iter(self._cache)))
+
+
+def database_size(database):
+    """
+    Get the memory footprint of a wind database's columns and SI profiles.
+
+    Args:
+        database (WindDatabase): Database to measure
+
+    Returns:
+        int: Size in bytes
+    """
+    return (database.days.nbytes + database.offsets.nbytes + database.levels.nbytes
+            + database.starts.nbytes + database.ends.nbytes + database.profiles_nbytes)
+
+
+_default_registry = None
+
+
+def get_default_registry():
+    """
+    Get the registry of the default data directory, creating it on first use.
+
+    Returns:
+        StationRegistry: Shared registry instance
+    """
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = StationRegistry()
+    return _default_registry
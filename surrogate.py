@@ -0,0 +1,376 @@
+"""
+Landing surrogate module.
+A regression model trained on stored OpenRocket runs that predicts the
+landing point and apogee of new wind profiles in milliseconds. Profiles
+outside the training domain are simulated instead, and their results are
+added to the training set.
+"""
+
+import hashlib
+import math
+import os
+
+import numpy as np
+
+import fidelity
+import orhelper_sim as orhs
+from result_cache import file_digest
+from simulation_stats import RunResult, covariance_ellipse
+
+SURROGATE_SUFFIX = ".surrogate.npz"
+DEFAULT_FEATURE_LEVELS = 7
+DOMAIN_MARGIN = 0.1
+
+
+def wind_features(wind_data, altitudes):
+    """
+    Reduce wind profiles to their east/north wind components at fixed altitudes.
+
+    Profiles are in the OpenRocket input format [altitude, speed, direction,
+    deviation]; the direction is where the wind blows from, clockwise from
+    north.
+
+    Args:
+        wind_data (list): Wind profiles
+        altitudes (np.ndarray): Feature altitudes, in the altitude unit of the profiles
+
+    Returns:
+        np.ndarray: Features of shape (profiles, 2 * altitudes), east components first
+    """
+    features = np.zeros((len(wind_data), 2 * len(altitudes)))
+    for k, data in enumerate(wind_data):
+        levels = np.asarray(data, dtype=np.float64)
+        if not len(levels):
+            continue
+        levels = levels[np.argsort(levels[:, 0])]
+        features[k, :len(altitudes)] = np.interp(altitudes, levels[:, 0], -levels[:, 1] * np.sin(levels[:, 2]))
+        features[k, len(altitudes):] = np.interp(altitudes, levels[:, 0], -levels[:, 1] * np.cos(levels[:, 2]))
+    return features
+
+
+def training_digest(ork_file, goal=orhs.DEFAULT_GOAL, fidelity_tier=fidelity.DEFAULT_TIER):
+    """
+    Identify the runs a surrogate can be trained on.
+
+    Args:
+        ork_file (str): Path to OpenRocket design file
+        goal (str): Goal of the runs, see orhelper_sim.goal_events
+        fidelity_tier (str): Fidelity tier of the runs, see fidelity.TIERS
+
+    Returns:
+        str: SHA-256 hex digest of the .ork file contents, goal and tier
+    """
+    digest = hashlib.sha256(file_digest(ork_file).encode())
+    digest.update(f"\0{goal}\0{fidelity_tier}".encode())
+    return digest.hexdigest()
+
+
+def polynomial_terms(z, degree):
+    """
+    Expand standardized features into polynomial regression terms.
+
+    Args:
+        z (np.ndarray): Standardized features, shape (samples, features)
+        degree (int): 1 for linear, 2 for linear plus pairwise products and squares
+
+    Returns:
+        np.ndarray: Design matrix with a leading constant column
+    """
+    columns = [np.ones((len(z), 1)), z]
+    if degree >= 2:
+        i, j = np.triu_indices(z.shape[1])
+        columns.append(z[:, i] * z[:, j])
+    return np.hstack(columns)
+
+
+class LandingSurrogate:
+    """
+    Ridge polynomial regression of landing x/y and apogee on wind features.
+
+    The training runs are kept with the model, so it can be refitted as new
+    runs come in. The training domain is the bounding box of the standardized
+    training features, widened by DOMAIN_MARGIN, intersected with the
+    Mahalanobis radius of the farthest training profile.
+
+    Attributes:
+        ork_digest (str): Digest of the .ork file, goal and fidelity tier the runs were simulated with
+        degree (int): Polynomial degree, 1 or 2
+        ridge (float): Ridge regularization weight
+        feature_altitudes (np.ndarray): Altitudes of the wind features, None until first trained
+        features (np.ndarray): Training features, shape (runs, 2 * altitudes)
+        targets (np.ndarray): Training landing x, y and apogee, shape (runs, 3)
+        coefficients (np.ndarray): Fitted coefficients, None until fitted
+        residual_covariance (np.ndarray): Covariance of the landing x/y fit residuals
+    """
+
+    def __init__(self, ork_digest=None, degree=2, ridge=1e-3):
+        """
+        Initialize an untrained surrogate.
+
+        Args:
+            ork_digest (str): Digest of the training runs, see training_digest
+            degree (int): Polynomial degree, 1 or 2
+            ridge (float): Ridge regularization weight
+        """
+        self.ork_digest = ork_digest
+        self.degree = degree
+        self.ridge = ridge
+        self.feature_altitudes = None
+        self.features = np.zeros((0, 0))
+        self.targets = np.zeros((0, 3))
+        self.coefficients = None
+        self.residual_covariance = np.zeros((2, 2))
+        self._mean = None
+        self._scale = None
+        self._low = None
+        self._high = None
+        self._precision = None
+        self._radius = None
+
+    @property
+    def trained(self):
+        """Whether the surrogate has been fitted."""
+        return self.coefficients is not None
+
+    def add(self, wind_data, results):
+        """
+        Add simulated runs to the training set. Call fit to update the model.
+
+        Args:
+            wind_data (list): Wind profiles of the runs
+            results (list): RunResult of each profile, in the same order
+        """
+        if not len(wind_data):
+            return
+        if self.feature_altitudes is None:
+            altitudes = np.unique(np.concatenate([np.asarray(data)[:, 0] for data in wind_data if len(data)]))
+            self.feature_altitudes = altitudes[:DEFAULT_FEATURE_LEVELS]
+        features = wind_features(wind_data, self.feature_altitudes)
+        targets = np.array([(r.x, r.y, r.apogee) for r in results], dtype=np.float64)
+        valid = np.isfinite(targets).all(axis=1)
+        if len(self.features):
+            self.features = np.vstack((self.features, features[valid]))
+            self.targets = np.vstack((self.targets, targets[valid]))
+        else:
+            self.features, self.targets = features[valid], targets[valid]
+
+    def fit(self):
+        """
+        Fit the regression and the training domain to the training set.
+
+        Raises:
+            ValueError: If there are fewer than two training runs
+        """
+        if len(self.features) < 2:
+            raise ValueError("The surrogate needs at least two training runs")
+        self._mean = self.features.mean(axis=0)
+        self._scale = np.where(self.features.std(axis=0) > 0, self.features.std(axis=0), 1.0)
+        z = (self.features - self._mean) / self._scale
+
+        design = polynomial_terms(z, self.degree)
+        regularization = self.ridge * len(z) * np.eye(design.shape[1])
+        regularization[0, 0] = 0.0
+        self.coefficients = np.linalg.solve(design.T @ design + regularization, design.T @ self.targets)
+        residuals = self.targets[:, :2] - design @ self.coefficients[:, :2]
+        self.residual_covariance = np.cov(residuals.T)
+
+        extent = z.max(axis=0) - z.min(axis=0)
+        self._low = z.min(axis=0) - DOMAIN_MARGIN * extent
+        self._high = z.max(axis=0) + DOMAIN_MARGIN * extent
+        self._precision = np.linalg.pinv(np.atleast_2d(np.cov(z.T)))
+        self._radius = (1 + DOMAIN_MARGIN) * np.sqrt(np.max(np.einsum('ij,jk,ik->i', z, self._precision, z)))
+
+    def predict(self, wind_data):
+        """
+        Predict the landing points and apogees of wind profiles.
+
+        Args:
+            wind_data (list): Wind profiles
+
+        Returns:
+            tuple: (predictions of shape (profiles, 3) as landing x, y and apogee,
+                boolean mask of the profiles inside the training domain)
+
+        Raises:
+            ValueError: If the surrogate has not been fitted
+        """
+        if not self.trained:
+            raise ValueError("The surrogate has not been fitted")
+        z = (wind_features(wind_data, self.feature_altitudes) - self._mean) / self._scale
+        predictions = polynomial_terms(z, self.degree) @ self.coefficients
+        inside = ((z >= self._low) & (z <= self._high)).all(axis=1)
+        inside &= np.sqrt(np.einsum('ij,jk,ik->i', z, self._precision, z)) <= self._radius
+        return predictions, inside
+
+    def ellipse(self, wind_data, confidence=0.99):
+        """
+        Predict the landing confidence ellipse of a set of wind profiles.
+
+        The covariance combines the spread of the predicted landing points with
+        the residual covariance of the fit, so a single profile still gets the
+        ellipse of the simulation noise around its prediction.
+
+        Args:
+            wind_data (list): Wind profiles
+            confidence (float): Probability mass inside the ellipse
+
+        Returns:
+            tuple: (center (x, y), semi_major, semi_minor, angle) in meters and radians
+        """
+        predictions, _ = self.predict(wind_data)
+        landing = predictions[:, :2]
+        covariance = self.residual_covariance.copy()
+        if len(landing) > 1:
+            covariance += np.cov(landing.T)
+        return (landing.mean(axis=0),) + covariance_ellipse(covariance, confidence)
+
+    def save(self, path):
+        """
+        Save the surrogate and its training runs.
+
+        Args:
+            path (str): Output .npz file
+        """
+        values = {"ork_digest": np.array(self.ork_digest or ""), "degree": np.array(self.degree),
+                  "ridge": np.array(self.ridge), "features": self.features, "targets": self.targets}
+        if self.feature_altitudes is not None:
+            values["feature_altitudes"] = self.feature_altitudes
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **values)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a surrogate saved by save, refitting it if it has enough training runs.
+
+        Args:
+            path (str): Surrogate .npz file
+
+        Returns:
+            LandingSurrogate: Loaded surrogate
+        """
+        with np.load(path) as entry:
+            surrogate = cls(str(entry["ork_digest"]) or None, int(entry["degree"]), float(entry["ridge"]))
+            surrogate.features = entry["features"]
+            surrogate.targets = entry["targets"]
+            if "feature_altitudes" in entry.files:
+                surrogate.feature_altitudes = entry["feature_altitudes"]
+        if len(surrogate.features) >= 2:
+            surrogate.fit()
+        return surrogate
+
+    @classmethod
+    def for_ork(cls, ork_file, goal=orhs.DEFAULT_GOAL, fidelity_tier=fidelity.DEFAULT_TIER):
+        """
+        Load the surrogate saved next to an .ork file.
+
+        A surrogate trained on a different version of the file, or on runs of
+        another goal or fidelity tier, is discarded.
+
+        Args:
+            ork_file (str): Path to OpenRocket design file
+            goal (str): Goal of the runs, see orhelper_sim.goal_events
+            fidelity_tier (str): Fidelity tier of the runs, see fidelity.TIERS
+
+        Returns:
+            LandingSurrogate: Saved surrogate, or an untrained one
+        """
+        digest = training_digest(ork_file, goal, fidelity_tier)
+        path = ork_file + SURROGATE_SUFFIX
+        if os.path.exists(path):
+            surrogate = cls.load(path)
+            if surrogate.ork_digest == digest:
+                return surrogate
+        return cls(digest)
+
+
+class SurrogateSimulation(orhs.OpenRocketSimulation):
+    """
+    Surrogate backend with the interface of OpenRocketSimulation.
+
+    Profiles inside the training domain of the .ork file's surrogate are
+    predicted; the others are simulated with OpenRocket, added to the
+    training set, and the refitted surrogate is saved next to the .ork file.
+
+    Attributes:
+        surrogate (LandingSurrogate): Surrogate of the rocket
+        min_training (int): Training runs required before predictions are trusted
+        predicted (int): Number of runs of the last campaign answered by the surrogate
+    """
+
+    def __init__(self, wind_data, ork_file, surrogate=None, min_training=50, **kwargs):
+        """
+        Initialize the surrogate backend.
+
+        Args:
+            wind_data (list): Formatted wind data for simulations
+            ork_file (str): Path to OpenRocket design file
+            surrogate (LandingSurrogate): Surrogate to use, loaded from next to ork_file if None
+            min_training (int): Training runs required before predictions are trusted
+            **kwargs: Other OpenRocketSimulation arguments
+        """
+        super().__init__(wind_data, ork_file, **kwargs)
+        if surrogate is None:
+            surrogate = LandingSurrogate.for_ork(ork_file, self.goal, self.fidelity_tier)
+        self.surrogate = surrogate
+        self.min_training = min_training
+        self.predicted = 0
+
+    def iter_runs(self, workers=1, parallel="processes", client=None, journal=None, resume=False):
+        """
+        Predict or simulate every wind profile and yield one record per run.
+
+        Out-of-domain profiles are simulated with the given parallelism and
+        daemon, and with this campaign's goal, fidelity tier, flight data,
+        listener profiling and trajectory store. Predicted runs have no flight
+        data. Journal and resume apply to OpenRocket campaigns only and are
+        refused.
+
+        Raises:
+            ValueError: If a journal is given
+
+        Yields:
+            RunResult: Result of each run, in wind_data order
+        """
+        if journal is not None or resume:
+            raise ValueError("Surrogate campaigns are not journaled and cannot be resumed")
+        n = len(self.wind_data)
+        predictions = np.zeros((n, 3))
+        inside = np.zeros(n, dtype=bool)
+        if self.surrogate.trained and len(self.surrogate.features) >= self.min_training and n:
+            predictions, inside = self.surrogate.predict(self.wind_data)
+
+        outside = np.flatnonzero(~inside)
+        simulated = {}
+        if len(outside):
+            fallback = orhs.OpenRocketSimulation([self.wind_data[i] for i in outside], self.ork_file,
+                                                 seeds=[self.run_seed(i) for i in outside], cache=self.cache,
+                                                 java_listeners=self.java_listeners,
+                                                 geodesy_method=self.geodesy_method,
+                                                 flight_data=self.flight_data, fidelity_tier=self.fidelity_tier,
+                                                 goal=self.goal, wind_seed=self.wind_seed)
+            fallback.listener_profiler = self.listener_profiler
+            for result in fallback.iter_runs(workers, parallel, client):
+                index = int(outside[result.index])
+                simulated[index] = result
+                if self.trajectory_store is not None:
+                    self.trajectory_store.append(index, fallback.flightdata)
+            if self.trajectory_store is not None:
+                self.trajectory_store.flush()
+            self.surrogate.add(fallback.wind_data, [simulated[int(i)] for i in outside])
+            if len(self.surrogate.features) >= 2:
+                self.surrogate.fit()
+            self.surrogate.save(self.ork_file + SURROGATE_SUFFIX)
+
+        self.predicted = n - len(outside)
+        print('Surrogate predicted %i runs, simulated %i' % (self.predicted, len(outside)))
+        for i in range(n):
+            if i in simulated:
+                result = simulated[i]._replace(index=i)
+            else:
+                x, y, apogee = predictions[i]
+                result = RunResult(i, math.hypot(x, y), math.atan2(y, x), float(apogee))
+            self.statistics.update(result)
+            yield result
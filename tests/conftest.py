@@ -0,0 +1,51 @@
+"""
+Shared fixtures of the test suite.
+The modules live at the repository root, next to this tests directory.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wind_database import WindDatabase  # noqa: E402
+
+
+def station_records(days=5, levels=4):
+    """
+    Build station records in the format of the *.upper_winds.json files.
+
+    Args:
+        days (int): Number of consecutive days from 2024-12-21
+        levels (int): Levels per period
+
+    Returns:
+        list: Records with AM, PM and NIGHT periods
+    """
+    records = []
+    for day in range(days):
+        date = "2024-12-%02i" % (21 + day)
+        record = {"datetime": date + "T11:00:00.000000"}
+        for p, (start, end) in enumerate((("08:00:00", "14:59:59"), ("15:00:00", "23:59:59"),
+                                          ("00:00:00", "12:00:00"))):
+            start_day = date if p < 2 else "2024-12-%02i" % (22 + day)
+            record[("AM", "PM", "NIGHT")[p]] = {
+                "data": [{"altitude": 3000 * (k + 1), "wind": 10 * day + k + p, "heading": 90 * p + 10 * k,
+                          "temperature": -5 * k} for k in range(levels)],
+                "startValidity": f"{start_day}T{start}",
+                "endValidity": f"{start_day}T{end}",
+            }
+        records.append(record)
+    return records
+
+
+@pytest.fixture
+def records():
+    return station_records()
+
+
+@pytest.fixture
+def database(records):
+    return WindDatabase.from_records(records, "AM")
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pytest
+
+import fidelity
+
+
+class _Options:
+    def __init__(self):
+        self.time_step, self.step_angle, self.max_time = 0.01, 0.1, 2000.0
+
+    def getTimeStep(self):
+        return self.time_step
+
+    def setTimeStep(self, value):
+        self.time_step = value
+
+    def getMaximumStepAngle(self):
+        return self.step_angle
+
+    def setMaximumStepAngle(self, value):
+        self.step_angle = value
+
+    def getMaxSimulationTime(self):
+        return self.max_time
+
+    def setMaxSimulationTime(self, value):
+        self.max_time = value
+
+
+class _Simulation:
+    def __init__(self):
+        self.options = _Options()
+
+    def getOptions(self):
+        return self.options
+
+
+def test_tier_is_applied_then_the_document_settings_restored():
+    sim = _Simulation()
+    with fidelity.applied_fidelity(sim, "screening"):
+        assert (sim.options.time_step, sim.options.max_time) == (0.1, 600.0)
+    assert (sim.options.time_step, sim.options.step_angle, sim.options.max_time) == (0.01, 0.1, 2000.0)
+
+
+def test_document_settings_are_restored_after_a_failed_run():
+    sim = _Simulation()
+    with pytest.raises(RuntimeError):
+        with fidelity.applied_fidelity(sim, "standard"):
+            assert sim.options.step_angle == pytest.approx(math.radians(5))
+            raise RuntimeError("simulation failed")
+    assert (sim.options.time_step, sim.options.step_angle) == (0.01, 0.1)
+
+
+def test_unknown_tier_is_rejected():
+    with pytest.raises(ValueError):
+        with fidelity.applied_fidelity(_Simulation(), "draft"):
+            pass
+
+
+def test_tails_cover_the_farthest_landings_and_extreme_apogees():
+    rng = np.random.default_rng(0)
+    x, y, apogee = rng.normal(0, 10, 100), rng.normal(0, 10, 100), rng.normal(1000, 20, 100)
+    x[17], apogee[42] = 500.0, 2000.0
+    tails = fidelity.tail_indices(x, y, apogee, fraction=0.05)
+    assert 17 in tails and 42 in tails and np.argmin(apogee) in tails
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pytest
+
+import geodesy
+
+
+def test_vincenty_matches_the_flinders_peak_reference():
+    # Flinders Peak to Buninyong, the worked example of Vincenty (1975)
+    lat0, lon0 = -(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600
+    lat1, lon1 = -(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600
+    distance, azimuth = geodesy.vincenty(lat0, lon0, lat1, lon1)
+    assert distance == pytest.approx(54972.271, abs=1e-3)
+    assert math.degrees(azimuth) % 360 == pytest.approx(306 + 52 / 60 + 5.37 / 3600, abs=1e-5)
+
+
+def test_one_degree_of_equator():
+    distance, _ = geodesy.haversine(0.0, 0.0, 0.0, 1.0)
+    assert distance == pytest.approx(geodesy.EARTH_RADIUS * math.pi / 180)
+    distance, _ = geodesy.vincenty(0.0, 0.0, 0.0, 1.0)
+    assert distance == pytest.approx(geodesy.WGS84_A * math.pi / 180)
+
+
+@pytest.mark.parametrize("method", geodesy.METHODS)
+def test_bearings_point_east_and_north(method):
+    _, east = geodesy.range_bearing(45.0, 5.0, 45.0, 5.01, method)
+    _, north = geodesy.range_bearing(45.0, 5.0, 45.01, 5.0, method)
+    assert east == pytest.approx(0.0, abs=1e-3)
+    assert north == pytest.approx(math.pi / 2, abs=1e-3)
+
+
+@pytest.mark.parametrize("method", ("flat", "haversine"))
+def test_short_ranges_agree_with_vincenty(method):
+    rng = np.random.default_rng(0)
+    lat1 = 45.0 + rng.uniform(-0.05, 0.05, 100)
+    lon1 = 5.0 + rng.uniform(-0.05, 0.05, 100)
+    expected, expected_bearing = geodesy.range_bearing(45.0, 5.0, lat1, lon1, "vincenty")
+    ranges, bearings = geodesy.range_bearing(45.0, 5.0, lat1, lon1, method)
+    assert np.allclose(ranges, expected, rtol=5e-3)
+    assert np.allclose(np.cos(bearings - expected_bearing), 1.0, atol=1e-4)
+
+
+def test_flat_offset_wraps_across_the_antimeridian():
+    east, north = geodesy.flat_offset(0.0, 179.999, 0.0, -179.999)
+    assert east == pytest.approx(2 * geodesy.WGS84_A * math.radians(0.001), rel=1e-6)
+    assert north == 0.0
+
+
+def test_unknown_method_is_rejected():
+    with pytest.raises(ValueError):
+        geodesy.range_bearing(0.0, 0.0, 1.0, 1.0, "rhumb")
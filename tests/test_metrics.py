@@ -0,0 +1,47 @@
+import pickle
+
+import pytest
+
+from metrics import Histogram, Metrics
+
+
+def test_disabled_registry_records_nothing():
+    registry = Metrics()
+    registry.count("runs")
+    with registry.span("run"):
+        pass
+    assert registry.snapshot() == {"counters": {}, "histograms": {}}
+
+
+def test_histogram_merge_matches_a_single_histogram():
+    values = [0.002, 0.03, 0.3, 4.0, 70.0]
+    merged, left, right = Histogram(), Histogram(), Histogram()
+    for value in values:
+        merged.observe(value)
+    for value in values[:2]:
+        left.observe(value)
+    for value in values[2:]:
+        right.observe(value)
+    left.merge(right)
+    assert left.snapshot() == merged.snapshot()
+    with pytest.raises(ValueError):
+        left.merge(Histogram(buckets=(1.0, float("inf"))))
+
+
+def test_worker_metrics_are_merged_into_the_main_registry():
+    main, worker = Metrics(enabled=True), Metrics(enabled=True)
+    main.count("runs_simulated", 2)
+    main.observe("run", 0.5)
+    for _ in range(3):
+        worker.count("runs_simulated")
+        worker.observe("run", 1.5)
+        worker.observe("jvm_start", 2.0)
+        # Drained values cross the process boundary pickled
+        main.merge(pickle.loads(pickle.dumps(worker.drain())))
+    assert worker.snapshot() == {"counters": {}, "histograms": {}}
+
+    snapshot = main.snapshot()
+    assert snapshot["counters"] == {"runs_simulated": 5}
+    assert snapshot["histograms"]["run"]["count"] == 4
+    assert snapshot["histograms"]["run"]["sum"] == pytest.approx(5.0)
+    assert snapshot["histograms"]["jvm_start"]["count"] == 3
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+
+import result_cache
+from result_cache import INDEX_FILE, ResultCache
+
+
+def _put(cache, key, samples=100):
+    cache.put(key, 1.0, 0.5, 100.0, {"TYPE_TIME": np.arange(samples, dtype=np.float64)})
+
+
+def _keys(cache):
+    return sorted(name[:-len(".npz")] for name in os.listdir(cache.directory) if name.endswith(".npz"))
+
+
+def test_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    _put(cache, "a")
+    range_, bearing, apogee, columns = cache.get("a")
+    assert (range_, bearing, apogee) == (1.0, 0.5, 100.0)
+    assert np.array_equal(columns["TYPE_TIME"], np.arange(100))
+    assert cache.get("missing") is None
+
+
+def test_lookups_without_flight_data_do_not_open_entries(tmp_path, monkeypatch):
+    cache = ResultCache(str(tmp_path))
+    _put(cache, "a")
+    opened = []
+    load = np.load
+    monkeypatch.setattr(result_cache.np, "load", lambda *args, **kwargs: opened.append(args) or load(*args, **kwargs))
+    assert cache.get("a", flightdata=False)[:3] == (1.0, 0.5, 100.0)
+    assert not opened
+    cache.get("a")
+    assert len(opened) == 1
+
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for key in "abc":
+        _put(cache, key)
+    entry_size = cache.size() // 3
+    cache.get("a", flightdata=False)
+    cache.max_size = 3 * entry_size
+    _put(cache, "d")
+    assert _keys(cache) == ["a", "c", "d"]
+    assert cache.size() == sum(os.path.getsize(os.path.join(str(tmp_path), key + ".npz")) for key in "acd")
+
+
+def test_recency_survives_reopening(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    for key in "abc":
+        _put(cache, key)
+    cache.get("a", flightdata=False)
+    entry_size = cache.size() // 3
+    cache.close()
+
+    cache = ResultCache(str(tmp_path), max_size=3 * entry_size)
+    _put(cache, "d")
+    assert _keys(cache) == ["a", "c", "d"]
+
+
+def test_entries_without_index_are_adopted(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    _put(cache, "a")
+    cache.close()
+    os.remove(os.path.join(str(tmp_path), INDEX_FILE))
+    with open(os.path.join(str(tmp_path), INDEX_FILE), 'w', encoding="utf-8") as f:
+        f.write('{"key": "a", "si')
+
+    cache = ResultCache(str(tmp_path))
+    assert cache.get("a", flightdata=False)[:3] == (1.0, 0.5, 100.0)
+    assert cache.size() == os.path.getsize(os.path.join(str(tmp_path), "a.npz"))
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from data_formater import WindDataFormatter
+from run_journal import RunJournal, campaign_digest, campaign_wind_seed
+from simulation_stats import RunResult
+
+FIRST = RunResult(0, 10.0, 0.5, 100.0, 45.0001, 5.0001, 45.0, 5.0)
+THIRD = RunResult(2, 20.0, 1.5, 200.0, 45.0002, 5.0, 45.0, 5.0)
+
+
+def _header(wind_data, wind_seed):
+    return {"ork_file": "rocket.ork", "runs": len(wind_data), "seed": None,
+            "wind_data": campaign_digest(wind_data), "wind_seed": wind_seed}
+
+
+def test_round_trip_drops_torn_record(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    header = {"runs": 3}
+    with RunJournal(path) as journal:
+        journal.start(header)
+        journal.append(FIRST)
+        journal.append(THIRD)
+    with open(path, 'a', encoding="utf-8") as f:
+        f.write('{"index": 1, "ran')
+
+    read_header, completed = RunJournal(path).read()
+    assert read_header == header
+    assert completed == {0: FIRST, 2: THIRD}
+
+
+def test_resume_refuses_a_different_campaign(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with RunJournal(path) as journal:
+        journal.start({"runs": 3})
+    with RunJournal(path) as journal:
+        try:
+            journal.start({"runs": 4}, resume=True)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Resuming a different campaign must fail")
+
+
+def test_resume_random_fill_campaign(tmp_path, database):
+    # Fewer days than runs: the formatter fills the campaign with random draws
+    gui_data = SimpleNamespace(wind_data_range=["2024-12-21", "2024-12-22", "2024-12-23"], num_simulations=7)
+    path = str(tmp_path / "journal.jsonl")
+
+    wind_seed = campaign_wind_seed(path)
+    wind_data = WindDataFormatter(gui_data, database=database, seed=wind_seed).format_data()
+    with RunJournal(path) as journal:
+        journal.start(_header(wind_data, wind_seed))
+        journal.append(RunResult(0, 10.0, 0.5, 100.0))
+        journal.append(RunResult(1, 11.0, 0.6, 110.0))
+
+    resumed_seed = campaign_wind_seed(path, resume=True)
+    assert resumed_seed == wind_seed
+    resumed_data = WindDataFormatter(gui_data, database=database, seed=resumed_seed).format_data()
+    with RunJournal(path) as journal:
+        completed = journal.start(_header(resumed_data, resumed_seed), resume=True)
+    assert sorted(completed) == [0, 1]
+
+
+def test_explicit_seed_wins(tmp_path):
+    assert campaign_wind_seed(str(tmp_path / "missing.jsonl"), resume=True, seed=42) == 42
@@ -0,0 +1,44 @@
+import numpy as np
+
+from samplers import AntitheticSampler, LatinHypercubeSampler, SobolSampler, SEASONS
+
+
+def test_latin_hypercube_puts_one_point_in_every_stratum():
+    sampler = LatinHypercubeSampler(seed=1, by_season=False)
+    points = sampler.uniforms(50, np.arange(50).astype("datetime64[D]"))
+    assert sorted((points[:, 0] * 50).astype(int).tolist()) == list(range(50))
+
+
+def test_latin_hypercube_allocates_runs_to_seasons_by_share():
+    # 60 winter days followed by 30 spring days
+    days = np.arange(np.datetime64("2024-12-01"), np.datetime64("2025-03-01"))[:60]
+    days = np.concatenate((days, np.arange(np.datetime64("2025-03-01"), np.datetime64("2025-03-31"))))
+    points = LatinHypercubeSampler(seed=2).uniforms(30, days)
+    chosen = days[(points[:, 0] * len(days)).astype(int)]
+    seasons = [SEASONS[int(m) % 12 + 1] for m in chosen.astype("datetime64[M]").astype(np.int64)]
+    assert seasons.count("DJF") == 20 and seasons.count("MAM") == 10
+    assert len(set(chosen.tolist())) == 30
+
+
+def test_samplers_keep_measured_speeds_by_default(database):
+    for Sampler in (SobolSampler, AntitheticSampler):
+        sampler = Sampler(seed=3)
+        assert sampler.dimensions == 1
+        profiles, seeds = sampler.draw(database, "2024-12-21", "2024-12-25", 8)
+        assert len(profiles) == len(seeds) == 8
+        assert all(any(profile is database.profile(i) for i in range(len(database))) for profile in profiles)
+
+
+def test_antithetic_pairs_mirror_their_draws_and_share_a_seed():
+    sampler = AntitheticSampler(seed=4, scale_spread=0.2)
+    points = sampler.uniforms(7, None)
+    assert np.allclose(points[0::2][:3] + points[1::2], 1.0)
+    seeds = sampler.seeds(7)
+    assert seeds[0::2][:3] == seeds[1::2]
+
+
+def test_sobol_points_fill_the_strata():
+    points = SobolSampler(seed=5, scale_spread=0.2).uniforms(16, None)
+    assert points.shape == (16, 2)
+    for d in range(2):
+        assert sorted((points[:, d] * 16).astype(int).tolist()) == list(range(16))
@@ -0,0 +1,78 @@
+import math
+
+import numpy as np
+import pytest
+
+from simulation_stats import ConvergenceMonitor, LandingStatistics, RunResult
+
+
+def _sample():
+    rng = np.random.default_rng(7)
+    x = 300.0 + rng.normal(0.0, 40.0, 200)
+    y = -150.0 + 0.5 * x + rng.normal(0.0, 25.0, 200)
+    apogee = 1500.0 + rng.normal(0.0, 30.0, 200)
+    return x, y, apogee
+
+
+def _results(x, y, apogee):
+    return [RunResult(i, math.hypot(x[i], y[i]), math.atan2(y[i], x[i]), apogee[i]) for i in range(len(x))]
+
+
+def _accumulate(results):
+    statistics = LandingStatistics()
+    for result in results:
+        statistics.update(result)
+    return statistics
+
+
+def test_welford_matches_numpy():
+    x, y, apogee = _sample()
+    statistics = _accumulate(_results(x, y, apogee))
+    assert statistics.count == statistics.landed == len(x)
+    assert np.allclose(statistics.mean, [np.mean(x), np.mean(y)])
+    assert np.allclose(statistics.covariance, np.cov(x, y))
+    assert statistics.apogee_mean == pytest.approx(np.mean(apogee))
+    assert statistics.apogee_std == pytest.approx(np.std(apogee, ddof=1))
+    assert statistics.apogee_min == np.min(apogee) and statistics.apogee_max == np.max(apogee)
+
+
+def test_merge_matches_a_single_pass():
+    x, y, apogee = _sample()
+    results = _results(x, y, apogee)
+    merged = _accumulate(results[:70])
+    merged.merge(_accumulate(results[70:]))
+    assert merged.count == len(x)
+    assert np.allclose(merged.mean, [np.mean(x), np.mean(y)])
+    assert np.allclose(merged.covariance, np.cov(x, y))
+    assert merged.apogee_std == pytest.approx(np.std(apogee, ddof=1))
+
+
+def test_runs_without_a_landing_point_are_counted_apart():
+    x, y, apogee = _sample()
+    results = _results(x, y, apogee)
+    results.insert(10, RunResult(200, math.nan, math.nan, 1400.0))
+    results.insert(50, RunResult(201, math.inf, 0.3, math.nan))
+    statistics = _accumulate(results)
+    assert statistics.count == len(x) + 2
+    assert statistics.landed == len(x) and statistics.unlanded == 2
+    assert np.allclose(statistics.mean, [np.mean(x), np.mean(y)])
+    assert np.allclose(statistics.covariance, np.cov(x, y))
+    assert statistics.apogee_mean == pytest.approx(np.mean(np.append(apogee, 1400.0)))
+    assert all(math.isfinite(value) for value in statistics.ellipse())
+
+
+def test_empty_statistics_are_nan():
+    statistics = _accumulate([RunResult(0, math.nan, math.nan, math.nan)])
+    assert np.all(np.isnan(statistics.mean))
+    assert math.isnan(statistics.apogee_mean)
+
+
+def test_capped_campaigns_can_converge():
+    x, y, apogee = _sample()
+    monitor = ConvergenceMonitor(tolerance=0.5, max_runs=40)
+    assert monitor.window == 20 and monitor.min_runs == 40
+    statistics = LandingStatistics()
+    for result in _results(x, y, apogee)[:40]:
+        statistics.update(result)
+        monitor.update(statistics)
+    assert monitor.converged
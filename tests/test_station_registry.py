@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+from conftest import station_records
+from station_registry import STATION_FILE_SUFFIX, StationRegistry, database_size
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for code in ("AAAA", "BBBB", "CCCC"):
+        with open(tmp_path / (code + STATION_FILE_SUFFIX), "w") as f:
+            json.dump(station_records(), f)
+    return str(tmp_path)
+
+
+def test_discovers_stations(data_dir):
+    registry = StationRegistry(data_dir)
+    assert registry.codes() == ["AAAA", "BBBB", "CCCC"]
+    with pytest.raises(KeyError):
+        registry.get("DDDD")
+
+
+def test_running_size_follows_converted_profiles(data_dir):
+    registry = StationRegistry(data_dir)
+    database = registry.get("AAAA")
+    assert registry.cache_size() == database_size(database)
+    database.profile(0)
+    database.profile(1)
+    assert database.profiles_nbytes > 0
+    assert registry.cache_size() == database_size(database)
+    database.set_altitude_grid([0.0, 1000.0])
+    assert registry.cache_size() == database_size(database)
+
+
+def test_growth_evicts_least_recently_used(data_dir):
+    registry = StationRegistry(data_dir)
+    first = registry.get("AAAA")
+    second = registry.get("BBBB")
+    registry.memory_budget = registry.cache_size()
+    second.profile(0)
+    assert list(registry._cache) == [("BBBB", "AM")]
+    assert registry.cache_size() == database_size(second)
+    # An evicted database no longer reports to the registry
+    first.profile(0)
+    assert registry.cache_size() == database_size(second)
+
+
+def test_most_recently_used_is_kept_over_budget(data_dir):
+    registry = StationRegistry(data_dir, memory_budget=0)
+    registry.get("AAAA")
+    database = registry.get("BBBB")
+    assert list(registry._cache) == [("BBBB", "AM")]
+    database.profile(0)
+    assert registry.get("BBBB") is database
+    registry.clear()
+    assert registry.cache_size() == 0
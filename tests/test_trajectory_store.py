@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+
+from trajectory_store import TrajectoryStore
+
+
+def _flight(samples, start=0.0):
+    return {"TYPE_TIME": start + np.arange(samples, dtype=np.float64),
+            "TYPE_ALTITUDE": np.linspace(0.0, 100.0, samples)}
+
+
+def _sizes(directory):
+    return {name: os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory)
+            if name.endswith(".bin")}
+
+
+def test_round_trip(tmp_path):
+    with TrajectoryStore(str(tmp_path)) as store:
+        store.append(3, _flight(5))
+        store.append(7, _flight(2, start=10.0))
+    store = TrajectoryStore(str(tmp_path))
+    assert len(store) == 2
+    assert list(store.run_indices) == [3, 7]
+    assert store.columns == {"TYPE_TIME": "float64", "TYPE_ALTITUDE": "float32"}
+    assert np.array_equal(store.run(7)["TYPE_TIME"], [10.0, 11.0])
+    assert [index for index, _ in store.runs()] == [3, 7]
+
+
+def test_missing_columns_are_nan(tmp_path):
+    with TrajectoryStore(str(tmp_path), columns=("TYPE_TIME", "TYPE_ALTITUDE")) as store:
+        store.append(0, {"TYPE_TIME": np.arange(3.0)})
+    assert np.isnan(TrajectoryStore(str(tmp_path)).run(0)["TYPE_ALTITUDE"]).all()
+
+
+def test_samples_without_offsets_are_truncated(tmp_path):
+    directory = str(tmp_path)
+    with TrajectoryStore(directory) as store:
+        store.append(0, _flight(4))
+    complete = _sizes(directory)
+
+    # A writer interrupted after the samples and run indices, before the offsets
+    for name, values in (("TYPE_TIME", np.arange(6, dtype=np.float64)),
+                         ("TYPE_ALTITUDE", np.zeros(6, dtype=np.float32)),
+                         ("runs", np.array([1], dtype=np.int64))):
+        with open(os.path.join(directory, name + ".bin"), "ab") as f:
+            f.write(values.tobytes())
+
+    store = TrajectoryStore(directory)
+    assert _sizes(directory) == complete
+    assert len(store) == 1
+    store.append(1, _flight(2, start=50.0))
+    store.flush()
+    assert list(store.run_indices) == [0, 1]
+    assert np.array_equal(store.run(1)["TYPE_TIME"], [50.0, 51.0])
+    assert np.array_equal(store.run(0)["TYPE_TIME"], np.arange(4.0))
+
+
+def test_partial_offset_is_truncated(tmp_path):
+    directory = str(tmp_path)
+    with TrajectoryStore(directory) as store:
+        store.append(0, _flight(4))
+        store.append(1, _flight(3))
+    offsets = os.path.join(directory, "offsets.bin")
+    os.truncate(offsets, os.path.getsize(offsets) - 3)
+
+    store = TrajectoryStore(directory)
+    assert len(store) == 1
+    assert os.path.getsize(offsets) == 8
+    assert len(store.column("TYPE_TIME")) == 4
+    assert os.path.getsize(os.path.join(directory, "TYPE_ALTITUDE.bin")) == 4 * 4
+
+
+def test_buffered_runs_are_invisible_until_flushed(tmp_path):
+    store = TrajectoryStore(str(tmp_path), chunk_rows=10)
+    store.append(0, _flight(4))
+    assert len(TrajectoryStore(str(tmp_path))) == 0
+    store.append(1, _flight(6))
+    assert len(TrajectoryStore(str(tmp_path))) == 2
@@ -0,0 +1,79 @@
+import json
+import math
+
+import numpy as np
+
+from wind_database import (FEET_TO_METERS, KNOTS_TO_METERS_PER_SECOND, WindDatabase, blend_profiles,
+                           resample_profile, si_profile)
+
+
+def test_day_slice_bisects_the_date_range(database):
+    assert database.day_slice("2024-12-22", "2024-12-24") == (1, 4)
+    assert database.day_slice("2024-12-23") == (2, 3)
+    assert database.day_slice("2025-01-01", "2025-01-31") == (5, 5)
+    assert len(database.profiles_between("2024-12-21", "2024-12-25")) == 5
+
+
+def test_unsorted_records_are_sorted_with_their_validity(records):
+    shuffled = WindDatabase.from_records(records[::-1])
+    ordered = WindDatabase.from_records(records)
+    assert np.array_equal(shuffled.days, ordered.days)
+    assert np.array_equal(shuffled.levels, ordered.levels)
+    assert shuffled.starts.dtype == np.dtype("datetime64[s]")
+    assert np.array_equal(shuffled.starts, ordered.starts)
+
+
+def test_profiles_are_converted_lazily_and_shared(database):
+    profile = database.profile(2)
+    assert database.profiles_nbytes == profile.nbytes
+    assert database.profile(2) is profile
+    assert not profile.flags.writeable
+
+    levels = database.levels[database.offsets[2]:database.offsets[3]]
+    assert np.allclose(profile[:, 0], levels[:, 0] * FEET_TO_METERS)
+    assert np.allclose(profile[:, 1], levels[:, 1] * KNOTS_TO_METERS_PER_SECOND)
+    assert np.allclose(profile[:, 2], np.radians(levels[:, 2]))
+
+
+def test_altitude_grid_resamples_requested_profiles(database):
+    grid = np.arange(0.0, database.max_altitude + 500.0, 500.0)
+    database.set_altitude_grid(grid)
+    profile = database.profile(0)
+    assert np.array_equal(profile[:, 0], grid)
+    assert database.profiles_nbytes == profile.nbytes
+
+
+def test_max_altitude_ignores_missing_levels(records):
+    records[0]["AM"]["data"].append({"altitude": None, "wind": None, "heading": None, "temperature": None})
+    database = WindDatabase.from_records(records)
+    assert math.isfinite(database.max_altitude)
+    assert database.max_altitude == 12000 * FEET_TO_METERS
+
+
+def test_resample_interpolates_components_across_north():
+    profile = si_profile([[0, 10, 350, 0], [1000, 10, 10, 0]])
+    resampled = resample_profile(profile, np.array([500 * FEET_TO_METERS]))
+    assert np.isclose(resampled[0, 1], 10 * KNOTS_TO_METERS_PER_SECOND * math.cos(math.radians(10)))
+    assert np.isclose(math.cos(resampled[0, 2]), 1.0)
+
+
+def test_resample_holds_the_nearest_level_outside_the_profile():
+    profile = si_profile([[1000, 10, 90, 0], [2000, 20, 90, 0]])
+    resampled = resample_profile(profile, np.array([0.0, 10000.0]))
+    assert np.allclose(resampled[:, 1], [10 * KNOTS_TO_METERS_PER_SECOND, 20 * KNOTS_TO_METERS_PER_SECOND])
+
+
+def test_blending_opposite_winds_cancels_out():
+    east = si_profile([[0, 10, 90, 0], [1000, 10, 90, 0]])
+    west = si_profile([[0, 10, 270, 0], [1000, 10, 270, 0]])
+    assert np.allclose(blend_profiles([east, west], [1, 1])[:, 1], 0.0)
+
+
+def test_station_file_round_trip(tmp_path, records):
+    path = tmp_path / "TEST.upper_winds.json"
+    path.write_text(json.dumps(records), encoding="utf-8")
+    for period in ("AM", "PM", "NIGHT"):
+        parsed = WindDatabase.from_json(str(path), period)
+        expected = WindDatabase.from_records(records, period)
+        assert np.array_equal(parsed.levels, expected.levels)
+        assert np.array_equal(parsed.ends, expected.ends)
@@ -0,0 +1,279 @@
+"""
+Trajectory store module.
+Keeps the full flight data time series of every run of a campaign on disk in
+an append-only columnar layout, so that campaigns of any size can record
+their trajectories and query them back through memory maps.
+"""
+
+import json
+import os
+
+import numpy as np
+
+DEFAULT_CHUNK_ROWS = 1 << 16
+DEFAULT_DTYPE = "float32"
+# Columns that need double precision whatever the default dtype
+DOUBLE_COLUMNS = ("TYPE_TIME", "TYPE_LATITUDE", "TYPE_LONGITUDE")
+
+
+def _column_name(column):
+    """Name of a FlightDataType or column name."""
+    return getattr(column, "name", column)
+
+
+class TrajectoryStore:
+    """
+    Chunked, append-only columnar store of run time series.
+
+    The directory holds one raw binary file per column with the samples of
+    every run concatenated, runs.bin with the index of each stored run and
+    offsets.bin with the end row of each run. Appended runs are buffered and
+    written in chunks; offsets are written last, so a run only becomes visible
+    to readers once all its samples are on disk, and an interrupted writer
+    leaves a readable store.
+
+    Attributes:
+        directory (str): Store directory
+        columns (dict): Column name to numpy dtype
+        chunk_rows (int): Buffered samples that trigger a write
+    """
+
+    def __init__(self, directory, columns=None, dtype=DEFAULT_DTYPE, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """
+        Open a store, creating it if needed.
+
+        Args:
+            directory (str): Store directory
+            columns (iterable): FlightDataType or names of the columns of a new store,
+                taken from the first appended run if None. Ignored for an existing store.
+            dtype (str): Numpy dtype of the columns of a new store, see also DOUBLE_COLUMNS
+            chunk_rows (int): Buffered samples that trigger a write
+        """
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self._dtype = dtype
+        self._buffer = []
+        self._buffered_rows = 0
+        self._positions = None
+        os.makedirs(directory, exist_ok=True)
+
+        meta_file = os.path.join(directory, "meta.json")
+        self.columns = None
+        if os.path.exists(meta_file):
+            with open(meta_file, 'r', encoding="utf-8") as f:
+                self.columns = json.load(f)["columns"]
+            self._truncate_torn_write()
+        elif columns is not None:
+            self._create([_column_name(c) for c in columns])
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".bin")
+
+    def _create(self, names):
+        """Write the metadata of a new store."""
+        self.columns = {name: "float64" if name in DOUBLE_COLUMNS else self._dtype for name in names}
+        with open(os.path.join(self.directory, "meta.json"), 'w', encoding="utf-8") as f:
+            json.dump({"columns": self.columns}, f)
+
+    def _truncate_torn_write(self):
+        """Drop samples written after the last complete run."""
+        rows = int(self._offsets()[-1]) if len(self) else 0
+        for name, dtype in self.columns.items():
+            path = self._path(name)
+            size = rows * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+        runs = len(self)
+        for name in ("runs", "offsets"):
+            path = self._path(name)
+            if os.path.exists(path) and os.path.getsize(path) > runs * 8:
+                os.truncate(path, runs * 8)
+
+    # ----- Writing -----
+
+    def append(self, index, flightdata):
+        """
+        Add the time series of one run.
+
+        Columns missing from flightdata are stored as NaN; extra ones are ignored.
+
+        Args:
+            index (int): Index of the run in its campaign
+            flightdata (dict): FlightDataType or name to array of samples
+        """
+        flightdata = {_column_name(k): v for k, v in flightdata.items()}
+        if self.columns is None:
+            self._create(list(flightdata))
+        rows = max((len(values) for values in flightdata.values()), default=0)
+        run = {}
+        for name, dtype in self.columns.items():
+            values = flightdata.get(name)
+            column = np.full(rows, np.nan, dtype=dtype)
+            if values is not None:
+                column[:len(values)] = values
+            run[name] = column
+        self._buffer.append((int(index), rows, run))
+        self._buffered_rows += rows
+        if self._buffered_rows >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered runs."""
+        if not self._buffer:
+            return
+        end = int(self._offsets()[-1]) if len(self) else 0
+        for name in self.columns:
+            with open(self._path(name), "ab") as f:
+                for _, _, run in self._buffer:
+                    f.write(run[name].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+        indices = np.array([index for index, _, _ in self._buffer], dtype=np.int64)
+        offsets = end + np.cumsum([rows for _, rows, _ in self._buffer], dtype=np.int64)
+        with open(self._path("runs"), "ab") as f:
+            f.write(indices.tobytes())
+        with open(self._path("offsets"), "ab") as f:
+            f.write(offsets.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        self._buffer = []
+        self._buffered_rows = 0
+        self._positions = None
+
+    def close(self):
+        """Write the buffered runs."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, ex, value, tb):
+        self.close()
+
+    # ----- Reading -----
+
+    def _map(self, name, dtype, count=None):
+        """Memory-map count items of a file, empty if it does not exist yet."""
+        path = self._path(name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        available = size // np.dtype(dtype).itemsize
+        count = available if count is None else min(count, available)
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(count,))
+
+    def _offsets(self):
+        """Start row of every stored run plus the end row, as an array of length len(self) + 1."""
+        ends = self._map("offsets", np.int64)
+        return np.concatenate(([0], ends)).astype(np.int64)
+
+    def __len__(self):
+        path = self._path("offsets")
+        return os.path.getsize(path) // 8 if os.path.exists(path) else 0
+
+    @property
+    def run_indices(self):
+        """Campaign index of every stored run, in storage order."""
+        return self._map("runs", np.int64, len(self))
+
+    def column(self, column):
+        """
+        Get the samples of every stored run of a column.
+
+        Args:
+            column: FlightDataType or column name
+
+        Returns:
+            np.memmap: Concatenated samples, read-only
+        """
+        name = _column_name(column)
+        return self._map(name, self.columns[name], int(self._offsets()[-1]))
+
+    def _position(self, index):
+        """Storage position of a run index (the latest one if a run was stored twice)."""
+        if self._positions is None:
+            self._positions = {int(run): position for position, run in enumerate(self.run_indices)}
+        return self._positions[int(index)]
+
+    def run(self, index, columns=None):
+        """
+        Get the time series of one run.
+
+        Args:
+            index (int): Campaign index of the run
+            columns (iterable): FlightDataType or names to read, all of them if None
+
+        Returns:
+            dict: Column name to read-only array of the run's samples
+
+        Raises:
+            KeyError: If the run is not stored
+        """
+        position = self._position(index)
+        offsets = self._offsets()
+        start, stop = offsets[position], offsets[position + 1]
+        names = self.columns if columns is None else [_column_name(c) for c in columns]
+        return {name: self.column(name)[start:stop] for name in names}
+
+    def runs(self, indices=None, columns=None):
+        """
+        Iterate over the time series of several runs.
+
+        Args:
+            indices (iterable): Campaign indices of the runs, every stored run if None
+            columns (iterable): FlightDataType or names to read, all of them if None
+
+        Yields:
+            tuple: (run index, dict of column name to read-only array)
+        """
+        offsets = self._offsets()
+        names = list(self.columns) if columns is None else [_column_name(c) for c in columns]
+        data = {name: self.column(name) for name in names}
+        positions = range(len(self)) if indices is None else [self._position(i) for i in indices]
+        run_indices = self.run_indices
+        for position in positions:
+            start, stop = offsets[position], offsets[position + 1]
+            yield int(run_indices[position]), {name: data[name][start:stop] for name in names}
+
+    def envelope(self, column, grid, along="TYPE_TIME", indices=None):
+        """
+        Get the band spanned by a column across runs, on a common grid.
+
+        Every run is interpolated onto the grid of its `along` column (e.g.
+        time) one at a time, so memory stays proportional to the grid. Grid
+        points outside a run's span are left out of that run's contribution.
+
+        Args:
+            column: FlightDataType or name of the enveloped column, e.g. altitude
+            grid (np.ndarray): Increasing values of the along column
+            along: FlightDataType or name of the abscissa column
+            indices (iterable): Campaign indices of the runs, every stored run if None
+
+        Returns:
+            dict: "grid", and per grid point "min", "max", "mean" and "count" of the runs covering it
+        """
+        grid = np.asarray(grid, dtype=np.float64)
+        low = np.full(len(grid), np.inf)
+        high = np.full(len(grid), -np.inf)
+        total = np.zeros(len(grid))
+        count = np.zeros(len(grid), dtype=np.int64)
+        for _, run in self.runs(indices, (along, column)):
+            x, y = run[_column_name(along)], run[_column_name(column)]
+            valid = np.isfinite(x) & np.isfinite(y)
+            if np.count_nonzero(valid) < 2:
+                continue
+            x, y = x[valid], y[valid]
+            values = np.interp(grid, x, y, left=np.nan, right=np.nan)
+            covered = np.isfinite(values)
+            low[covered] = np.minimum(low[covered], values[covered])
+            high[covered] = np.maximum(high[covered], values[covered])
+            total[covered] += values[covered]
+            count[covered] += 1
+
+        empty = count == 0
+        low[empty] = high[empty] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(empty, np.nan, total / count)
+        return {"grid": grid, "min": low, "max": high, "mean": mean, "count": count}
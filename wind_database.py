@@ -0,0 +1,496 @@
+"""
+Indexed wind database module.
+Parses an upper-winds station file once and keeps its profiles in a columnar,
+date-sorted layout so that date-range queries and random draws only touch the
+profiles they return.
+"""
+
+import json
+import math
+import os
+from array import array
+from datetime import date, datetime
+
+import numpy as np
+
+from wind_stream import iter_station_records
+
+DEFAULT_WIND_FILE = "data/CYYU.upper_winds.json"
+
+# Compiled caches live next to the station files, one directory per file and period
+CACHE_DIR_NAME = ".cache"
+CACHE_VERSION = 2
+CACHE_COLUMNS = ("days", "offsets", "levels", "starts", "ends")
+
+# Column order of WindDatabase.levels
+LEVEL_FIELDS = ("altitude", "wind", "heading", "temperature")
+
+# Station files give altitudes in feet, wind speeds in knots and headings in degrees
+FEET_TO_METERS = 0.3048
+KNOTS_TO_METERS_PER_SECOND = 1852 / 3600
+
+
+class WindDatabase:
+    """
+    Date-indexed wind profiles of a single station and forecast period.
+
+    Every profile is stored as a contiguous block of rows in ``levels``.
+    Profile ``i`` spans ``levels[offsets[i]:offsets[i + 1]]`` and is valid
+    for the day ``days[i]``. ``days`` is sorted, so any date range maps to a
+    contiguous block of profiles found by bisection. The forecast itself is
+    valid from ``starts[i]`` to ``ends[i]``, see wind_timeline for queries by
+    launch time.
+
+    Attributes:
+        days (np.ndarray): Day of each profile (datetime64[D]), sorted
+        offsets (np.ndarray): Start row of each profile in levels, plus the end row
+        levels (np.ndarray): Level rows [altitude, wind, heading, temperature], in station file units
+        period (str): Forecast period the profiles were taken from (AM, PM or NIGHT)
+        altitude_grid (np.ndarray): Common altitudes in meters the profiles are resampled onto,
+            None to keep the station levels
+        starts (np.ndarray): Start of the validity of each profile (datetime64[s]), NaT if unknown
+        ends (np.ndarray): End of the validity of each profile (datetime64[s]), NaT if unknown
+        on_resize (callable): Called with the change in bytes whenever the SI profiles grow or
+            are dropped, None if nobody tracks the size
+    """
+
+    def __init__(self, days, offsets, levels, period="AM", altitude_grid=None, starts=None, ends=None):
+        """
+        Initialize the database from already sorted columns.
+
+        Args:
+            days (np.ndarray): Day of each profile (datetime64[D]), sorted
+            offsets (np.ndarray): Row offsets of each profile, length len(days) + 1
+            levels (np.ndarray): Level rows, shape (offsets[-1], 4)
+            period (str): Forecast period of the profiles
+            altitude_grid (np.ndarray): Common altitudes in meters, None to keep the station levels
+            starts (np.ndarray): Start of the validity of each profile (datetime64[s]), unknown if None
+            ends (np.ndarray): End of the validity of each profile (datetime64[s]), unknown if None
+        """
+        self.days = days
+        self.starts = np.full(len(days), "NaT", dtype="datetime64[s]") if starts is None else starts
+        self.ends = np.full(len(days), "NaT", dtype="datetime64[s]") if ends is None else ends
+        if self.starts.dtype.kind != "M" or self.ends.dtype.kind != "M":
+            raise ValueError("Validity starts and ends must be datetime64 arrays")
+        self.offsets = offsets
+        self.levels = levels
+        self.period = period
+        self.altitude_grid = None if altitude_grid is None else np.asarray(altitude_grid, dtype=np.float64)
+        self._profiles = dict()
+        self._profiles_nbytes = 0
+        self.on_resize = None
+
+    @classmethod
+    def from_records(cls, records, period="AM"):
+        """
+        Build a database from parsed station records.
+
+        Args:
+            records (iterable): Station entries as found in *.upper_winds.json
+            period (str): Forecast period to index (AM, PM or NIGHT)
+
+        Returns:
+            WindDatabase: Indexed database of the requested period
+        """
+        days = []
+        starts = []
+        ends = []
+        counts = []
+        rows = array("d")
+        for entry in records:
+            datetime_str = entry.get("datetime", "")[:10]
+            if not datetime_str or period not in entry or "data" not in entry[period]:
+                continue
+            data = entry[period]["data"]
+            days.append(datetime_str)
+            starts.append(_to_instant(entry[period].get("startValidity")))
+            ends.append(_to_instant(entry[period].get("endValidity")))
+            counts.append(len(data))
+            for level in data:
+                rows.extend(math.nan if level.get(field) is None else level[field] for field in LEVEL_FIELDS)
+
+        days = np.array(days, dtype="datetime64[D]")
+        starts = np.array(starts, dtype="datetime64[s]")
+        ends = np.array(ends, dtype="datetime64[s]")
+        counts = np.array(counts, dtype=np.int64)
+        levels = np.frombuffer(rows, dtype=np.float64).reshape(-1, len(LEVEL_FIELDS)).copy()
+
+        # Stable sort keeps entries of the same day in file order
+        order = np.argsort(days, kind="stable")
+        offsets = np.zeros(len(days) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        if np.any(order != np.arange(len(order))):
+            row_starts = offsets[:-1][order]
+            counts = counts[order]
+            levels = np.concatenate([levels[s:s + c] for s, c in zip(row_starts, counts)]) \
+                if len(order) else levels
+            days = days[order]
+            starts = starts[order]
+            ends = ends[order]
+            offsets[1:] = np.cumsum(counts)
+
+        return cls(days, offsets, levels, period, starts=starts, ends=ends)
+
+    @classmethod
+    def from_json(cls, path=DEFAULT_WIND_FILE, period="AM"):
+        """
+        Parse a station file and index the requested period.
+
+        The file is streamed one record at a time and only the requested
+        period's level fields are kept, so the whole archive is never held in
+        memory.
+
+        Args:
+            path (str): Path to a *.upper_winds.json station file, or its NDJSON variant
+            period (str): Forecast period to index (AM, PM or NIGHT)
+
+        Returns:
+            WindDatabase: Indexed database of the requested period
+        """
+        return cls.from_records(iter_station_records(path, (period,), LEVEL_FIELDS), period)
+
+    @classmethod
+    def open(cls, path=DEFAULT_WIND_FILE, period="AM", cache_dir=None):
+        """
+        Open a station file through its compiled columnar cache.
+
+        The cache is (re)compiled when missing or when the station file changed
+        since it was built. Columns are memory-mapped read-only, so opening a
+        large archive does not copy it into memory.
+
+        Args:
+            path (str): Path to a *.upper_winds.json station file
+            period (str): Forecast period to index (AM, PM or NIGHT)
+            cache_dir (str): Cache root, defaults to a .cache directory next to the station file
+
+        Returns:
+            WindDatabase: Memory-mapped database of the requested period
+        """
+        target = cache_path(path, period, cache_dir)
+        if not cache_is_fresh(path, target):
+            compile_cache(path, period, cache_dir)
+        columns = {name: np.load(os.path.join(target, name + ".npy"), mmap_mode='r')
+                   for name in CACHE_COLUMNS}
+        return cls(columns["days"], columns["offsets"], columns["levels"], period,
+                   starts=columns["starts"], ends=columns["ends"])
+
+    def save(self, target, source_stat=None):
+        """
+        Write the database columns as .npy files in a cache directory.
+
+        The meta.json file is written last and marks the cache as complete.
+
+        Args:
+            target (str): Cache directory
+            source_stat (os.stat_result): Stat of the station file the cache was built from
+        """
+        os.makedirs(target, exist_ok=True)
+        meta_file = os.path.join(target, "meta.json")
+        if os.path.exists(meta_file):
+            os.remove(meta_file)
+
+        for name in CACHE_COLUMNS:
+            tmp_file = os.path.join(target, name + ".npy.tmp")
+            with open(tmp_file, "wb") as f:
+                np.save(f, np.ascontiguousarray(getattr(self, name)))
+            os.replace(tmp_file, os.path.join(target, name + ".npy"))
+
+        meta = {"version": CACHE_VERSION, "period": self.period, "profiles": len(self)}
+        if source_stat is not None:
+            meta["source_mtime_ns"] = source_stat.st_mtime_ns
+            meta["source_size"] = source_stat.st_size
+        with open(meta_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def __len__(self):
+        return len(self.days)
+
+    @staticmethod
+    def _to_day(day):
+        """Convert a 'YYYY-MM-DD' string, date or datetime to datetime64[D]."""
+        if isinstance(day, datetime):
+            day = day.date()
+        if isinstance(day, (str, date)):
+            return np.datetime64(day, "D")
+        return np.asarray(day, dtype="datetime64[D]")
+
+    def day_slice(self, start, end=None):
+        """
+        Find the profiles whose day lies between start and end (inclusive).
+
+        Args:
+            start: First day ('YYYY-MM-DD', date or datetime)
+            end: Last day, defaults to start
+
+        Returns:
+            tuple: (lo, hi) indices such that profiles lo..hi-1 are in range
+        """
+        start = self._to_day(start)
+        end = start if end is None else self._to_day(end)
+        lo = int(np.searchsorted(self.days, start, side="left"))
+        hi = int(np.searchsorted(self.days, end, side="right"))
+        return lo, max(lo, hi)
+
+    @property
+    def max_altitude(self):
+        """Highest level of the station file in meters, ignoring missing altitudes."""
+        altitudes = np.asarray(self.levels[:, 0])
+        altitudes = altitudes[np.isfinite(altitudes)]
+        return float(np.max(altitudes)) * FEET_TO_METERS if len(altitudes) else 0.0
+
+    def set_altitude_grid(self, altitude_grid):
+        """
+        Resample every profile onto common altitudes.
+
+        Args:
+            altitude_grid (np.ndarray): Altitudes in meters, None to go back to the station levels
+        """
+        self.altitude_grid = None if altitude_grid is None else np.asarray(altitude_grid, dtype=np.float64)
+        self._profiles = dict()
+        self._resized(-self._profiles_nbytes)
+
+    def _convert(self, index):
+        """
+        Convert one profile to SI, resampled onto the altitude grid if any.
+
+        Args:
+            index (int): Profile index
+
+        Returns:
+            np.ndarray: Rows [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
+        """
+        profile = si_profile(self.levels[self.offsets[index]:self.offsets[index + 1]])
+        if self.altitude_grid is not None:
+            profile = resample_profile(profile, self.altitude_grid)
+        return profile
+
+    @property
+    def profiles_nbytes(self):
+        """Size in bytes of the SI profiles converted so far."""
+        return self._profiles_nbytes
+
+    def _resized(self, delta):
+        """Account for SI profiles converted or dropped, and report it to on_resize."""
+        self._profiles_nbytes += delta
+        if delta and self.on_resize is not None:
+            self.on_resize(delta)
+
+    def profile(self, index):
+        """
+        Get a profile in OpenRocket input format.
+
+        Profiles are converted to SI on first request, one at a time, and
+        shared: every call for the same index returns the same read-only
+        array. Copy it before modifying it.
+
+        Args:
+            index (int): Profile index
+
+        Returns:
+            np.ndarray: Rows [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
+        """
+        index = int(index) % len(self)
+        profile = self._profiles.get(index)
+        if profile is None:
+            profile = self._profiles[index] = self._convert(index)
+            profile.flags.writeable = False
+            self._resized(profile.nbytes)
+        return profile
+
+    def profiles_between(self, start, end=None):
+        """
+        Get every profile whose day lies between start and end (inclusive).
+
+        Args:
+            start: First day ('YYYY-MM-DD', date or datetime)
+            end: Last day, defaults to start
+
+        Returns:
+            list: Profiles in OpenRocket input format, in chronological order
+        """
+        lo, hi = self.day_slice(start, end)
+        return [self.profile(i) for i in range(lo, hi)]
+
+    def random_indices(self, start, end, count, rng=None):
+        """
+        Draw random profile indices among the days between start and end.
+
+        Args:
+            start: First day ('YYYY-MM-DD', date or datetime)
+            end: Last day
+            count (int): Number of draws
+            rng (np.random.Generator): Random generator, a fresh one if None
+
+        Returns:
+            np.ndarray: Profile indices, empty if no profile lies in the range
+        """
+        lo, hi = self.day_slice(start, end)
+        if hi == lo or count <= 0:
+            return np.empty(0, dtype=np.int64)
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.integers(lo, hi, size=count)
+
+    def random_profiles(self, start, end, count, rng=None):
+        """
+        Draw random profiles among the days between start and end.
+
+        Args:
+            start: First day ('YYYY-MM-DD', date or datetime)
+            end: Last day
+            count (int): Number of draws
+            rng (np.random.Generator): Random generator, a fresh one if None
+
+        Returns:
+            list: Profiles in OpenRocket input format
+        """
+        return [self.profile(i) for i in self.random_indices(start, end, count, rng)]
+
+
+def _to_instant(value):
+    """Convert a validity timestamp of a station file to datetime64[s], NaT if missing."""
+    if not value:
+        return np.datetime64("NaT", "s")
+    return np.datetime64(value[:19], "s")
+
+
+def si_profile(levels):
+    """
+    Convert station level rows to the OpenRocket input format in SI units.
+
+    Args:
+        levels (np.ndarray): Rows [altitude (ft), wind (kt), heading (deg), ...]
+
+    Returns:
+        np.ndarray: Contiguous rows [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
+    """
+    levels = np.asarray(levels, dtype=np.float64).reshape(-1, len(LEVEL_FIELDS))
+    profile = np.zeros((len(levels), 4), dtype=np.float64)
+    profile[:, 0] = levels[:, 0] * FEET_TO_METERS
+    profile[:, 1] = levels[:, 1] * KNOTS_TO_METERS_PER_SECOND
+    profile[:, 2] = np.radians(levels[:, 2])
+    return profile
+
+
+def resample_profile(profile, altitude_grid):
+    """
+    Resample an SI profile onto given altitudes.
+
+    The wind is interpolated by its east/north components, so directions
+    wrap correctly across north. Altitudes outside the profile take the
+    wind of its nearest level.
+
+    Args:
+        profile (np.ndarray): Rows [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
+        altitude_grid (np.ndarray): Altitudes in meters
+
+    Returns:
+        np.ndarray: Profile rows at the grid altitudes
+    """
+    resampled = np.zeros((len(altitude_grid), 4), dtype=np.float64)
+    resampled[:, 0] = altitude_grid
+    if not len(profile):
+        return resampled
+    profile = profile[np.argsort(profile[:, 0])]
+    u = np.interp(altitude_grid, profile[:, 0], profile[:, 1] * np.sin(profile[:, 2]))
+    v = np.interp(altitude_grid, profile[:, 0], profile[:, 1] * np.cos(profile[:, 2]))
+    resampled[:, 1] = np.hypot(u, v)
+    resampled[:, 2] = np.mod(np.arctan2(u, v), 2 * np.pi)
+    resampled[:, 3] = np.interp(altitude_grid, profile[:, 0], profile[:, 3])
+    return resampled
+
+
+def blend_profiles(profiles, weights):
+    """
+    Blend SI profiles into their weighted average.
+
+    Profiles are resampled onto the union of their altitudes and averaged by
+    their east/north wind components, so opposite winds cancel out instead of
+    averaging their directions.
+
+    Args:
+        profiles (list): Rows [altitude (m), wind_speed (m/s), direction (rad), deviation (m/s)]
+        weights (np.ndarray): Weight of each profile, not necessarily normalized
+
+    Returns:
+        np.ndarray: Blended profile rows
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / np.sum(weights)
+    grid = np.unique(np.concatenate([profile[:, 0] for profile in profiles]))
+    u = np.zeros(len(grid))
+    v = np.zeros(len(grid))
+    deviation = np.zeros(len(grid))
+    for profile, weight in zip(profiles, weights):
+        resampled = resample_profile(profile, grid)
+        u += weight * resampled[:, 1] * np.sin(resampled[:, 2])
+        v += weight * resampled[:, 1] * np.cos(resampled[:, 2])
+        deviation += weight * resampled[:, 3]
+
+    blended = np.zeros((len(grid), 4), dtype=np.float64)
+    blended[:, 0] = grid
+    blended[:, 1] = np.hypot(u, v)
+    blended[:, 2] = np.mod(np.arctan2(u, v), 2 * np.pi)
+    blended[:, 3] = deviation
+    return blended
+
+
+def cache_path(path, period="AM", cache_dir=None):
+    """
+    Get the cache directory of a station file and period.
+
+    Args:
+        path (str): Path to a *.upper_winds.json station file
+        period (str): Forecast period
+        cache_dir (str): Cache root, defaults to a .cache directory next to the station file
+
+    Returns:
+        str: Cache directory path
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    name = os.path.basename(path)
+    if name.endswith(".json"):
+        name = name[:-len(".json")]
+    return os.path.join(cache_dir, f"{name}.{period}")
+
+
+def cache_is_fresh(path, target):
+    """
+    Check whether a compiled cache matches its station file.
+
+    Args:
+        path (str): Path to the station file
+        target (str): Cache directory
+
+    Returns:
+        bool: True if the cache is complete and was built from the current file
+    """
+    try:
+        with open(os.path.join(target, "meta.json"), 'r', encoding="utf-8") as f:
+            meta = json.load(f)
+        source = os.stat(path)
+    except (OSError, ValueError):
+        return False
+
+    return (meta.get("version") == CACHE_VERSION
+            and meta.get("source_mtime_ns") == source.st_mtime_ns
+            and meta.get("source_size") == source.st_size
+            and all(os.path.exists(os.path.join(target, name + ".npy")) for name in CACHE_COLUMNS))
+
+
+def compile_cache(path, period="AM", cache_dir=None):
+    """
+    Compile a station file into its columnar cache.
+
+    Args:
+        path (str): Path to a *.upper_winds.json station file
+        period (str): Forecast period to compile
+        cache_dir (str): Cache root, defaults to a .cache directory next to the station file
+
+    Returns:
+        str: Cache directory path
+    """
+    source_stat = os.stat(path)
+    target = cache_path(path, period, cache_dir)
+    WindDatabase.from_json(path, period).save(target, source_stat)
+    return target
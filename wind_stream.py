@@ -0,0 +1,152 @@
+"""
+Streaming station file reader module.
+Reads upper-winds station files record by record, from the JSON array
+format or its newline-delimited (NDJSON) variant, and trims every record to
+the periods and level fields the wind index needs. Peak memory is one
+record plus the read buffer, whatever the size of the archive.
+"""
+
+import json
+
+DEFAULT_CHUNK_SIZE = 1 << 20  # characters read at a time
+DEFAULT_FIELDS = ("altitude", "wind", "heading", "temperature")
+PERIODS = ("AM", "PM", "NIGHT")
+# Period keys kept next to the level data
+PERIOD_KEYS = ("startValidity", "endValidity")
+
+_WHITESPACE = " \t\r\n"
+
+
+def iter_json_array(f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Decode the elements of a top-level JSON array one at a time.
+
+    Args:
+        f: Text file positioned at the opening bracket (leading whitespace allowed)
+        chunk_size (int): Characters read at a time
+
+    Yields:
+        Decoded elements, in file order
+
+    Raises:
+        ValueError: If the file is not a well-formed JSON array
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    while True:
+        # Skip whitespace and element separators, reading on as needed
+        while True:
+            while pos < len(buffer) and (buffer[pos] in _WHITESPACE or (started and buffer[pos] == ",")):
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer = f.read(chunk_size)
+            pos = 0
+            eof = not buffer
+        if pos >= len(buffer):
+            if started:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+            # A number ending with the buffer may continue in the next chunk
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # The element runs past the buffer: keep its start and read on
+            chunk = f.read(chunk_size)
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+
+        yield element
+        pos = end
+        if pos >= chunk_size:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def iter_ndjson(f):
+    """
+    Decode a newline-delimited JSON file one line at a time.
+
+    Args:
+        f: Text file with one JSON value per line; blank lines are skipped
+
+    Yields:
+        Decoded values, in file order
+    """
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def trim_record(record, periods=PERIODS, fields=DEFAULT_FIELDS):
+    """
+    Keep only the parts of a station record the wind index reads.
+
+    Args:
+        record (dict): Station record as found in the station files
+        periods (tuple): Periods to keep
+        fields (tuple): Level fields to keep
+
+    Returns:
+        dict: {"datetime": str, period: {"data": [levels], "startValidity": str, "endValidity": str}}
+    """
+    trimmed = {"datetime": record.get("datetime", "")}
+    for period in periods:
+        block = record.get(period)
+        if not isinstance(block, dict) or "data" not in block:
+            continue
+        kept = {key: block[key] for key in PERIOD_KEYS if key in block}
+        kept["data"] = [{field: level.get(field) for field in fields} for level in block["data"]]
+        trimmed[period] = kept
+    return trimmed
+
+
+def iter_station_records(path, periods=PERIODS, fields=DEFAULT_FIELDS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the trimmed records of a station file.
+
+    The format is detected from the first character: a JSON array, or one
+    record per line (NDJSON).
+
+    Args:
+        path (str): Station file
+        periods (tuple): Periods to keep
+        fields (tuple): Level fields to keep
+        chunk_size (int): Characters read at a time from a JSON array
+
+    Yields:
+        dict: Trimmed records, see trim_record
+    """
+    with open(path, 'r', encoding="utf-8") as f:
+        first = ""
+        while True:
+            first = f.read(1)
+            if not first or first not in _WHITESPACE:
+                break
+        if not first:
+            return
+        f.seek(0)
+        records = iter_json_array(f, chunk_size) if first == "[" else iter_ndjson(f)
+        for record in records:
+            yield trim_record(record, periods, fields)
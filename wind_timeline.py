@@ -0,0 +1,265 @@
+"""
+Wind timeline module.
+Queries the wind profiles of a station by launch time rather than by day and
+forecast period: an interval index over the validity windows of every AM, PM
+and NIGHT forecast finds the forecasts covering a launch, and adjacent
+forecasts are blended when a launch straddles them.
+"""
+
+from datetime import datetime, time, timedelta
+
+import numpy as np
+
+from wind_database import WindDatabase, blend_profiles
+from wind_stream import PERIODS
+
+# Launch times within a launch window are this far apart
+DEFAULT_LAUNCH_STEP = timedelta(minutes=30)
+# Forecasts are blended over this much time on each side of their validity bounds
+DEFAULT_BLEND_MARGIN = timedelta(minutes=30)
+
+
+def _to_instant(value):
+    """Convert a 'YYYY-MM-DDTHH:MM[:SS]' string or datetime to datetime64[s]."""
+    return np.datetime64(value, "s")
+
+
+def _to_time(value):
+    """Convert an 'HH:MM' string or time to a time."""
+    return value if isinstance(value, time) else datetime.strptime(value, "%H:%M").time()
+
+
+class WindTimeline:
+    """
+    Interval index over the forecast validity windows of a station.
+
+    Every forecast with a known validity is an interval [start, end]. The
+    intervals of all periods are sorted by start, and ``reach[i]`` holds the
+    latest end among intervals 0..i. Since reach never decreases, the
+    intervals covering an instant lie between the first position whose reach
+    gets to it and the last one starting before it, both found by bisection.
+
+    Attributes:
+        databases (dict): Period to WindDatabase
+        periods (tuple): Period of each entry of the index
+        indices (np.ndarray): Index of each entry in the database of its period
+        starts (np.ndarray): Start of each interval (datetime64[s]), sorted
+        ends (np.ndarray): End of each interval (datetime64[s])
+        reach (np.ndarray): Running maximum of ends
+        blend_margin (np.timedelta64): Widening of every interval used when blending
+    """
+
+    def __init__(self, databases, blend_margin=DEFAULT_BLEND_MARGIN):
+        """
+        Index the forecasts of the databases of one station.
+
+        Args:
+            databases (dict): Period to WindDatabase
+            blend_margin (timedelta): Time over which forecasts are blended past their
+                validity bounds, zero to switch forecasts at the bounds
+        """
+        self.databases = databases
+        self.blend_margin = np.timedelta64(int(blend_margin.total_seconds()), "s")
+
+        periods, indices, starts, ends = [], [], [], []
+        for period, database in databases.items():
+            known = np.flatnonzero(~np.isnat(database.starts) & ~np.isnat(database.ends))
+            periods.extend([period] * len(known))
+            indices.append(known)
+            starts.append(np.asarray(database.starts)[known])
+            ends.append(np.asarray(database.ends)[known])
+
+        starts = np.concatenate(starts) if starts else np.empty(0, dtype="datetime64[s]")
+        order = np.argsort(starts, kind="stable")
+        self.periods = tuple(periods[i] for i in order)
+        self.indices = np.concatenate(indices)[order] if indices else np.empty(0, dtype=np.int64)
+        self.starts = starts[order]
+        self.ends = np.concatenate(ends)[order] if ends else np.empty(0, dtype="datetime64[s]")
+        self.reach = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    @classmethod
+    def from_registry(cls, registry, code, periods=PERIODS, blend_margin=DEFAULT_BLEND_MARGIN):
+        """
+        Index the forecasts of a station of a registry.
+
+        Args:
+            registry (StationRegistry): Registry the station databases are opened from
+            code (str): Station code
+            periods (tuple): Periods to index
+            blend_margin (timedelta): Time over which forecasts are blended past their bounds
+
+        Returns:
+            WindTimeline: Timeline of the station
+        """
+        return cls({period: registry.get(code, period) for period in periods}, blend_margin)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlapping(self, start, end=None, margin=None):
+        """
+        Find the forecasts whose validity overlaps a time range.
+
+        Args:
+            start: First instant ('YYYY-MM-DDTHH:MM:SS' or datetime)
+            end: Last instant, defaults to start
+            margin (np.timedelta64): Widening of every interval, none if None
+
+        Returns:
+            np.ndarray: Positions in the index, in start order
+        """
+        start = _to_instant(start)
+        end = start if end is None else _to_instant(end)
+        margin = np.timedelta64(0, "s") if margin is None else margin
+        hi = int(np.searchsorted(self.starts, end + margin, side="right"))
+        lo = int(np.searchsorted(self.reach[:hi], start - margin, side="left"))
+        candidates = np.arange(lo, hi)
+        return candidates[self.ends[lo:hi] + margin >= start]
+
+    def covering(self, instant):
+        """
+        Find the forecasts valid at an instant.
+
+        Args:
+            instant: 'YYYY-MM-DDTHH:MM:SS' or datetime
+
+        Returns:
+            list: (period, index in the period's database) of every covering forecast
+        """
+        return [(self.periods[i], int(self.indices[i])) for i in self.overlapping(instant)]
+
+    def weights(self, instant):
+        """
+        Blend weights of the forecasts around an instant.
+
+        Every forecast within the blend margin of the instant weighs its
+        distance to the nearest bound of its widened validity interval, so the
+        weights ramp linearly across overlaps and period boundaries.
+
+        Args:
+            instant: 'YYYY-MM-DDTHH:MM:SS' or datetime
+
+        Returns:
+            tuple: (positions in the index, normalized weights), both empty if no forecast is near
+        """
+        instant = _to_instant(instant)
+        positions = self.overlapping(instant, margin=self.blend_margin)
+        if not len(positions):
+            return positions, np.empty(0)
+        to_start = instant - (self.starts[positions] - self.blend_margin)
+        to_end = (self.ends[positions] + self.blend_margin) - instant
+        weights = np.minimum(to_start, to_end).astype(np.float64) + 1.0
+        return positions, weights / np.sum(weights)
+
+    def profile_at(self, instant):
+        """
+        Get the wind profile of a launch at an instant.
+
+        Args:
+            instant: 'YYYY-MM-DDTHH:MM:SS' or datetime
+
+        Returns:
+            np.ndarray: Read-only profile in OpenRocket input format, blended if the launch
+                straddles several forecasts, None if no forecast is near the instant
+        """
+        positions, weights = self.weights(instant)
+        if not len(positions):
+            return None
+        profiles = [self.databases[self.periods[i]].profile(int(self.indices[i])) for i in positions]
+        if len(profiles) == 1:
+            return profiles[0]
+        profile = blend_profiles(profiles, weights)
+        profile.flags.writeable = False
+        return profile
+
+    def launch_times(self, first_day, last_day, window_start, window_end, step=DEFAULT_LAUNCH_STEP):
+        """
+        List the launch times of a daily launch window over a date range.
+
+        A window ending before it starts runs past midnight into the next day.
+
+        Args:
+            first_day: First day ('YYYY-MM-DD', date or datetime)
+            last_day: Last day
+            window_start: Opening of the window ('HH:MM' or time)
+            window_end: Closing of the window, included
+            step (timedelta): Time between launches
+
+        Returns:
+            np.ndarray: Launch times (datetime64[s]), sorted
+        """
+        days = np.arange(WindDatabase._to_day(first_day), WindDatabase._to_day(last_day) + 1)
+        window_start, window_end = _to_time(window_start), _to_time(window_end)
+        opening = timedelta(hours=window_start.hour, minutes=window_start.minute)
+        duration = timedelta(hours=window_end.hour, minutes=window_end.minute) - opening
+        if duration < timedelta(0):
+            duration += timedelta(days=1)
+        offsets = np.arange(0, int(duration.total_seconds()) + 1, max(1, int(step.total_seconds())))
+        offsets = np.timedelta64(int(opening.total_seconds()), "s") + offsets.astype("timedelta64[s]")
+        return (days.astype("datetime64[s]")[:, None] + offsets[None, :]).ravel()
+
+    def launch_window(self, first_day, last_day, window_start, window_end, step=DEFAULT_LAUNCH_STEP):
+        """
+        Get the profiles of a daily launch window over a date range.
+
+        Args:
+            first_day: First day ('YYYY-MM-DD', date or datetime)
+            last_day: Last day
+            window_start: Opening of the window ('HH:MM' or time)
+            window_end: Closing of the window, included
+            step (timedelta): Time between launches
+
+        Returns:
+            LaunchWindowDatabase: Profiles of the launch times near a forecast
+        """
+        times = self.launch_times(first_day, last_day, window_start, window_end, step)
+        near = [len(self.overlapping(t, margin=self.blend_margin)) > 0 for t in times]
+        return LaunchWindowDatabase(self, times[np.asarray(near, dtype=bool)])
+
+
+class LaunchWindowDatabase(WindDatabase):
+    """
+    Wind profiles of a set of launch times, with the queries of WindDatabase.
+
+    Profile ``i`` is the profile of a launch at ``times[i]``, indexed by the
+    day of that launch, so samplers and the data formatter draw launch times
+    exactly as they draw days of a single period.
+
+    Attributes:
+        timeline (WindTimeline): Timeline the profiles are taken from
+        times (np.ndarray): Launch time of each profile (datetime64[s]), sorted
+    """
+
+    def __init__(self, timeline, times):
+        """
+        Initialize the database of the given launch times.
+
+        Args:
+            timeline (WindTimeline): Timeline the profiles are taken from
+            times (np.ndarray): Launch times (datetime64[s]), sorted
+        """
+        days = np.asarray(times).astype("datetime64[D]")
+        super().__init__(days, np.zeros(len(days) + 1, dtype=np.int64), np.empty((0, 4)),
+                         period="launch window", starts=times, ends=times)
+        self.timeline = timeline
+        self.times = times
+
+    @property
+    def max_altitude(self):
+        """Highest level of the station files in meters."""
+        return max((database.max_altitude for database in self.timeline.databases.values()), default=0.0)
+
+    def set_altitude_grid(self, altitude_grid):
+        """
+        Resample every profile onto common altitudes.
+
+        Args:
+            altitude_grid (np.ndarray): Altitudes in meters, None to go back to the station levels
+        """
+        for database in self.timeline.databases.values():
+            database.set_altitude_grid(altitude_grid)
+        super().set_altitude_grid(altitude_grid)
+
+    def _convert(self, index):
+        """Get the profile of one launch time."""
+        return self.timeline.profile_at(self.times[index])